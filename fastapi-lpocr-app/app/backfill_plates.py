@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+
+from sqlalchemy import bindparam, select, update
+
+from app.config.database import SessionLocal
+from app.models.cropped_image import CroppedImage
+from app.services.plates import plate_columns
+
+PLATE_COLUMNS = ("license_plate_normalized", "plate_prefix", "plate_number", "plate_province")
+
+
+async def backfill(batch_size: int, everything: bool = False, start_id: int = 0) -> int:
+    # Fill the normalized/parsed plate columns of crops stored before they existed (or of every
+    # crop, e.g. after the parser changed), batch by batch in id order so it can be stopped and
+    # continued from the last id printed
+    done, last_id = 0, start_id
+    table = CroppedImage.__table__
+    async with SessionLocal() as session:
+        while True:
+            statement = select(CroppedImage.id, CroppedImage.license_plate).where(CroppedImage.id > last_id)
+            if not everything:
+                statement = statement.where(CroppedImage.license_plate_normalized.is_(None))
+            rows = (await session.execute(statement.order_by(CroppedImage.id).limit(batch_size))).all()
+            if not rows:
+                return done
+
+            await session.execute(
+                update(table)
+                .where(table.c.id == bindparam("crop_id"))
+                .values({column: bindparam(f"new_{column}") for column in PLATE_COLUMNS}),
+                [
+                    {"crop_id": crop_id, **{f"new_{column}": value for column, value in plate_columns(plate).items()}}
+                    for crop_id, plate in rows
+                ]
+            )
+            await session.commit()
+            done += len(rows)
+            last_id = rows[-1].id
+            print(f"{done} crops normalized, last id {last_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize and parse the plate text of existing crops")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--all", action="store_true", help="redo crops that already have normalized columns")
+    parser.add_argument("--start-id", type=int, default=0, help="continue after this crop id")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.all, args.start_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import json
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+
+def parse_cameras(values: list) -> dict:
+    # ["gate1=rtsp://...", "gate2=clip.mp4"] -> {"gate1": "rtsp://...", "gate2": "clip.mp4"}
+    cameras = {}
+    for value in values:
+        camera_id, _, source = value.partition("=")
+        if not source:
+            raise ValueError(f"Camera '{value}' must be <id>=<rtsp/http url or file>")
+        cameras[camera_id] = source
+    return cameras
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run plate recognition on RTSP/HTTP/IP cameras (or mp4 files)")
+    parser.add_argument("--camera", action="append", default=[], help="<id>=<source>, repeat per camera")
+    parser.add_argument("--priority", action="append", default=[], help="<id>=<n>, higher is served first")
+    parser.add_argument("--batch-size", type=int, default=settings.CAMERA_BATCH_SIZE)
+    parser.add_argument("--policy", choices=["round_robin", "priority"], default=settings.CAMERA_POLICY)
+    parser.add_argument("--loop", action="store_true", help="loop file sources")
+    parser.add_argument("--stats-every", type=float, default=10)
+    args = parser.parse_args()
+
+    from app.config.model_registry import model_registry
+    from app.services.cameras import CameraInference, CameraReader, CameraScheduler
+    from app.services.upload import UploadFileService
+
+    cameras = parse_cameras(args.camera or [value for value in settings.CAMERA_SOURCES.split(",") if value])
+    priorities = {camera_id: int(priority) for camera_id, priority in (value.split("=") for value in args.priority)}
+
+    model_registry.warm_up(["vehicle", "license_plate", "plate_ocr"])
+    readers = [
+        CameraReader(camera_id, source, priority=priorities.get(camera_id, 0), loop=args.loop)
+        for camera_id, source in cameras.items()
+    ]
+
+    inference = CameraInference(UploadFileService())
+    printed = {}  # (camera, track id) -> last printed plate text, only for the live tracks
+
+    def on_result(camera_id: str, frame, vehicles: list):
+        # Print every plate once its (voted) text changes
+        for vehicle in vehicles:
+            key = (camera_id, vehicle["track_id"])
+            if vehicle["license_plate"] and printed.get(key) != vehicle["license_plate"]:
+                printed[key] = vehicle["license_plate"]
+                print(f"[{camera_id}] #{vehicle['track_id']} {vehicle['class_name']}: {vehicle['license_plate']}")
+
+        # Forget the tracks the camera's tracker dropped (track ids are never reused), this runs for days
+        tracks = inference.trackers[camera_id].data
+        for key in [key for key in printed if key[0] == camera_id and key[1] not in tracks]:
+            del printed[key]
+
+    scheduler = CameraScheduler(
+        readers, inference, on_result, batch_size=args.batch_size, policy=args.policy
+    )
+    scheduler.start()
+    try:
+        while not scheduler.wait(args.stats_every):
+            print(json.dumps(scheduler.stats()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        print(json.dumps(scheduler.stats()))
+
+
+if __name__ == "__main__":
+    main()
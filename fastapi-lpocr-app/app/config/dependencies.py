@@ -8,8 +8,7 @@ from fastapi.exceptions import HTTPException
 from app.config.database import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import Users
-from app.services.user import get_rolename_by_usersroles, get_user_by_email
+from app.services.principals import get_principal
 
 
 class TokenBearer(HTTPBearer):
@@ -21,40 +20,53 @@ class TokenBearer(HTTPBearer):
 
         token = creds.credentials
 
-        token_data = decode_token(token)
-
-        if not self.token_valid(token):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail={
-                    "error":"This token is invalid or expired",
-                    "resolution":"Please get new token"
-                }
-            )
-        
-        if await token_in_blocklist(token_data["jti"]):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail={
-                    "error":"This token is invalid or has been revoked",
-                    "resolution":"Please get new token"
-                }
-            )
+        # A route can resolve several bearers (its own and get_current_user's), the token is
+        # decoded and checked against the blocklist once per request
+        checked = getattr(request.state, "checked_tokens", None)
+        if checked is None:
+            checked = request.state.checked_tokens = {}
+        token_data = checked.get(token)
+
+        if token_data is None:
+            token_data = decode_token(token)
+
+            if token_data is None:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail={
+                        "error":"This token is invalid or expired",
+                        "resolution":"Please get new token"
+                    }
+                )
+
+            if await token_in_blocklist(token_data["jti"]):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail={
+                        "error":"This token is invalid or has been revoked",
+                        "resolution":"Please get new token"
+                    }
+                )
+            checked[token] = token_data
 
 
         self.verify_token_data(token_data)
 
         return token_data
     
-    def token_valid(self,token: str) -> bool:
-        token_data = decode_token( token)
-
-        return token_data is not None
-    
     def verify_token_data(self, token_data):
         raise NotImplementedError("Please Override this method in child classes")
 
 
+async def access_token_data(token: str | None) -> dict | None:
+    # Decoded access token, None when missing, invalid, expired, revoked or a refresh token.
+    # For WebSockets, where a browser cannot send an Authorization header
+    token_data = decode_token(token) if token else None
+    if token_data is None or token_data.get("refresh") or await token_in_blocklist(token_data["jti"]):
+        return None
+    return token_data
+
+
 class AccessTokenBearer(TokenBearer):
     def verify_token_data(self, token_data: dict) -> None:
         if token_data and token_data["refresh"]:
@@ -72,18 +84,24 @@ class RefreshTokenBearer(TokenBearer):
                 detail="Please provide a refresh token"
             )
         
-async def get_current_user(token_details: dict = Depends(AccessTokenBearer()),
+async def get_current_user(request: Request,
+                           token_details: dict = Depends(AccessTokenBearer()),
                            db: AsyncSession = Depends(get_db)):
-    user_email = token_details['user']['email']
-    user = await get_user_by_email(db, user_email)
+    # (Principal, role name) of the token's user: once per request, from the principal cache
+    # of this process when it was loaded in the last PRINCIPAL_CACHE_TTL seconds
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+
+    user, role = await get_principal(db, token_details['user']['user_uid'])
     
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    role = await get_rolename_by_usersroles(db, user.id)
     
+    request.state.principal = user, role
     return user,role
 
 class RoleChecker:
@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+MODEL_WEIGHTS = {
+    "vehicle": "app/model_weights/merq_vehicleV1m.pt",
+    "license_plate": "app/model_weights/license_platev1nbest.pt",
+    "coco": "app/model_weights/yolo11s.pt",
+}
+
+
+def _rss_bytes() -> int:
+    import psutil  # installed with ultralytics
+    return psutil.Process().memory_info().rss
+
+
+def _parameter_bytes(model) -> int:
+    # Size of the weights actually held by a detector or an easyocr.Reader
+    modules = [getattr(model, "model", None), getattr(model, "recognizer", None), getattr(model, "detector", None)]
+    total = 0
+    for module in modules:
+        if module is None or not hasattr(module, "parameters"):
+            continue
+        total += sum(p.numel() * p.element_size() for p in module.parameters())
+        total += sum(b.numel() * b.element_size() for b in module.buffers())
+    # ONNX Runtime sessions do not expose their tensors, count the model file instead
+    return total + getattr(model, "weights_bytes", 0)
+
+
+class ModelRegistry:
+    """One shared, lazily loaded instance of every model in the process.
+
+    `get(name)` loads the model on first use (thread-safe, loaded once), `warm_up()`
+    loads models up front and runs one dummy inference through each, e.g. in the
+    inference workers or in a background thread at app startup (`start_warm_up()`,
+    `ready` is set when it finished). `stats()` reports load time and memory of
+    every loaded model.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._warmers = {}
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.RLock()  # a loader may get() another model (plate_ocr -> easyocr)
+        self.ready = threading.Event()
+        self.warm_up_error = None
+
+    def register(self, name: str, loader, warmer=None) -> None:
+        self._loaders[name] = loader
+        if warmer is not None:
+            self._warmers[name] = warmer
+
+    def get(self, name: str):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._load(name)
+            return self._models[name]
+
+    def warm_up(self, names: list = None) -> None:
+        for name in self._loaders if names is None else names:
+            model = self.get(name)
+            if name in self._warmers:
+                start = time.perf_counter()
+                self._warmers[name](model)
+                self._stats[name]["warm_up_seconds"] = round(time.perf_counter() - start, 3)
+        self.ready.set()
+
+    def start_warm_up(self, names: list = None) -> threading.Thread:
+        def run():
+            try:
+                self.warm_up(names)
+            except Exception as e:
+                logging.exception(e)
+                self.warm_up_error = str(e)
+
+        thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def stats(self) -> dict:
+        return {
+            name: {"loaded": name in self._models, **self._stats.get(name, {})}
+            for name in self._loaders
+        }
+
+    def _load(self, name: str):
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+
+        model = self._loaders[name]()
+
+        self._stats[name] = {
+            "load_seconds": round(time.perf_counter() - start, 3),
+            "parameter_bytes": _parameter_bytes(model),
+            "rss_delta_bytes": _rss_bytes() - rss_before,
+        }
+        logging.info(f"Loaded model '{name}': {self._stats[name]}")
+        return model
+
+
+def _load_detector(weights: str):
+    from app.services.detector import load_detector
+    return load_detector(weights, settings.DETECTOR_BACKEND, settings.ONNX_INTRA_OP_THREADS)
+
+
+def _warm_detector(detector):
+    # First inference builds the predictor / runs the lazy parts of the runtime, pay it before the first request
+    import numpy as np
+    detector.detect([np.zeros((640, 640, 3), dtype=np.uint8)])
+
+
+def _load_easyocr():
+    import easyocr
+    return easyocr.Reader(['th'])
+
+
+def _warm_easyocr(reader):
+    import numpy as np
+    reader.recognize(np.zeros((64, 256), dtype=np.uint8))
+
+
+def _load_plate_ocr():
+    from app.services.ocr import load_plate_ocr
+    from app.services.ocr_cache import PlateOCRCache
+    engine = load_plate_ocr(settings.OCR_BACKEND, settings.OCR_BATCH_SIZE, settings.OCR_MODEL_DIR or None)
+    return PlateOCRCache(
+        engine, settings.OCR_CACHE_SIZE, settings.OCR_CACHE_MAX_DISTANCE,
+        min_confidence=settings.OCR_CACHE_MIN_CONFIDENCE
+    )
+
+
+def _warm_plate_ocr(plate_ocr):
+    import numpy as np
+    plate_ocr.read_plates([np.zeros((64, 256), dtype=np.uint8)])
+
+
+model_registry = ModelRegistry()
+for _name, _weights in MODEL_WEIGHTS.items():
+    model_registry.register(_name, lambda weights=_weights: _load_detector(weights), _warm_detector)
+model_registry.register("easyocr", _load_easyocr, _warm_easyocr)
+model_registry.register("plate_ocr", _load_plate_ocr, _warm_plate_ocr)
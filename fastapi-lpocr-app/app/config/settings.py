@@ -1,4 +1,5 @@
 import os
+import tempfile
 from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pathlib import Path
@@ -49,6 +50,67 @@ class Settings(BaseSettings):
     AZURE_CONNECTION_STRING: str = os.environ.get("AZURE_CONNECTION_STRING", "")
     AZURE_ACCOUNT_NAME: str = os.environ.get("AZURE_ACCOUNT_NAME", "mercuonestorage")
     AZURE_CONTAINER_NAME: str = os.environ.get("AZURE_CONTAINER_NAME", "vehicle-imageclassify")
+    # Where uploads, crops and results are stored: azure or local (files on disk, served by /api/files)
+    STORAGE_BACKEND: str = os.environ.get("STORAGE_BACKEND", "azure")
+    LOCAL_STORAGE_DIR: str = os.environ.get("LOCAL_STORAGE_DIR", "storage")
+    LOCAL_STORAGE_URL: str = os.environ.get("LOCAL_STORAGE_URL", "http://localhost:8000/api/files")
+    # Crop uploads in flight at once per job
+    BLOB_UPLOAD_CONCURRENCY: int = int(os.environ.get("BLOB_UPLOAD_CONCURRENCY", 8))
+
+    # Inference jobs
+    UPLOAD_SPOOL_DIR: str = os.environ.get("UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "lpocr-uploads"))
+    INFERENCE_WORKERS: int = int(os.environ.get("INFERENCE_WORKERS", 1))
+    # A running job whose worker sent no heartbeat for this many seconds is requeued (worker died)
+    JOB_STALE_SECONDS: float = float(os.environ.get("JOB_STALE_SECONDS", 120))
+    # Chunk size of resumable uploads (/api/vehicle/upload/sessions)
+    UPLOAD_SESSION_CHUNK_SIZE: int = int(os.environ.get("UPLOAD_SESSION_CHUNK_SIZE", 8 * 1024 * 1024))
+    # A job reading a resumable upload that is still arriving fails after this many seconds without a new chunk
+    UPLOAD_STALL_TIMEOUT: float = float(os.environ.get("UPLOAD_STALL_TIMEOUT", 300))
+    # Detector runtime for the YOLO models: torch, onnx, onnx-int8 or openvino (export with python -m app.export_models)
+    DETECTOR_BACKEND: str = os.environ.get("DETECTOR_BACKEND", "torch")
+    ONNX_INTRA_OP_THREADS: int = int(os.environ.get("ONNX_INTRA_OP_THREADS", 0))
+    # Plate OCR engine for uploads, cameras and the webcam: easyocr, tesserocr or paddleocr (see app/services/ocr.py)
+    OCR_BACKEND: str = os.environ.get("OCR_BACKEND", "easyocr")
+    OCR_BATCH_SIZE: int = int(os.environ.get("OCR_BATCH_SIZE", 32))
+    # tessdata directory (tesserocr) or Thai recognizer model directory (paddleocr), empty = library default
+    OCR_MODEL_DIR: str = os.environ.get("OCR_MODEL_DIR", "")
+    # Plate texts of recent crops per track, reused when a crop's dHash is within OCR_CACHE_MAX_DISTANCE bits (0 = off)
+    OCR_CACHE_SIZE: int = int(os.environ.get("OCR_CACHE_SIZE", 1024))
+    OCR_CACHE_MAX_DISTANCE: int = int(os.environ.get("OCR_CACHE_MAX_DISTANCE", 10))
+    # Empty readings and readings below this confidence are never cached
+    OCR_CACHE_MIN_CONFIDENCE: float = float(os.environ.get("OCR_CACHE_MIN_CONFIDENCE", 0.5))
+    # Models the API process loads and warms up in the background at startup, comma separated, empty = load on first use
+    WARMUP_MODELS: str = os.environ.get("WARMUP_MODELS", "coco,license_plate,plate_ocr")
+
+    # Crops of an upload are inserted as multi-row INSERT ... RETURNING pages of this many rows,
+    # from BULK_COPY_THRESHOLD crops on with COPY (asyncpg only)
+    BULK_INSERT_PAGE_SIZE: int = int(os.environ.get("BULK_INSERT_PAGE_SIZE", 1000))
+    BULK_COPY_THRESHOLD: int = int(os.environ.get("BULK_COPY_THRESHOLD", 5000))
+
+    # Plate search: minimum pg_trgm similarity of a fuzzy match
+    PLATE_FUZZY_THRESHOLD: float = float(os.environ.get("PLATE_FUZZY_THRESHOLD", 0.3))
+
+    # Authenticated user + role per users.id, reused by every request of the next PRINCIPAL_CACHE_TTL seconds
+    # (0 = query every request). Also the longest another worker keeps a role change or verification unseen
+    PRINCIPAL_CACHE_TTL: float = float(os.environ.get("PRINCIPAL_CACHE_TTL", 30))
+    PRINCIPAL_CACHE_SIZE: int = int(os.environ.get("PRINCIPAL_CACHE_SIZE", 10000))
+
+    # Webcam streams: state of a session is dropped after this many idle seconds, optionally kept in Redis
+    # so any uvicorn worker can continue a stream
+    WEBCAM_SESSION_TTL: int = int(os.environ.get("WEBCAM_SESSION_TTL", 300))
+    WEBCAM_SESSION_REDIS: bool = os.environ.get("WEBCAM_SESSION_REDIS", "false").lower() == "true"
+
+    # IP cameras for python -m app.camera_ingest: comma separated <id>=<rtsp/http url or file>
+    CAMERA_SOURCES: str = os.environ.get("CAMERA_SOURCES", "")
+    CAMERA_BATCH_SIZE: int = int(os.environ.get("CAMERA_BATCH_SIZE", 4))
+    CAMERA_POLICY: str = os.environ.get("CAMERA_POLICY", "round_robin")
+
+    # Video frame sampling: all, stride, motion or keyframe (see app/services/sampling.py)
+    VIDEO_SAMPLING_MODE: str = os.environ.get("VIDEO_SAMPLING_MODE", "all")
+    VIDEO_SAMPLING_STRIDE: int = int(os.environ.get("VIDEO_SAMPLING_STRIDE", 5))
+    VIDEO_MOTION_THRESHOLD: float = float(os.environ.get("VIDEO_MOTION_THRESHOLD", 6.0))
+    VIDEO_KEYFRAME_THRESHOLD: float = float(os.environ.get("VIDEO_KEYFRAME_THRESHOLD", 0.9))
+    VIDEO_MAX_SKIP: int = int(os.environ.get("VIDEO_MAX_SKIP", 30))
 
     # App Secret Key
     SECRET_KEY: str = os.environ.get("SECRET_KEY", "8deadce9449770680910741063cd0a3fe0acb62a8978661f421bbcbb66dc41f1")
@@ -0,0 +1,239 @@
+import asyncio
+import os
+import re
+import shutil
+from functools import lru_cache
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+STORAGE_BACKENDS = ("azure", "local")
+BLOCK_SIZE = 4 * 1024 * 1024  # staged block size of streamed uploads
+UPLOAD_CONCURRENCY = 4  # blocks in flight per streamed upload
+# Azure container naming rules: 3-63 lower case letters, digits and single dashes. Also what keeps a
+# local container a directory right under LOCAL_STORAGE_DIR (no ".", "..", separators or absolute paths)
+CONTAINER_NAME_PATTERN = re.compile(r"^(?!.*--)[a-z0-9][a-z0-9-]{1,61}[a-z0-9]$")
+
+
+# The Azure SDK is imported and the client built on first use, not when the app is imported.
+# One async client per process: every upload shares its aiohttp session and connection pool
+@lru_cache()
+def get_blob_service_client():
+    from azure.storage.blob.aio import BlobServiceClient
+    return BlobServiceClient.from_connection_string(settings.AZURE_CONNECTION_STRING)
+
+
+def content_settings(content_type: str):
+    from azure.storage.blob import ContentSettings
+    return ContentSettings(content_type=content_type)
+
+
+def _block_id(index: int) -> str:
+    return f"{index:08d}"  # ids of one blob must all have the same length
+
+
+class AzureStorage:
+    """Files of one Azure Blob Storage container."""
+
+    def __init__(self, container_name: str):
+        self.container_name = container_name
+
+    @property
+    def container_client(self):
+        return get_blob_service_client().get_container_client(self.container_name)
+
+    def url(self, name: str) -> str:
+        return f"https://{settings.AZURE_ACCOUNT_NAME}.blob.core.windows.net/{self.container_name}/{name}"
+
+    async def save(self, name: str, data, content_type: str) -> None:
+        # data: bytes, a file object or any buffer (e.g. the numpy array cv2.imencode returns)
+        if not isinstance(data, (bytes, bytearray)) and not hasattr(data, "read"):
+            data = memoryview(data).tobytes()
+        await self.container_client.upload_blob(
+            name, data, overwrite=True, content_settings=content_settings(content_type)
+        )
+
+    async def save_file(self, name: str, path: str, content_type: str) -> None:
+        # The SDK reads the file in BLOCK_SIZE blocks, memory does not grow with the file
+        with open(path, "rb") as f:
+            await self.container_client.upload_blob(
+                name, f, overwrite=True, content_settings=content_settings(content_type),
+                max_block_size=BLOCK_SIZE, max_concurrency=UPLOAD_CONCURRENCY
+            )
+
+    def open_writer(self, name: str, content_type: str):
+        return AzureBlockWriter(self.container_client.get_blob_client(name), content_type)
+
+    # Resumable uploads: chunk N is staged as block N of a blob of its own session when it arrives
+    # (two sessions of the same file never share a block list), committed and copied to `name` at the end
+    async def stage_block(self, staged_name: str, index: int, path: str) -> None:
+        # Streamed from the chunk file on disk
+        with open(path, "rb") as data:
+            await self.container_client.get_blob_client(staged_name).stage_block(
+                _block_id(index), data, length=os.path.getsize(path)
+            )
+
+    async def commit_blocks(self, staged_name: str, name: str, count: int, content_type: str, path: str) -> None:
+        staged = self.container_client.get_blob_client(staged_name)
+        await staged.commit_block_list(
+            [_block_id(index) for index in range(count)], content_settings=content_settings(content_type)
+        )
+        # Server side copy inside the account, usually done right away
+        target = self.container_client.get_blob_client(name)
+        copy = await target.start_copy_from_url(staged.url)
+        status = copy["copy_status"]
+        while status == "pending":
+            await asyncio.sleep(0.5)
+            status = (await target.get_blob_properties()).copy.status
+        if status != "success":
+            raise RuntimeError(f"Copy of {staged_name} to {name} ended {status}")
+        await staged.delete_blob()
+
+    async def delete_all(self) -> None:
+        container_client = self.container_client
+        async for blob in container_client.list_blobs():
+            await container_client.delete_blob(blob.name)
+
+
+class LocalStorage:
+    """Files of one container as a directory on local disk, for on-prem/edge boxes and offline runs.
+
+    Buffers are written straight from their memory (no bytes copy) and files are
+    served back by /api/files (FileResponse), see app/routes/files.py.
+    """
+
+    def __init__(self, container_name: str, root: str = settings.LOCAL_STORAGE_DIR, base_url: str = settings.LOCAL_STORAGE_URL):
+        self.container_name = check_container_name(container_name)
+        self.root = os.path.realpath(os.path.join(root, container_name))
+        if os.path.dirname(self.root) != os.path.realpath(root):
+            raise ValueError(f"Invalid container name '{container_name}'")
+        self.base_url = base_url.rstrip("/")
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{self.container_name}/{name}"
+
+    def path(self, name: str) -> str:
+        path = os.path.realpath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid file name '{name}'")
+        return path
+
+    async def save(self, name: str, data, content_type: str) -> None:
+        await asyncio.to_thread(self._write, self.path(name), data)
+
+    async def save_file(self, name: str, path: str, content_type: str) -> None:
+        await asyncio.to_thread(self._copy, path, self.path(name))
+
+    def open_writer(self, name: str, content_type: str):
+        return LocalFileWriter(self.path(name))
+
+    async def stage_block(self, staged_name: str, index: int, path: str) -> None:
+        pass  # the chunks are already on this disk in the spool file
+
+    async def commit_blocks(self, staged_name: str, name: str, count: int, content_type: str, path: str) -> None:
+        await self.save_file(name, path, content_type)
+
+    async def delete_all(self) -> None:
+        await asyncio.to_thread(shutil.rmtree, self.root, True)
+
+    @staticmethod
+    def _write(path: str, data) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write next to the target and rename, the file is never served half written
+        temp_path = f"{path}.part"
+        with open(temp_path, "wb") as f:
+            if hasattr(data, "read"):
+                shutil.copyfileobj(data, f)
+            else:
+                f.write(data)  # buffer protocol, numpy arrays are written without a copy
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _copy(source: str, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.part"
+        shutil.copyfile(source, temp_path)  # copy_file_range/sendfile on Linux, the data never enters Python
+        os.replace(temp_path, path)
+
+
+class AzureBlockWriter:
+    """Streams a blob up as staged blocks while it is being written, `commit()` makes it visible.
+
+    At most UPLOAD_CONCURRENCY blocks of BLOCK_SIZE are held in memory. Blocks of an
+    upload that is never committed are dropped by Azure after a week.
+    """
+
+    def __init__(self, blob_client, content_type: str):
+        self.blob_client = blob_client
+        self.content_type = content_type
+        self.buffer = bytearray()
+        self.block_ids = []
+        self.pending = set()
+
+    async def write(self, chunk: bytes) -> None:
+        self.buffer += chunk
+        while len(self.buffer) >= BLOCK_SIZE:
+            await self._stage(bytes(self.buffer[:BLOCK_SIZE]))
+            del self.buffer[:BLOCK_SIZE]
+
+    async def commit(self) -> None:
+        if self.buffer or not self.block_ids:
+            await self._stage(bytes(self.buffer))
+            self.buffer.clear()
+        await asyncio.gather(*self.pending)
+        await self.blob_client.commit_block_list(
+            self.block_ids, content_settings=content_settings(self.content_type)
+        )
+
+    async def abort(self) -> None:
+        for task in self.pending:
+            task.cancel()
+        await asyncio.gather(*self.pending, return_exceptions=True)
+
+    async def _stage(self, block: bytes) -> None:
+        if len(self.pending) >= UPLOAD_CONCURRENCY:
+            done, self.pending = await asyncio.wait(self.pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()  # raise a failed block now, not at commit
+
+        block_id = _block_id(len(self.block_ids))
+        self.block_ids.append(block_id)
+        self.pending.add(asyncio.create_task(self.blob_client.stage_block(block_id, block)))
+
+
+class LocalFileWriter:
+    # Same interface as AzureBlockWriter for the local backend
+    def __init__(self, path: str):
+        self.path = path
+        self.temp_path = f"{path}.part"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(self.temp_path, "wb")
+
+    async def write(self, chunk: bytes) -> None:
+        await asyncio.to_thread(self.file.write, chunk)
+
+    async def commit(self) -> None:
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    async def abort(self) -> None:
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+def check_container_name(container_name: str) -> str:
+    if not isinstance(container_name, str) or not CONTAINER_NAME_PATTERN.match(container_name):
+        raise ValueError(f"Invalid container name '{container_name}'")
+    return container_name
+
+
+@lru_cache()
+def get_storage(container_name: str = settings.AZURE_CONTAINER_NAME):
+    if settings.STORAGE_BACKEND not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{settings.STORAGE_BACKEND}', use one of {STORAGE_BACKENDS}")
+    check_container_name(container_name)
+
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(container_name)
+    return AzureStorage(container_name)
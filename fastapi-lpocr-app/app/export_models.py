@@ -0,0 +1,43 @@
+import argparse
+
+from app.config.model_registry import MODEL_WEIGHTS
+from app.services.detector import backend_weights
+
+
+def export_onnx(weights: str, int8: bool = False) -> None:
+    from ultralytics import YOLO
+
+    # dynamic batch so OnnxDetector can send all crops of a frame in one run
+    path = YOLO(weights).export(format="onnx", dynamic=True, simplify=True, imgsz=640)
+    print(f"exported {path}")
+
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = backend_weights(weights, "onnx-int8")
+        quantize_dynamic(path, int8_path, weight_type=QuantType.QUInt8)
+        print(f"exported {int8_path}")
+
+
+def export_openvino(weights: str) -> None:
+    from ultralytics import YOLO
+
+    path = YOLO(weights).export(format="openvino", dynamic=True, imgsz=640)
+    print(f"exported {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the YOLO detectors for the onnx / openvino DETECTOR_BACKEND")
+    parser.add_argument("--models", nargs="+", default=list(MODEL_WEIGHTS), choices=list(MODEL_WEIGHTS))
+    parser.add_argument("--int8", action="store_true", help="also write a dynamically quantized INT8 ONNX model")
+    parser.add_argument("--openvino", action="store_true", help="also export to OpenVINO")
+    args = parser.parse_args()
+
+    for name in args.models:
+        export_onnx(MODEL_WEIGHTS[name], int8=args.int8)
+        if args.openvino:
+            export_openvino(MODEL_WEIGHTS[name])
+
+
+if __name__ == "__main__":
+    main()
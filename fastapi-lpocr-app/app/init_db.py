@@ -1,27 +1,41 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text  # Import text from SQLAlchemy
+from sqlalchemy import select, text  # Import text from SQLAlchemy
 from app.config.database import engine, Base
+# Every model has to be imported for its table to be in Base.metadata
+from app.models.cropped_image import CroppedImage
+from app.models.upload import UploadFile
 from app.models.user import Roles
 
+# Default roles with specific IDs
+DEFAULT_ROLES = {0: "member", 1: "admin"}
+
+
+async def create_tables(conn):
+    # Trigram operator classes of the plate search index
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    # Only creates the tables that do not exist yet, new columns and indexes of existing
+    # tables are added by python -m app.upgrade_db
+    await conn.run_sync(Base.metadata.create_all)
+
+
+async def add_default_roles(session: AsyncSession) -> list:
+    # Insert the default roles that are missing, existing roles (and the users_roles of users) are kept
+    existing = set((await session.execute(select(Roles.id))).scalars())
+    missing = [Roles(id=role_id, role_name=name) for role_id, name in DEFAULT_ROLES.items() if role_id not in existing]
+    session.add_all(missing)
+    return [role.role_name for role in missing]
+
+
 async def init_db():
-    # Create all the database tables (schemas)
+    # Create all the database tables (schemas), leaves the data of existing ones alone
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await create_tables(conn)
 
     async with AsyncSession(engine) as session:
         async with session.begin():
-            # Clear existing data
-            await session.execute(text("TRUNCATE TABLE roles RESTART IDENTITY CASCADE;"))
-
-            # Add default roles with specific IDs
-            default_roles = [
-                Roles(id=0, role_name="member"),
-                Roles(id=1, role_name="admin")
-            ]
-            session.add_all(default_roles)
-            await session.commit()
-            print("Default roles added: member, admin")
+            added = await add_default_roles(session)
+    print(f"Default roles added: {', '.join(added)}" if added else "Default roles already exist")
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(init_db())
\ No newline at end of file
+    asyncio.run(init_db())
@@ -1,11 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.config.model_registry import model_registry
+from app.config.settings import get_settings
 from app.routes.user import auth_router
 from app.routes.vehicle import vehicle_router
 from app.routes.webcam import webcam_router
+from app.routes.system import ready_router, system_router
+from app.routes.files import files_router
 from app.init_db import init_db
 from app.middleware import register_middleware
 
-app = FastAPI()
+settings = get_settings()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve auth/CRUD routes right away, models load and warm up in the background (see /ready)
+    warmup_models = [name for name in settings.WARMUP_MODELS.split(",") if name]
+    model_registry.start_warm_up(warmup_models)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 register_middleware(app)
 
@@ -16,6 +30,12 @@ app.include_router(vehicle_router)
 
 app.include_router(webcam_router)
 
+app.include_router(system_router)
+
+app.include_router(ready_router)
+
+app.include_router(files_router)
+
 '''
 @app.on_event("startup")
 async def startup_event():
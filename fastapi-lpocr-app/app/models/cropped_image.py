@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, Column, String, ForeignKey, Float
+from sqlalchemy import Integer, Column, String, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from app.config.database import Base
 from .timemixin import TimestampMixin
@@ -11,8 +11,27 @@ class CroppedImage(Base, TimestampMixin):
     crop_image_url = Column(String, nullable=False)  # URL crop
     crop_class_name = Column(String, nullable=False)  # Type Vehicle (เช่น car, truck, bus)
     license_plate = Column(String, nullable=False) 
+    license_plate_normalized = Column(String, nullable=True)  # normalize_plate(license_plate), what search matches on
+    # parse_plate(license_plate), empty when the text is not a Thai plate
+    plate_prefix = Column(String, nullable=True)  # หมวดอักษร
+    plate_number = Column(String, nullable=True)
+    plate_province = Column(String, nullable=True)
     crop_timestamp = Column(Float, nullable=False)  # Time in frame
 
     upload_file = relationship("UploadFile", back_populates="cropped_images")  # Use string reference
 
- 
+
+# Plate search: equality and prefix (text_pattern_ops also serves LIKE 'x%' under any collation),
+# fuzzy trigram matches (pg_trgm), and the upload join of the user filter
+Index(
+    "ix_cropped_image_plate_normalized", CroppedImage.license_plate_normalized,
+    postgresql_ops={"license_plate_normalized": "text_pattern_ops"}
+)
+Index(
+    "ix_cropped_image_plate_normalized_trgm", CroppedImage.license_plate_normalized,
+    postgresql_using="gin", postgresql_ops={"license_plate_normalized": "gin_trgm_ops"}
+)
+Index("ix_cropped_image_upload_id", CroppedImage.upload_id)
+# Lookups by number (prefix often misread) or number + prefix, and by province
+Index("ix_cropped_image_plate_number_prefix", CroppedImage.plate_number, CroppedImage.plate_prefix)
+Index("ix_cropped_image_plate_province", CroppedImage.plate_province)
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, Column, String, ForeignKey
+from sqlalchemy import Integer, Column, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.config.database import Base
 from .timemixin import TimestampMixin
@@ -16,3 +16,8 @@ class UploadFile(Base, TimestampMixin):
 
     user = relationship("Users", back_populates="uploads")
     cropped_images = relationship("CroppedImage", back_populates="upload_file")
+
+
+# Keyset pagination of the upload listings (created_at, id newest first), per user and over all users
+Index("ix_upload_file_user_id_created_at_id", UploadFile.user_id, UploadFile.created_at.desc(), UploadFile.id.desc())
+Index("ix_upload_file_created_at_id", UploadFile.created_at.desc(), UploadFile.id.desc())
@@ -0,0 +1,44 @@
+import os
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from app.config.database import db_dependency
+from app.config.dependencies import access_token_data
+from app.config.storage import LocalStorage, get_storage
+from app.services.principals import get_principal
+from app.services.upload_records import owns_file
+
+files_router = APIRouter(
+    prefix='/api/files',
+    tags=['files']
+)
+
+@files_router.get('/{container_name}/{name:path}')
+async def get_file(container_name: str, name: str, request: Request, db: db_dependency, token: Optional[str] = None):
+    # Files of the local storage backend (STORAGE_BACKEND=local), with azure the URLs point to the blob storage.
+    # Only the uploader (or an admin) may read a file. The access token comes as an Authorization header
+    # or as ?token=, which is all an <img>/<video> src can send
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    token_data = await access_token_data(token or (credentials if scheme.lower() == "bearer" else None))
+    if token_data is None:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired token")
+    user, role = await get_principal(db, token_data['user']['user_uid'])
+    if user is None or not user.is_verified:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account not verified")
+
+    try:
+        storage = get_storage(container_name)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    try:
+        path = storage.path(name)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    # Someone else's file is "not found" too, existence is not leaked
+    if not os.path.isfile(path) or (role != "admin" and not await owns_file(db, user.id, name)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    return FileResponse(path)
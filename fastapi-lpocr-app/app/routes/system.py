@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
+from app.config.dependencies import AccessTokenBearer, RoleChecker
+from app.config.model_registry import model_registry
+from app.services.principals import principal_cache
+
+system_router = APIRouter(
+    prefix='/api/system',
+    tags=['system']
+)
+ready_router = APIRouter(tags=['system'])
+access_token_bearer = AccessTokenBearer()
+admin_only = Depends(RoleChecker(["admin"]))
+
+@system_router.get('/models', dependencies=[admin_only])
+async def get_models(_: dict = Depends(access_token_bearer)):
+    # Load time and memory of every model loaded in this process
+    return model_registry.stats()
+
+@system_router.get('/ocr-cache', dependencies=[admin_only])
+async def get_ocr_cache(_: dict = Depends(access_token_bearer)):
+    # Hits/misses of the plate OCR cache of this process
+    if not model_registry.is_loaded("plate_ocr"):
+        return {"loaded": False}
+    return model_registry.get("plate_ocr").stats()
+
+@system_router.get('/auth-cache', dependencies=[admin_only])
+async def get_auth_cache(_: dict = Depends(access_token_bearer)):
+    # Hits/misses of the authenticated user cache of this process
+    return principal_cache.stats()
+
+@ready_router.get('/ready')
+async def readiness():
+    # 503 until the startup warm-up finished, so load balancers only send inference traffic when it is fast
+    ready = model_registry.ready.is_set() and model_registry.warm_up_error is None
+    return JSONResponse(
+        content={
+            "ready": ready,
+            "error": model_registry.warm_up_error,
+            "models": {name: stats["loaded"] for name, stats in model_registry.stats().items()}
+        },
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
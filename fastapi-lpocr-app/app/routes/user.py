@@ -8,12 +8,14 @@ from app.services.user import (
     login_user,
     reset_password_request,
     reset_password_with_token, 
+    update_user_role,
     verify_email)
 from app.schemas.user import (
     LoginUserRequest,
     PasswordResetConfirm,
     PasswordResetRequest, 
-    RegisterUserRequest)
+    RegisterUserRequest,
+    UserRoleUpdate)
 from app.config.dependencies import (
     RefreshTokenBearer,
     AccessTokenBearer,
@@ -28,6 +30,7 @@ auth_router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 role_checker = RoleChecker(["admin","member"])
+admin_only = RoleChecker(["admin"])
 
 @auth_router.get('/')
 async def hello():
@@ -96,4 +99,9 @@ async def reset_account_password(
     passwords: PasswordResetConfirm,
     db: db_dependency,
 ):
-    return await reset_password_with_token(db, token, passwords.new_password, passwords.confirm_new_password)
\ No newline at end of file
+    return await reset_password_with_token(db, token, passwords.new_password, passwords.confirm_new_password)
+
+@auth_router.put('/users/{user_id}/role', dependencies=[Depends(admin_only)])
+async def change_user_role(user_id: int, role_update: UserRoleUpdate, db: db_dependency):
+    role = await update_user_role(db, user_id, role_update.role)
+    return {"message": "Role updated", "user_id": user_id, "role": role}
@@ -1,14 +1,17 @@
-from typing import List
-from fastapi import APIRouter, Depends, File, status, HTTPException, UploadFile
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, File, Query, Request, status, HTTPException, UploadFile
 from fastapi.responses import JSONResponse, StreamingResponse
-from ultralytics import YOLO
 from app.config.database import db_dependency
 from app.config.dependencies import AccessTokenBearer, RoleChecker, get_current_user
 from app.config.settings import get_settings
 
-from azure.storage.blob import BlobServiceClient
+from app.config.storage import get_storage
 
-from app.schemas.upload import UploadFileSchema
+from app.schemas.upload import PlateSearchPage, UploadFilePage, UploadSessionCreate
+from app.services import plate_search
+from app.services.jobs import get_job
+from app.services.resumable import complete_session, create_session, get_session, write_chunk
 from app.services.upload import UploadFileService
 
 
@@ -23,20 +26,16 @@ role_checker = Depends(RoleChecker(["admin", "member"]))
 admin_only = Depends(RoleChecker(["admin"]))
 settings = get_settings()
 
-blob_service_client = BlobServiceClient.from_connection_string(settings.AZURE_CONNECTION_STRING)
 
-@vehicle_router.delete('/del_all_blob' , dependencies=[role_checker])
+@vehicle_router.delete('/del_all_blob' , dependencies=[admin_only])
 async def delete_all_blobs(container_name: str, _: dict = Depends(access_token_bearer)):
     try:
-        # รับ client สำหรับ container ที่ระบุ
-        container_client = blob_service_client.get_container_client(container_name)
-        
+        storage = get_storage(container_name)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    try:
         # ลบทุก blob ใน container
-        blob_list = container_client.list_blobs()
-        
-        for blob in blob_list:
-            blob_client = container_client.get_blob_client(blob.name)
-            blob_client.delete_blob()
+        await storage.delete_all()
         
         return {"message": f"All blobs in container '{container_name}' have been deleted."}
     
@@ -47,21 +46,132 @@ async def delete_all_blobs(container_name: str, _: dict = Depends(access_token_b
 async def hello(_: dict = Depends(access_token_bearer)):
     return {"message": "Welcome to the vehicle page"}
 
-@vehicle_router.get("/uploads", response_model=List[UploadFileSchema], dependencies=[admin_only])
-async def get_all_upload(db: db_dependency, _: dict = Depends(access_token_bearer)):
-    file_upload = await upload_service.get_all_upload(db)
+@vehicle_router.get("/uploads", response_model=UploadFilePage, dependencies=[admin_only])
+async def get_all_upload(
+    db: db_dependency,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = None,
+    _: dict = Depends(access_token_bearer)
+):
+    # Newest first, next_cursor of the response gives the following page
+    file_upload = await upload_service.get_all_upload(db, limit, cursor)
     return file_upload
 
-@vehicle_router.post("/upload", status_code=status.HTTP_201_CREATED)
+@vehicle_router.post("/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_vehicle_file(
-    db: db_dependency,
     file: UploadFile = File(...),
     token_details: dict = Depends(access_token_bearer),
 ) -> dict:
+    # Inference runs in the worker processes (app/worker.py), poll /jobs/{job_id} for the result
     user_id = int(token_details.get("user")["user_uid"])
-    response = await upload_service.upload_file(db, file, user_id)
+    response = await upload_service.enqueue_upload(file, user_id)
     return response
 
+@vehicle_router.get("/jobs/{job_id}")
+async def get_upload_job(job_id: str, token_details: dict = Depends(access_token_bearer)) -> dict:
+    job = await get_job(job_id)
+    user_id = int(token_details.get("user")["user_uid"])
+
+    if job is None or job["user_id"] != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+# Resumable upload: POST /upload/sessions, PUT /upload/sessions/{id}/chunks/{n} for every chunk
+# (any order, again after a failure), then POST /upload/sessions/{id}/complete.
+# GET /upload/sessions/{id} tells a client that reconnects which chunks are already stored.
+@vehicle_router.post("/upload/sessions", status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    body: UploadSessionCreate,
+    token_details: dict = Depends(access_token_bearer),
+) -> dict:
+    upload_type = upload_service.check_upload_type(body.filename, body.content_type)
+    if body.size <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file size")
+
+    user_id = int(token_details.get("user")["user_uid"])
+    session = await create_session(user_id, body.filename, body.content_type, upload_type, body.size)
+    return _session_response(session)
+
+@vehicle_router.get("/upload/sessions/{session_id}")
+async def get_upload_session(session_id: str, token_details: dict = Depends(access_token_bearer)) -> dict:
+    session = await _get_user_session(session_id, token_details)
+    return _session_response(session)
+
+@vehicle_router.put("/upload/sessions/{session_id}/chunks/{index}")
+async def put_upload_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+    token_details: dict = Depends(access_token_bearer),
+) -> dict:
+    session = await _get_user_session(session_id, token_details)
+    if not 0 <= index < session["total_chunks"]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid chunk index")
+
+    # The body goes to disk as it arrives, a chunk of the wrong size is rejected with 400
+    session = await write_chunk(session, index, request.stream())
+    return {"session_id": session_id, "next_chunk": session["next_chunk"], "job_id": session["job_id"] or None}
+
+@vehicle_router.post("/upload/sessions/{session_id}/complete", status_code=status.HTTP_202_ACCEPTED)
+async def complete_upload_session(session_id: str, token_details: dict = Depends(access_token_bearer)) -> dict:
+    session = await _get_user_session(session_id, token_details)
+    if session["next_chunk"] < session["total_chunks"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Missing chunks, received {session['received_chunks']}"
+        )
+
+    # Videos that decode from the front are already being processed, poll /jobs/{job_id} either way
+    job_id = await complete_session(session)
+    return {
+        "message": "File queued for processing",
+        "job_id": job_id,
+        "status": "queued",
+        "filename": session["filename"],
+        "upload_type": session["upload_type"],
+    }
+
+async def _get_user_session(session_id: str, token_details: dict) -> dict:
+    session = await get_session(session_id)
+    user_id = int(token_details.get("user")["user_uid"])
+
+    if session is None or session["user_id"] != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return session
+
+def _session_response(session: dict) -> dict:
+    return {
+        "session_id": session["session_id"],
+        "filename": session["filename"],
+        "size": session["size"],
+        "chunk_size": session["chunk_size"],
+        "total_chunks": session["total_chunks"],
+        "received_chunks": session.get("received_chunks", []),
+        "job_id": session["job_id"] or None,
+    }
+
+@vehicle_router.get("/plates/search", response_model=PlateSearchPage)
+async def search_plates(
+    db: db_dependency,
+    q: str,
+    mode: str = Query("exact", pattern="^(exact|prefix|fuzzy)$"),
+    class_name: Optional[str] = None,
+    province: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    user_and_role: tuple = Depends(get_current_user),
+):
+    # Where has a plate been seen: admins search every upload (or one user's), members their own
+    user, role = user_and_role
+    if role != "admin":
+        user_id = user.id
+    return await plate_search.search_plates(
+        db, q, mode, class_name, province, date_from, date_to, user_id, limit, cursor
+    )
+
 @vehicle_router.get("/{upload_id}")
 async def get_vehicle_file(upload_id: int, db: db_dependency): 
     fileupload = await upload_service.get_upload(upload_id, db)
@@ -72,14 +182,16 @@ async def get_vehicle_file(upload_id: int, db: db_dependency):
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Fileupload not found")
 
 @vehicle_router.get(
-    "/user/uploads", response_model=List[UploadFileSchema], dependencies=[Depends(access_token_bearer)]
+    "/user/uploads", response_model=UploadFilePage, dependencies=[Depends(access_token_bearer)]
 )
 async def get_user_uploads(
     db: db_dependency,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = None,
     user_and_role: tuple = Depends(get_current_user),
 ):
     user, role = user_and_role  # ดึง user จาก get_current_user
-    uploads = await upload_service.get_user_uploads(user.id, db)  # ใช้ user.id แทน user_uid
+    uploads = await upload_service.get_user_uploads(user.id, db, limit, cursor)  # ใช้ user.id แทน user_uid
     if uploads is None:
         raise HTTPException(status_code=404, detail="No uploads found for this user.")
     return uploads
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, FastAPI, File, UploadFile
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, Depends, FastAPI, File, Request, UploadFile, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import StreamingResponse, HTMLResponse, JSONResponse
-from azure.storage.blob import BlobServiceClient
-from ultralytics import YOLO
 import cv2
 import numpy as np
 import io
-import pytesseract
+from app.config.dependencies import AccessTokenBearer, RoleChecker, access_token_data
+from app.config.model_registry import model_registry
 from app.config.settings import get_settings
-from pathlib import Path
-pytesseract.pytesseract.tesseract_cmd = Path(__file__).parent / 'ocr' / 'tesseract.exe'
-from PIL import ImageFont, ImageDraw, Image
+from app.config.storage import get_storage
+from app.services.annotate import draw_texts, get_font
+from app.services.consensus import add_readings, needs_ocr, track_consensus
+from app.services.jobs import job_store
+from app.services.stream_context import StreamContexts
 
 webcam_router = APIRouter(
     prefix='/api/webcam',
@@ -17,9 +22,7 @@ webcam_router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Load YOLO model
 settings = get_settings()
-model = YOLO("app/model_weights/yolo11s.pt")  # Update with the path to your YOLOv8 model
 
 # Class names in the model
 class_names = [
@@ -30,136 +33,228 @@ class_names = [
 # List of allowed class indices for detection
 allowed_classes = [0, 1, 2, 3, 5, 7]
 
-# Unique ID tracking
-object_id_counter = 0
-tracked_objects = {}
-
-# Setup Azure Blob Storage client
-blob_service_client = BlobServiceClient.from_connection_string(settings.AZURE_CONNECTION_STRING)
+# Tracking state per camera/browser session (?session_id=), plates are OCR'd until their voted text settles
+# (same rules as uploads and cameras, app/services/consensus.py) instead of every frame
+stream_contexts = StreamContexts(
+    ttl=settings.WEBCAM_SESSION_TTL,
+    redis=job_store if settings.WEBCAM_SESSION_REDIS else None
+)
+SESSION_COOKIE = "webcam_session"
+access_token_bearer = AccessTokenBearer()
+admin_only = Depends(RoleChecker(["admin"]))
+# The ultralytics predictors and PaddleOCR of the registry are not safe to call from several threads
+# at once, all webcam inference of this process (every session, POST and WebSocket) runs on this one thread
+inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="webcam-inference")
+
+# Azure Blob Storage container
 container_name = settings.AZURE_CONTAINER_NAME
 
-# Tracking parameters
-max_missing_frames = 5  # Maximum number of frames to consider an object lost
-proximity_threshold = 50  # Pixels distance threshold to match objects
-
 @webcam_router.get("/")
 async def get_camera_page():
     return HTMLResponse(open("app/template/camera.html").read())
 
-# Load YOLO model for license plate detection
-license_plate_model = YOLO("app/model_weights/license_platev1nbest.pt")  # Update with the path to your license plate model
-
 @webcam_router.post("/predict-frame")
-async def predict_frame(file: UploadFile = File(...)):
-    global object_id_counter, tracked_objects
-    
+async def predict_frame(request: Request, file: UploadFile = File(...), session_id: str = None):
+    # Tracking state of this client: ?session_id=, else its session cookie, a new session for a new client
+    session_id = session_id or request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
     contents = await file.read()
     npimg = np.frombuffer(contents, np.uint8)
     frame = cv2.imdecode(npimg, cv2.IMREAD_COLOR)
 
-    # Perform object detection for primary model
-    results = model(frame)
-    detections = results[0]
-
-    new_tracked_objects = {}
-
-    # Increment missing frame count for existing tracked objects
-    for object_id, obj in tracked_objects.items():
-        obj['missing_frames'] += 1
-
-    # Process detections
-    for detection in detections.boxes:
-        cls = int(detection.cls[0])
-        confidence = float(detection.conf[0])
-
-        if cls in allowed_classes:
-            x1, y1, x2, y2 = map(int, detection.xyxy[0])
-            label = class_names[cls]
-
-            # Draw bounding box for allowed classes
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(frame, f"{label} {confidence:.2f}", (x1, y1 - 10), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-            # Process vehicles for license plate detection
-            if label in ["car", "motorcycle", "truck", "bus"]:
-                vehicle_crop = frame[y1:y2, x1:x2]
-                lp_results = license_plate_model(vehicle_crop)
-                lp_detections = lp_results[0]
-
-                for lp_detection in lp_detections.boxes:
-                    lp_x1, lp_y1, lp_x2, lp_y2 = map(int, lp_detection.xyxy[0])
-                    lp_confidence = float(lp_detection.conf[0])
-
-                    lp_x1 += x1
-                    lp_y1 += y1
-                    lp_x2 += x1
-                    lp_y2 += y1
-
-                    # Crop and process the license plate
-                    license_plate_crop = frame[lp_y1:lp_y2, lp_x1:lp_x2]
-                    gray_plate = cv2.cvtColor(license_plate_crop, cv2.COLOR_BGR2GRAY)
-
-                    # OCR with Thai and English support
-                    ocr_text = pytesseract.image_to_string(
-                        gray_plate, 
-                        config='--psm 8 -l tha+eng'
-                    ).strip()
-
-                    # Draw bounding box for the license plate
-                    cv2.rectangle(frame, (lp_x1, lp_y1), (lp_x2, lp_y2), (255, 0, 0), 2)
-
-                    # Draw stroked text using PIL
-                    frame_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                    draw = ImageDraw.Draw(frame_pil)
-                    font = ImageFont.truetype("/angsana.ttc", 20)
-
-                    # Draw stroke
-                    stroke_color = (0, 0, 0)  # Black color for stroke
-                    offsets = [(1, 1), (-1, 1), (1, -1), (-1, -1)]
-                    for offset in offsets:
-                        draw.text((lp_x1 + offset[0], lp_y1 - 10 + offset[1]), f"License Plate: {ocr_text}", font=font, fill=stroke_color)
-
-                    # Draw main text
-                    draw.text((lp_x1, lp_y1 - 10), f"License Plate: {ocr_text}", font=font, fill=(255, 0, 0))
-
-                    # Convert back to OpenCV image
-                    frame = cv2.cvtColor(np.array(frame_pil), cv2.COLOR_RGB2BGR)
-
-    # Update tracked objects and handle missing ones
-    for object_id, obj in list(tracked_objects.items()):
-        if obj['missing_frames'] > max_missing_frames:
-            del tracked_objects[object_id]
-        else:
-            new_tracked_objects[object_id] = obj
-
-    tracked_objects = new_tracked_objects
+    context = await stream_contexts.get(session_id)
+    detections = await asyncio.get_running_loop().run_in_executor(inference_executor, detect_frame, frame, context)
+    await stream_contexts.save(context)
+    frame = draw_detections(frame, detections)
 
     # Encode frame to JPEG for streaming
     _, jpeg = cv2.imencode('.jpg', frame)
-    return StreamingResponse(io.BytesIO(jpeg.tobytes()), media_type="image/jpeg")
+    response = StreamingResponse(io.BytesIO(jpeg.tobytes()), media_type="image/jpeg")
+    response.set_cookie(SESSION_COOKIE, session_id, max_age=settings.WEBCAM_SESSION_TTL, httponly=True, samesite="lax")
+    return response
+
+
+@webcam_router.websocket("/ws")
+async def stream_frames(websocket: WebSocket, annotate: bool = False, session_id: str = None, token: str = None):
+    # Send JPEG frames as binary messages, every processed frame is answered with JSON detections
+    # (plus the annotated JPEG as a binary message with ?annotate=true).
+    # Only the newest frame waits for inference, older ones are dropped so latency does not pile up.
+    # Needs an access token as ?token=, sessions are per user
+    token_data = await access_token_data(token)
+    if token_data is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    context = await stream_contexts.get(f"{token_data['user']['user_uid']}:{session_id or uuid.uuid4().hex}")
+    latest = {"data": None, "seq": 0, "dropped": 0, "closed": False}
+    frame_ready = asyncio.Event()
+
+    async def receive_frames():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is None:
+                continue  # only binary frames are expected
+
+            if latest["data"] is not None:
+                latest["dropped"] += 1  # never processed, replaced by a newer frame
+            latest["data"] = message["bytes"]
+            latest["seq"] += 1
+            frame_ready.set()
+
+        latest["closed"] = True
+        frame_ready.set()
+
+    receiver = asyncio.create_task(receive_frames())
+    try:
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            if latest["closed"]:
+                break
+
+            data, seq = latest["data"], latest["seq"]
+            latest["data"] = None
+
+            start = time.perf_counter()
+            detections, jpeg = await asyncio.get_running_loop().run_in_executor(
+                inference_executor, _process_frame, data, context, annotate
+            )
+            await stream_contexts.save(context)
+            await websocket.send_json({
+                "frame": seq,
+                "detections": detections,
+                "dropped": latest["dropped"],
+                "inference_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
+            if jpeg is not None:
+                await websocket.send_bytes(jpeg)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+
+
+def _process_frame(data: bytes, context, annotate: bool) -> tuple:
+    frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return [], None
+
+    detections = detect_frame(frame, context)
+    if not annotate:
+        return detections, None
+
+    _, jpeg = cv2.imencode('.jpg', draw_detections(frame, detections))
+    return detections, jpeg.tobytes()
+
+
+def detect_frame(frame, context) -> list:
+    # Tracked objects of the frame with their plate box (frame coordinates) and text, JSON serializable
+    with context.lock:
+        context.frames += 1
+        return _detect_tracked(frame, context)
+
+
+def _detect_tracked(frame, context) -> list:
+    # Perform object detection for primary model
+    boxes, confs, clss = model_registry.get("coco").detect([frame])[0]
+    detections = [
+        (cls, confidence, tuple(map(int, box)))
+        for box, confidence, cls in zip(boxes, confs, clss)
+        if cls in allowed_classes
+    ]
+    tracker = context.tracker
+    track_ids = tracker.update([box for _, _, box in detections])
+
+    # Plates of every vehicle of the frame, read together in one OCR call below
+    pending, plate_crops, plate_scopes = [], [], []
+    for (cls, confidence, (x1, y1, x2, y2)), track_id in zip(detections, track_ids):
+        label = class_names[cls]
+        track = tracker.data[track_id]
+
+        # Process vehicles for license plate detection, until the voted plate text of the track settles
+        if label in ["car", "motorcycle", "truck", "bus"] and needs_ocr(track):
+            context.ocr_calls += 1
+            vehicle_crop = frame[y1:y2, x1:x2]
+            lp_boxes = model_registry.get("license_plate").detect([vehicle_crop])[0].boxes
+
+            plates = []
+            for lp_box in lp_boxes:
+                lp_x1, lp_y1, lp_x2, lp_y2 = map(int, lp_box)
+
+                # Plate box relative to the vehicle, so it can be drawn on the following frames
+                track["plate_box"] = [lp_x1, lp_y1, lp_x2, lp_y2]
+
+                # Crop and process the license plate
+                license_plate_crop = vehicle_crop[lp_y1:lp_y2, lp_x1:lp_x2]
+                plates.append({})
+                plate_crops.append(cv2.cvtColor(license_plate_crop, cv2.COLOR_BGR2GRAY))
+                plate_scopes.append((context.stream_id, track_id))
+            pending.append((track, plates))
+
+    # OCR with Thai support, in process (OCR_BACKEND), unchanged plates of a track come from the OCR cache
+    plate_results = iter(model_registry.get("plate_ocr").read_plate_results(plate_crops, plate_scopes))
+    for track, plates in pending:
+        for plate in plates:
+            plate["text"], plate["confidence"], plate["cached"] = next(plate_results)
+        add_readings(track, plates)
+
+    results = []
+    for (cls, confidence, (x1, y1, x2, y2)), track_id in zip(detections, track_ids):
+        track = tracker.data[track_id]
+        plate_box = None
+        if "plate_box" in track:
+            lp_x1, lp_y1, lp_x2, lp_y2 = track["plate_box"]
+            plate_box = [lp_x1 + x1, lp_y1 + y1, lp_x2 + x1, lp_y2 + y1]
+
+        results.append({
+            "track_id": track_id,
+            "label": class_names[cls],
+            "confidence": round(float(confidence), 3),
+            "box": [x1, y1, x2, y2],
+            "plate_box": plate_box,
+            "plate_text": track_consensus(track).text or None,
+        })
+
+    return results
+
+
+def draw_detections(frame, detections: list):
+    plate_labels = []
+
+    for detection in detections:
+        x1, y1, x2, y2 = detection["box"]
+
+        # Draw bounding box for allowed classes
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, f"#{detection['track_id']} {detection['label']} {detection['confidence']:.2f}", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+        if detection["plate_box"] is not None:
+            lp_x1, lp_y1, lp_x2, lp_y2 = detection["plate_box"]
+            ocr_text = detection["plate_text"] or ""
+
+            # Draw bounding box for the license plate
+            cv2.rectangle(frame, (lp_x1, lp_y1), (lp_x2, lp_y2), (255, 0, 0), 2)
+            plate_labels.append((lp_x1, lp_y1 - 10, f"License Plate: {ocr_text}"))
+
+    # Thai plate text with a black stroke, drawn by PIL on the label patches only
+    draw_texts(frame, plate_labels, get_font(), fill=(255, 0, 0), stroke_fill=(0, 0, 0))
+    return frame
+
+
+@webcam_router.get("/sessions", dependencies=[admin_only])
+async def get_sessions(_: dict = Depends(access_token_bearer)):
+    # Live streams of this worker with their frame/OCR counters
+    return stream_contexts.stats()
 
 
 @webcam_router.post("/upload/video")
 async def upload_video(file: UploadFile = File(...)):
-    blob_client = blob_service_client.get_blob_client(container=container_name, blob=file.filename)
-    await blob_client.upload_blob(file.file, overwrite=True)
+    await get_storage(container_name).save(file.filename, file.file, file.content_type)
     return JSONResponse(content={"message": f"File {file.filename} uploaded successfully."})
 
-# Helper function to calculate Intersection over Union (IoU)
-def iou(boxA, boxB):
-    xA = max(boxA[0], boxB[0])
-    yA = max(boxA[1], boxB[1])
-    xB = min(boxA[2], boxB[2])
-    yB = min(boxA[3], boxB[3])
-
-    interArea = max(0, xB - xA + 1) * max(0, yB - yA + 1)
-    boxAArea = (boxA[2] - boxA[0] + 1) * (boxA[3] - boxA[1] + 1)
-    boxBArea = (boxB[2] - boxB[0] + 1) * (boxB[3] - boxB[1] + 1)
-
-    iou = interArea / float(boxAArea + boxBArea - interArea)
-    return iou
-
 # Main FastAPI app
 app = FastAPI()
 app.include_router(webcam_router)
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel, HttpUrl
 from datetime import datetime
 
@@ -22,4 +23,30 @@ class UploadFileSchema(BaseModel):
     upload_name: str
     upload_url: HttpUrl
     upload_type: str
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class UploadFilePage(BaseModel):
+    items: List[UploadFileSchema]
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page, None on the last page
+
+class PlateSearchResult(BaseModel):
+    id: int
+    upload_id: int
+    user_id: int
+    upload_name: str
+    crop_image_url: str
+    crop_class_name: str
+    license_plate: str
+    plate_province: Optional[str] = None
+    crop_timestamp: float
+    created_at: datetime
+    score: Optional[float] = None  # trigram similarity, fuzzy search only
+
+class PlateSearchPage(BaseModel):
+    items: List[PlateSearchResult]
+    next_cursor: Optional[str] = None
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    size: int
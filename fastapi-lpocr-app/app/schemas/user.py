@@ -17,6 +17,9 @@ class PasswordResetConfirm(BaseModel):
     new_password: str
     confirm_new_password: str 
 
+class UserRoleUpdate(BaseModel):
+    role: str
+
 class LoginUserResponse(BaseModel):
     access_token: str
     refresh_token: str
@@ -0,0 +1,61 @@
+from functools import lru_cache
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+PLATE_FONT = str(Path(__file__).parent.parent / "angsana.ttc")  # app/angsana.ttc, Thai glyphs cv2.putText cannot draw
+
+
+@lru_cache()
+def get_font(path: str = PLATE_FONT, size: int = 20):
+    # Loaded from disk once per process instead of once per plate
+    from PIL import ImageFont
+    return ImageFont.truetype(path, size)
+
+
+@lru_cache(maxsize=1024)
+def _label_masks(font, text: str, stroke_width: int) -> tuple:
+    # Text and stroke alpha (0-1) of one label plus its offset from the text anchor.
+    # Plate texts repeat frame after frame, so most labels are rendered only once
+    from PIL import Image, ImageDraw
+
+    left, top, right, bottom = font.getbbox(text)
+    mask = Image.new("L", (right - left + 2 * stroke_width, bottom - top + 2 * stroke_width), 0)
+    ImageDraw.Draw(mask).text((stroke_width - left, stroke_width - top), text, font=font, fill=255)
+
+    text_alpha = np.asarray(mask, dtype=np.float32) / 255
+    kernel = np.ones((2 * stroke_width + 1, 2 * stroke_width + 1), np.uint8)
+    stroke_alpha = cv2.dilate(text_alpha, kernel)
+    return text_alpha[..., None], stroke_alpha[..., None], (left - stroke_width, top - stroke_width)
+
+
+def draw_texts(frame, texts: list, font, fill=(255, 0, 0), stroke_fill=(0, 0, 0), stroke_width: int = 1):
+    """Draw stroked text (any glyphs the font has) onto a BGR frame in place, for every (x, y, text).
+
+    Every label is a cached alpha mask blended into the patch under it, the rest of the
+    frame is never copied or color converted. Colors are RGB like in PIL.
+    """
+    height, width = frame.shape[:2]
+    # Blend in BGR, so swap the colors instead of converting the pixels
+    fill = np.array(fill[::-1], dtype=np.float32)
+    stroke_fill = np.array(stroke_fill[::-1], dtype=np.float32)
+
+    for x, y, text in texts:
+        text_alpha, stroke_alpha, (dx, dy) = _label_masks(font, text, stroke_width)
+        x0, y0 = x + dx, y + dy
+        x1, y1 = x0 + text_alpha.shape[1], y0 + text_alpha.shape[0]
+
+        # Clip the label to the frame
+        cx0, cy0, cx1, cy1 = max(x0, 0), max(y0, 0), min(x1, width), min(y1, height)
+        if cx1 <= cx0 or cy1 <= cy0:
+            continue
+        crop = (slice(cy0 - y0, cy1 - y0), slice(cx0 - x0, cx1 - x0))
+        text_a, stroke_a = text_alpha[crop], stroke_alpha[crop]
+
+        patch = frame[cy0:cy1, cx0:cx1].astype(np.float32)
+        patch = patch * (1 - stroke_a) + stroke_fill * stroke_a
+        patch = patch * (1 - text_a) + fill * text_a
+        frame[cy0:cy1, cx0:cx1] = patch.astype(np.uint8)
+
+    return frame
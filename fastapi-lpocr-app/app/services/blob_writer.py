@@ -0,0 +1,61 @@
+import asyncio
+
+
+class BlobWriter:
+    """Uploads blobs in the background with at most `max_concurrency` in flight.
+
+    `put()` queues a blob and returns right away (it only waits while `max_pending`
+    blobs are already queued), so inference keeps going while crops are uploaded.
+    Leaving the `async with` block waits until every queued blob is persisted and
+    raises the first upload error, if any.
+
+    `storage` is one of the backends of app/config/storage.py (Azurite works with
+    its connection string) or anything with the same async `save()`.
+    """
+
+    def __init__(self, storage, max_concurrency: int = 8, max_pending: int = 64):
+        self.storage = storage
+        self.max_concurrency = max_concurrency
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.uploaded = 0
+        self.errors = []
+        self._workers = []
+        self._loop = None
+
+    async def __aenter__(self):
+        self._loop = asyncio.get_running_loop()
+        self._workers = [asyncio.create_task(self._upload_loop()) for _ in range(self.max_concurrency)]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await self.queue.join()
+        finally:
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+
+        if exc_type is None and self.errors:
+            raise self.errors[0]
+
+    async def put(self, name: str, data, content_type: str) -> None:
+        if self.errors:
+            raise self.errors[0]
+        await self.queue.put((name, data, content_type))
+
+    def put_threadsafe(self, name: str, data, content_type: str) -> None:
+        # For threads other than the event loop's one (e.g. the video encoder thread).
+        # Blocks the calling thread while the queue is full, never the event loop
+        asyncio.run_coroutine_threadsafe(self.put(name, data, content_type), self._loop).result()
+
+    async def _upload_loop(self):
+        while True:
+            name, data, content_type = await self.queue.get()
+            try:
+                await self.storage.save(name, data, content_type)
+                self.uploaded += 1
+            except Exception as e:
+                self.errors.append(e)
+            finally:
+                self.queue.task_done()
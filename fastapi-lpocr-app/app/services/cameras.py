@@ -0,0 +1,264 @@
+import collections
+import logging
+import os
+import threading
+import time
+
+import cv2
+
+from app.services.consensus import add_readings, needs_ocr, track_consensus
+from app.services.tracker import Tracker
+
+SCHEDULING_POLICIES = ("round_robin", "priority")
+STATS_WINDOW = 5.0  # seconds the FPS figures are averaged over
+
+
+def _fps(timestamps: collections.deque, now: float) -> float:
+    while timestamps and now - timestamps[0] > STATS_WINDOW:
+        timestamps.popleft()
+    return round(len(timestamps) / STATS_WINDOW, 1)
+
+
+class CameraReader:
+    """Reads one RTSP/HTTP/file source on its own thread and keeps only the latest frame.
+
+    A frame that is replaced before the scheduler took it counts as dropped. Streams
+    are reopened after `reconnect_delay` when they fail. File sources stand in for
+    cameras: they are played at their own FPS (`realtime`) and optionally looped.
+    """
+
+    def __init__(
+        self,
+        camera_id: str,
+        source: str,
+        priority: int = 0,
+        realtime: bool = None,
+        loop: bool = False,
+        reconnect_delay: float = 2.0
+    ):
+        self.camera_id = camera_id
+        self.source = source
+        self.priority = priority
+        self.is_file = os.path.isfile(source)
+        self.realtime = self.is_file if realtime is None else realtime
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.last_processed = 0.0
+        self.finished = False
+        self._read_times = collections.deque()
+        self._processed_times = collections.deque()
+
+        self._frame = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"camera-{camera_id}", daemon=True)
+        self.frame_ready = None  # threading.Event set on every new frame, given by the scheduler
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def has_frame(self) -> bool:
+        return self._frame is not None
+
+    def take(self):
+        # Latest frame not processed yet, or None
+        with self._lock:
+            frame, self._frame = self._frame, None
+        return frame
+
+    def mark_processed(self, now: float) -> None:
+        self.frames_processed += 1
+        self.last_processed = now
+        self._processed_times.append(now)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "source": self.source,
+            "alive": self._thread.is_alive(),
+            "read_fps": _fps(self._read_times, now),
+            "processed_fps": _fps(self._processed_times, now),
+            "frames_read": self.frames_read,
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+        }
+
+    def _run(self):
+        while not self._stopped.is_set():
+            cap = cv2.VideoCapture(self.source)
+            if not cap.isOpened():
+                logging.warning(f"Camera {self.camera_id}: cannot open {self.source}")
+                if self.is_file:
+                    break
+                self._stopped.wait(self.reconnect_delay)
+                continue
+
+            interval = 1 / (cap.get(cv2.CAP_PROP_FPS) or 25)
+            next_time = time.monotonic()
+            while not self._stopped.is_set():
+                success, frame = cap.read()
+                if not success:
+                    break
+
+                now = time.monotonic()
+                with self._lock:
+                    if self._frame is not None:
+                        self.frames_dropped += 1
+                    self._frame = frame
+                self.frames_read += 1
+                self._read_times.append(now)
+                if self.frame_ready is not None:
+                    self.frame_ready.set()
+
+                if self.realtime:
+                    next_time += interval
+                    self._stopped.wait(max(0.0, next_time - time.monotonic()))
+            cap.release()
+
+            if self.is_file and not self.loop:
+                break
+            if not self.is_file:
+                logging.warning(f"Camera {self.camera_id}: stream ended, reconnecting")
+                self._stopped.wait(self.reconnect_delay)
+
+        self.finished = True
+        if self.frame_ready is not None:
+            self.frame_ready.set()
+
+
+class CameraScheduler:
+    """Feeds the latest frames of many cameras into batched inference on one thread.
+
+    Every round takes up to `batch_size` cameras that have a new frame, either in turn
+    (`round_robin`) or by `priority`, then the longest waiting, and calls
+    `infer(camera_ids, frames)` once for the whole batch. Its results go to
+    `on_result(camera_id, frame, result)`.
+    """
+
+    def __init__(self, readers: list, infer, on_result=None, batch_size: int = 4, policy: str = "round_robin"):
+        if policy not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown scheduling policy '{policy}', use one of {SCHEDULING_POLICIES}")
+
+        self.readers = readers
+        self.infer = infer
+        self.on_result = on_result
+        self.batch_size = batch_size
+        self.policy = policy
+        self.batches = 0
+        self.error = None
+
+        self.frame_ready = threading.Event()
+        for reader in readers:
+            reader.frame_ready = self.frame_ready
+        self._cursor = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="camera-scheduler", daemon=True)
+
+    def start(self) -> None:
+        for reader in self.readers:
+            reader.start()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        for reader in self.readers:
+            reader.stop()
+        self._thread.join()
+
+    def wait(self, timeout: float = None) -> bool:
+        # True once every (non-looping file) camera finished and its last frame was processed
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def stats(self) -> dict:
+        return {reader.camera_id: reader.stats() for reader in self.readers}
+
+    def next_batch(self) -> list:
+        ready = [reader for reader in self.readers if reader.has_frame()]
+        if self.policy == "priority":
+            ready.sort(key=lambda reader: (-reader.priority, reader.last_processed))
+            return ready[:self.batch_size]
+
+        # Round robin: start after the last camera served in the previous round
+        count = len(self.readers)
+        order = [self.readers[(self._cursor + i) % count] for i in range(count)]
+        batch = [reader for reader in order if reader in ready][:self.batch_size]
+        if batch:
+            self._cursor = (self.readers.index(batch[-1]) + 1) % count
+        return batch
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                self.frame_ready.wait(0.1)
+                self.frame_ready.clear()
+
+                batch = self.next_batch()
+                if not batch:
+                    if all(reader.finished for reader in self.readers):
+                        break
+                    continue
+
+                taken = [(reader, reader.take()) for reader in batch]
+                taken = [(reader, frame) for reader, frame in taken if frame is not None]
+                results = self.infer([reader.camera_id for reader, _ in taken], [frame for _, frame in taken])
+                self.batches += 1
+
+                now = time.monotonic()
+                for (reader, frame), result in zip(taken, results):
+                    reader.mark_processed(now)
+                    if self.on_result is not None:
+                        self.on_result(reader.camera_id, frame, result)
+
+                # More cameras may have frames waiting than fitted in this batch
+                if any(reader.has_frame() for reader in self.readers):
+                    self.frame_ready.set()
+        except Exception as e:
+            logging.exception(e)
+            self.error = e
+
+
+class CameraInference:
+    """Vehicle detection batched over cameras, with a tracker per camera so each plate
+    is read only until its voted text settles (same models and rules as video uploads)."""
+
+    def __init__(self, upload_service, plate_conf: float = 0.75):
+        self.service = upload_service
+        self.plate_conf = plate_conf
+        self.trackers = collections.defaultdict(lambda: Tracker(max_missing=5))
+
+    def __call__(self, camera_ids: list, frames: list) -> list:
+        results = []
+        for camera_id, frame, vehicles in zip(camera_ids, frames, self.service._detect_vehicles_batch(frames)):
+            tracker = self.trackers[camera_id]
+            for vehicle, track_id in zip(vehicles, tracker.update([vehicle["box"] for vehicle in vehicles])):
+                vehicle["track_id"] = track_id
+
+            pending = [
+                vehicle for vehicle in vehicles
+                if vehicle["conf"] >= self.plate_conf and needs_ocr(tracker.data[vehicle["track_id"]])
+            ]
+            self.service._read_plates(frame, pending, scope=camera_id)
+
+            for vehicle in pending:
+                add_readings(tracker.data[vehicle["track_id"]], vehicle["plates"])
+
+            results.append([
+                {
+                    "track_id": vehicle["track_id"],
+                    "class_name": self.service.names[vehicle["cls"]],
+                    "confidence": round(float(vehicle["conf"]), 3),
+                    "box": list(vehicle["box"]),
+                    "license_plate": track_consensus(tracker.data[vehicle["track_id"]]).text or None,
+                }
+                for vehicle in vehicles
+            ])
+        return results
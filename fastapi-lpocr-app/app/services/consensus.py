@@ -0,0 +1,95 @@
+from collections import defaultdict
+
+# Confidence at which a track's plate text is settled, for uploads, camera ingest and the webcam alike
+PLATE_CONSENSUS_THRESHOLD = 0.8
+# A track whose plate text does not settle is read at most this many times
+TRACK_OCR_ATTEMPTS = 8
+
+
+class PlateConsensus:
+    """Plate text of one track, voted over all its OCR readings.
+
+    Readings are grouped by length (a missed or extra character shifts every position
+    after it, so only same-length readings are aligned), the heaviest group wins and
+    inside it every position is a confidence-weighted character vote.
+
+    `confidence` is the share of the total weight behind the winning group, times the
+    agreement on its least certain character, times the chance that at least one reading
+    of the group is right by the OCR's own confidences (1 - prod(1 - c)). Readings the
+    recognizer is unsure of never settle a track however much they agree. Once `confidence`
+    passes `threshold` with at least `min_reads` readings the track is `done` and needs no more OCR.
+    """
+
+    def __init__(self, threshold: float = PLATE_CONSENSUS_THRESHOLD, min_reads: int = 2, readings: list = None):
+        self.threshold = threshold
+        self.min_reads = min_reads
+        self.readings = readings if readings is not None else []  # (text, confidence)
+
+    def add(self, text: str, confidence: float) -> None:
+        text = " ".join(text.split())
+        if text:
+            self.readings.append((text, max(confidence, 1e-3)))
+
+    @property
+    def done(self) -> bool:
+        return len(self.readings) >= self.min_reads and self.confidence >= self.threshold
+
+    @property
+    def text(self) -> str:
+        return self._vote()[0]
+
+    @property
+    def confidence(self) -> float:
+        return self._vote()[1]
+
+    def _vote(self) -> tuple:
+        if not self.readings:
+            return "", 0.0
+
+        groups = defaultdict(list)
+        for text, confidence in self.readings:
+            groups[len(text)].append((text, confidence))
+
+        total_weight = sum(confidence for _, confidence in self.readings)
+        group = max(groups.values(), key=lambda readings: sum(confidence for _, confidence in readings))
+        group_weight = sum(confidence for _, confidence in group)
+
+        characters = []
+        agreement = 1.0
+        for position in range(len(group[0][0])):
+            votes = defaultdict(float)
+            for text, confidence in group:
+                votes[text[position]] += confidence
+            character, weight = max(votes.items(), key=lambda vote: vote[1])
+            characters.append(character)
+            agreement = min(agreement, weight / group_weight)
+
+        # Agreeing readings are only as sure as the OCR says they are, a single one is exactly its confidence
+        doubt = 1.0
+        for _, confidence in group:
+            doubt *= 1.0 - min(confidence, 1.0)
+
+        return "".join(characters), group_weight / total_weight * agreement * (1.0 - doubt)
+
+
+def track_consensus(track: dict) -> PlateConsensus:
+    # Voted plate text of a tracker track (Tracker.data[track_id]). Its readings are kept in
+    # the track itself, so the track stays JSON-able for the webcam sessions in Redis
+    return PlateConsensus(readings=track.setdefault("readings", []))
+
+
+def needs_ocr(track: dict) -> bool:
+    # A track is read until its voted plate text is confident enough, at most TRACK_OCR_ATTEMPTS times
+    return not track_consensus(track).done and track.get("ocr_attempts", 0) < TRACK_OCR_ATTEMPTS
+
+
+def add_readings(track: dict, plates: list) -> PlateConsensus:
+    # One OCR pass over a track: plates are the {"text", "confidence", "cached"} found on its vehicle.
+    # Every pass is an attempt, cache hits included (a plate that keeps looking the same would be
+    # detected and looked up forever otherwise), but a hit repeats an earlier reading, it is no new vote
+    consensus = track_consensus(track)
+    track["ocr_attempts"] = track.get("ocr_attempts", 0) + 1
+    for plate in plates:
+        if not plate.get("cached"):
+            consensus.add(plate["text"], plate["confidence"])
+    return consensus
@@ -0,0 +1,155 @@
+import ast
+import logging
+import os
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+
+DETECTOR_BACKENDS = ("torch", "onnx", "onnx-int8", "openvino")
+
+
+class Detections(NamedTuple):
+    # One image worth of results, boxes are xyxy in the pixels of that image
+    boxes: list
+    confs: list
+    clss: list
+
+
+def backend_weights(weights: str, backend: str) -> str:
+    # app/model_weights/x.pt -> the exported file app/export_models.py writes for the backend
+    stem, _ = os.path.splitext(weights)
+    return {
+        "torch": weights,
+        "onnx": f"{stem}.onnx",
+        "onnx-int8": f"{stem}_int8.onnx",
+        "openvino": f"{stem}_openvino_model",
+    }[backend]
+
+
+def load_detector(weights: str, backend: str, intra_op_threads: int = 0):
+    if backend not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown detector backend '{backend}', use one of {DETECTOR_BACKENDS}")
+
+    path = backend_weights(weights, backend)
+    if not os.path.exists(path) and os.path.exists(weights):
+        # Not exported (python -m app.export_models) for this backend, run the PyTorch weights
+        logging.warning(f"No {backend} export {path}, loading {weights} with torch")
+        backend, path = "torch", weights
+    if backend.startswith("onnx"):
+        return OnnxDetector(path, intra_op_threads=intra_op_threads)
+    # ultralytics runs both the PyTorch weights and the OpenVINO export itself
+    return UltralyticsDetector(path)
+
+
+class UltralyticsDetector:
+    def __init__(self, weights: str):
+        from ultralytics import YOLO
+        self.model = YOLO(weights, task="detect")
+        self.names = self.model.names
+
+    def detect(self, images: list) -> list:
+        results = self.model.predict(images, show=False, verbose=False)
+        return [
+            Detections(
+                result.boxes.xyxy.cpu().tolist(),
+                result.boxes.conf.cpu().tolist(),
+                [int(cls) for cls in result.boxes.cls.cpu().tolist()],
+            )
+            for result in results
+        ]
+
+
+class OnnxDetector:
+    """YOLO detect model exported to ONNX, run by ONNX Runtime on the CPU.
+
+    Same pre/post-processing as ultralytics predict (640 letterbox, conf 0.25, class-wise
+    NMS at IoU 0.7) so results match the PyTorch path, see benchmarks/detector_parity.py.
+    A list of images is letterboxed into one batch, which needs a dynamic export.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        imgsz: int = 640,
+        conf: float = 0.25,
+        iou: float = 0.7,
+        max_det: int = 300,
+        intra_op_threads: int = 0
+    ):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads  # 0 = one per physical core
+        options.inter_op_num_threads = 1
+
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.weights_bytes = os.path.getsize(path)
+
+        # ultralytics stores the class names in the ONNX metadata
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+
+    def detect(self, images: list) -> list:
+        if not images:
+            return []
+
+        batch, transforms = zip(*(self._letterbox(image) for image in images))
+        outputs = self.session.run(None, {self.input_name: np.stack(batch)})[0]
+
+        # (batch, 4 + classes, anchors) -> (batch, anchors, 4 + classes)
+        return [
+            self._postprocess(prediction, transform, image.shape[:2])
+            for prediction, transform, image in zip(outputs.transpose(0, 2, 1), transforms, images)
+        ]
+
+    def _letterbox(self, image) -> tuple:
+        height, width = image.shape[:2]
+        gain = min(self.imgsz / height, self.imgsz / width)
+        new_w, new_h = round(width * gain), round(height * gain)
+        pad_x, pad_y = (self.imgsz - new_w) / 2, (self.imgsz - new_h) / 2
+
+        resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        top, left = round(pad_y - 0.1), round(pad_x - 0.1)
+        bottom, right = self.imgsz - new_h - top, self.imgsz - new_w - left
+        padded = cv2.copyMakeBorder(resized, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+        # BGR HWC uint8 -> RGB CHW float32 0-1
+        tensor = padded[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+        return tensor, (gain, left, top)
+
+    def _postprocess(self, prediction, transform: tuple, shape: tuple) -> Detections:
+        scores = prediction[:, 4:]
+        clss = scores.argmax(axis=1)
+        confs = scores[np.arange(len(scores)), clss]
+        keep = confs > self.conf
+        if not keep.any():
+            return Detections([], [], [])
+
+        boxes, confs, clss = prediction[keep, :4], confs[keep], clss[keep]
+        xyxy = np.concatenate([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], axis=1)
+
+        # Class-wise NMS by moving every class to its own area of the plane
+        offset = clss[:, None] * 7680.0
+        shifted = xyxy + offset
+        indices = cv2.dnn.NMSBoxes(
+            np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1).tolist(),
+            confs.tolist(), self.conf, self.iou
+        )
+        indices = np.array(indices, dtype=int).reshape(-1)[:self.max_det]
+
+        # Undo the letterbox
+        gain, left, top = transform
+        xyxy = (xyxy[indices] - [left, top, left, top]) / gain
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, shape[1])
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, shape[0])
+
+        return Detections(xyxy.tolist(), confs[indices].tolist(), clss[indices].tolist())
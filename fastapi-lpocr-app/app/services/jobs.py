@@ -0,0 +1,119 @@
+import json
+import time
+import uuid
+
+import redis.asyncio as aioredis
+from app.config.settings import get_settings
+
+settings = get_settings()
+JOB_QUEUE = "inference:jobs"
+# Jobs a worker is running, from BLMOVE until ack_job, so the jobs of a worker that died are not lost
+PROCESSING_QUEUE = "inference:processing"
+JOB_EXPIRY = 86400  # keep finished jobs for a day
+HEARTBEAT_INTERVAL = 15
+MAX_ATTEMPTS = 3
+
+job_store = aioredis.from_url(
+    f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0",
+    decode_responses=True
+)
+
+
+def _job_key(job_id: str) -> str:
+    return f"inference:job:{job_id}"
+
+
+async def create_job(payload: dict) -> str:
+    job_id = uuid.uuid4().hex
+
+    await job_store.hset(_job_key(job_id), mapping={
+        "status": "queued",
+        "progress": 0,
+        "payload": json.dumps(payload),
+    })
+    await job_store.expire(_job_key(job_id), JOB_EXPIRY)
+    await job_store.rpush(JOB_QUEUE, job_id)
+
+    return job_id
+
+
+async def next_job(timeout: int = 5) -> tuple | None:
+    # Blocks until a job id is queued, returns (job_id, payload). The job stays in PROCESSING_QUEUE
+    # until ack_job, heartbeat_job has to be called every HEARTBEAT_INTERVAL seconds while it runs
+    job_id = await job_store.blmove(JOB_QUEUE, PROCESSING_QUEUE, timeout, "LEFT", "RIGHT")
+    if job_id is None:
+        return None
+
+    payload = await job_store.hget(_job_key(job_id), "payload")
+    if payload is None:  # expired before a worker got to it
+        await ack_job(job_id)
+        return None
+
+    await update_job(job_id, status="running", heartbeat=time.time())
+    return job_id, json.loads(payload)
+
+
+async def heartbeat_job(job_id: str) -> None:
+    await job_store.hset(_job_key(job_id), "heartbeat", time.time())
+
+
+async def ack_job(job_id: str) -> None:
+    # The job finished or failed, it is not run again
+    await job_store.lrem(PROCESSING_QUEUE, 1, job_id)
+
+
+async def requeue_stale_jobs(stale_after: float) -> list:
+    # Jobs without a heartbeat for stale_after seconds (their worker died) go back to the queue, up to
+    # MAX_ATTEMPTS runs, then they fail. Returns the payloads of the failed ones (for their spool files)
+    failed = []
+    for job_id in await job_store.lrange(PROCESSING_QUEUE, 0, -1):
+        heartbeat = await job_store.hget(_job_key(job_id), "heartbeat")
+        if heartbeat is None:
+            if not await job_store.exists(_job_key(job_id)):
+                await ack_job(job_id)  # expired
+            continue  # just taken, the worker is writing its first heartbeat
+        if time.time() - float(heartbeat) < stale_after:
+            continue
+        # Only the worker that removes it requeues it
+        if not await job_store.lrem(PROCESSING_QUEUE, 1, job_id):
+            continue
+
+        attempts = await job_store.hincrby(_job_key(job_id), "attempts", 1)
+        if attempts >= MAX_ATTEMPTS:
+            await update_job(job_id, status="failed", error=f"Worker lost {attempts} times")
+            failed.append(json.loads(await job_store.hget(_job_key(job_id), "payload")))
+        else:
+            await update_job(job_id, status="queued", progress=0)
+            await job_store.hdel(_job_key(job_id), "heartbeat")
+            await job_store.rpush(JOB_QUEUE, job_id)
+    return failed
+
+
+async def update_job(job_id: str, **fields) -> None:
+    mapping = {
+        key: json.dumps(value) if isinstance(value, (dict, list)) else value
+        for key, value in fields.items()
+    }
+    await job_store.hset(_job_key(job_id), mapping=mapping)
+
+
+async def get_job(job_id: str) -> dict | None:
+    job = await job_store.hgetall(_job_key(job_id))
+    if not job:
+        return None
+
+    payload = json.loads(job["payload"])
+    response = {
+        "job_id": job_id,
+        "user_id": payload["user_id"],
+        "filename": payload["filename"],
+        "upload_type": payload["upload_type"],
+        "status": job["status"],
+        "progress": float(job["progress"]),
+    }
+    if "error" in job:
+        response["error"] = job["error"]
+    if "result" in job:
+        response["result"] = json.loads(job["result"])
+
+    return response
@@ -0,0 +1,184 @@
+import threading
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+OCR_BACKENDS = ("easyocr", "tesserocr", "paddleocr")
+
+
+def split_plate_lines(plate_gray) -> list:
+    # A Thai plate has two text lines: prefix + number on top, province below.
+    # The crop is already a plate, so instead of running CRAFT we cut it at the emptiest
+    # row (horizontal projection of the dark pixels) between 45% and 80% of its height.
+    height, width = plate_gray.shape[:2]
+    if height < 16:
+        return [[0, width, 0, height]]
+
+    _, binary = cv2.threshold(plate_gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    profile = binary.sum(axis=1)
+    low, high = int(height * 0.45), int(height * 0.8)
+    split = low + int(np.argmin(profile[low:high]))
+
+    return [[0, width, 0, split], [0, width, split, height]]
+
+
+def plate_text(lines: list) -> str:
+    # Same format CroppedImage.license_plate always had: the first two text lines joined by a space.
+    # Kept as read, the parsed form only goes in the plate columns (plate_columns), so backfill_plates
+    # --all can parse it again with a newer parser
+    return " ".join(text for text, _ in lines[:2] if text)
+
+
+def plate_confidence(lines: list) -> float:
+    # Mean recognizer confidence of the lines that make up plate_text
+    confidences = [confidence for text, confidence in lines[:2] if text]
+    return sum(confidences) / len(confidences) if confidences else 0.0
+
+
+def load_plate_ocr(backend: str, batch_size: int = 32, model_dir: str = None):
+    # model_dir: tessdata directory for tesserocr, recognizer model directory for paddleocr
+    if backend not in OCR_BACKENDS:
+        raise ValueError(f"Unknown OCR backend '{backend}', use one of {OCR_BACKENDS}")
+
+    if backend == "tesserocr":
+        return TesserocrPlateOCR(path=model_dir)
+    if backend == "paddleocr":
+        return PaddlePlateOCR(rec_model_dir=model_dir, batch_size=batch_size)
+    from app.config.model_registry import model_registry
+    return PlateRecognizer(model_registry.get("easyocr"), batch_size=batch_size)
+
+
+def _plate_lines(plate_crops_gray: list) -> list:
+    # (plate_index, line_index, line image) of every text line of every non-empty crop
+    return [
+        (plate_index, line_index, plate_gray[y1:y2, x1:x2])
+        for plate_index, plate_gray in enumerate(plate_crops_gray) if plate_gray.size > 0
+        for line_index, (x1, x2, y1, y2) in enumerate(split_plate_lines(plate_gray))
+    ]
+
+
+class PlateOCR(ABC):
+    """In-process OCR of license plate crops, the same interface for every OCR_BACKEND.
+
+    `read_plates(crops)` takes many grayscale plate crops at once (a frame's worth, so
+    backends can batch them) and returns, for every crop, its text lines as
+    [(text, confidence), ...] from top to bottom.
+    """
+
+    @abstractmethod
+    def read_plates(self, plate_crops_gray: list) -> list:
+        ...
+
+    def read_plate_texts(self, plate_crops_gray: list) -> list:
+        # [(license_plate, confidence), ...] for every crop
+        return [(plate_text(lines), plate_confidence(lines)) for lines in self.read_plates(plate_crops_gray)]
+
+
+class PlateRecognizer(PlateOCR):
+    """Recognition-only OCR over many plate crops at once.
+
+    Uses the recognizer of an easyocr.Reader directly, skipping its CRAFT text detector.
+    Line images are grouped by padded width so a batch only pads to its own bucket.
+    """
+
+    def __init__(self, reader, batch_size: int = 32):
+        self.reader = reader
+        self.batch_size = batch_size
+        self.img_h = getattr(reader, "imgH", 64)
+        self.ignore_char = "".join(set(reader.character) - set(reader.lang_char))
+
+    def read_plates(self, plate_crops_gray: list) -> list:
+        from easyocr.recognition import get_text
+        from easyocr.utils import get_image_list
+
+        lines = [[] for _ in plate_crops_gray]
+        buckets = {}
+        for plate_index, plate_gray in enumerate(plate_crops_gray):
+            if plate_gray.size == 0:
+                continue
+            for line_index, box in enumerate(split_plate_lines(plate_gray)):
+                image_list, max_width = get_image_list([box], [], plate_gray, model_height=self.img_h)
+                if not image_list:
+                    continue
+                key = (plate_index, line_index)
+                buckets.setdefault(max_width, []).append((key, image_list[0][1]))
+
+        recognized = {}
+        for max_width, items in buckets.items():
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                # get_text passes the first element of every item through untouched, so it carries our key
+                results = get_text(
+                    self.reader.character, self.img_h, int(max_width),
+                    self.reader.recognizer, self.reader.converter, batch,
+                    ignore_char=self.ignore_char, batch_size=len(batch),
+                    workers=0, device=self.reader.device,
+                )
+                for key, text, confidence in results:
+                    recognized[key] = (text, float(confidence))
+
+        for (plate_index, line_index), result in sorted(recognized.items()):
+            lines[plate_index].append(result)
+
+        return lines
+
+
+class TesserocrPlateOCR(PlateOCR):
+    """Tesseract through tesserocr: the library runs in this process, no tesseract
+    executable is started per plate like with pytesseract.
+
+    A PyTessBaseAPI is not thread-safe and costly to create, so each thread keeps its
+    own and reuses it for every line (single text line page segmentation).
+    """
+
+    def __init__(self, lang: str = "tha+eng", path: str = None):
+        self.lang = lang
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            from tesserocr import PSM, PyTessBaseAPI
+            options = {"path": self.path} if self.path else {}
+            api = self._local.api = PyTessBaseAPI(lang=self.lang, psm=PSM.SINGLE_LINE, **options)
+        return api
+
+    def read_plates(self, plate_crops_gray: list) -> list:
+        from PIL import Image
+
+        lines = [[] for _ in plate_crops_gray]
+        api = self.api
+        for plate_index, _, line in _plate_lines(plate_crops_gray):
+            api.SetImage(Image.fromarray(line))
+            lines[plate_index].append((api.GetUTF8Text().strip(), max(api.MeanTextConf(), 0) / 100))
+        return lines
+
+
+class PaddlePlateOCR(PlateOCR):
+    """Recognition-only PaddleOCR: line images go straight to its text recognizer,
+    `batch_size` at a time, without the DB text detector.
+
+    PaddleOCR ships no Thai recognizer of its own, point `rec_model_dir` at a Thai
+    trained (PP-OCR format) model.
+    """
+
+    def __init__(self, lang: str = "th", rec_model_dir: str = None, batch_size: int = 32):
+        from paddleocr import PaddleOCR
+
+        options = {"rec_model_dir": rec_model_dir} if rec_model_dir else {}
+        self.ocr = PaddleOCR(lang=lang, use_angle_cls=False, rec_batch_num=batch_size, show_log=False, **options)
+
+    def read_plates(self, plate_crops_gray: list) -> list:
+        lines = [[] for _ in plate_crops_gray]
+        plate_lines = _plate_lines(plate_crops_gray)
+        if not plate_lines:
+            return lines
+
+        # The recognizer sorts the images by aspect ratio and batches them itself, results come back in order
+        results, _ = self.ocr.text_recognizer([cv2.cvtColor(line, cv2.COLOR_GRAY2BGR) for _, _, line in plate_lines])
+        for (plate_index, _, _), (text, confidence) in zip(plate_lines, results):
+            lines[plate_index].append((text, float(confidence)))
+        return lines
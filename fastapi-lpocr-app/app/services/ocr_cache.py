@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def plate_hash(plate_gray, hash_size: int = 8) -> int:
+    # dHash of the contrast-normalized crop: hash_size * hash_size bits, set where a pixel
+    # of the downscaled crop is brighter than its right neighbour
+    normalized = cv2.normalize(plate_gray, None, 0, 255, cv2.NORM_MINMAX)
+    small = cv2.resize(normalized, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+class PlateOCRCache:
+    """OCR results of recently read plate crops, in front of a PlateOCR engine.
+
+    A crop whose dHash is within `max_distance` bits (Hamming) of a cached crop of the
+    same scope gets that crop's (text, confidence) back without OCR. A scope is one
+    physical plate, e.g. (stream, track id): two different plates that only differ by a
+    digit are a few bits apart, much less than the same plate in two frames, so
+    crops are never matched across scopes. Crops without a scope are always read.
+
+    Only readings with a text and at least `min_confidence` are cached, a bad first
+    read is never handed out again. A hit is the earlier reading, not a new one:
+    read_plate_results flags it so per-track voting (PlateConsensus) does not count it
+    as a vote, only as one of the track's OCR attempts.
+
+    At most `max_size` entries over all scopes, least recently used ones are evicted.
+    The misses of one call are read by the engine in a single batch.
+    """
+
+    def __init__(self, engine, max_size: int = 1024, max_distance: int = 10, hash_size: int = 8,
+                 min_confidence: float = 0.5):
+        self.engine = engine
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.min_confidence = min_confidence
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (scope, hash) -> (text, confidence), least recently used first
+        self._scopes = {}  # scope -> hashes cached for it
+        self._lock = threading.Lock()
+
+    def read_plates(self, plate_crops_gray: list) -> list:
+        # Text lines are not cached, only plate texts
+        return self.engine.read_plates(plate_crops_gray)
+
+    def read_plate_texts(self, plate_crops_gray: list, scopes: list = None) -> list:
+        return [(text, confidence) for text, confidence, _ in self.read_plate_results(plate_crops_gray, scopes)]
+
+    def read_plate_results(self, plate_crops_gray: list, scopes: list = None) -> list:
+        # [(license_plate, confidence, cached), ...] for every crop, cached = True for a cache hit
+        results = [("", 0.0, False)] * len(plate_crops_gray)
+        missed = []
+        for index, plate_gray in enumerate(plate_crops_gray):
+            scope = scopes[index] if scopes else None
+            if scope is None or self.max_size <= 0 or plate_gray.size == 0:
+                missed.append((index, None))
+                continue
+            key = (scope, plate_hash(plate_gray, self.hash_size))
+            cached = self.get(key)
+            if cached is None:
+                missed.append((index, key))
+            else:
+                results[index] = (*cached, True)
+
+        if missed:
+            texts = self.engine.read_plate_texts([plate_crops_gray[index] for index, _ in missed])
+            for (index, key), (text, confidence) in zip(missed, texts):
+                results[index] = (text, confidence, False)
+                if key is not None and text.strip() and confidence >= self.min_confidence:
+                    self.put(key, (text, confidence))
+        return results
+
+    def get(self, key: tuple):
+        with self._lock:
+            if key not in self._entries:
+                key = self._nearest(*key)
+                if key is None:
+                    self.misses += 1
+                    return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def _nearest(self, scope, crop_hash: int):
+        # Closest cached hash of the scope within max_distance
+        best, match = self.max_distance + 1, None
+        for cached_hash in self._scopes.get(scope, ()):
+            distance = (cached_hash ^ crop_hash).bit_count()
+            if distance < best:
+                best, match = distance, (scope, cached_hash)
+        return match
+
+    def put(self, key: tuple, result: tuple) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            self._scopes.setdefault(key[0], set()).add(key[1])
+            while len(self._entries) > self.max_size:
+                (scope, evicted), _ = self._entries.popitem(last=False)
+                hashes = self._scopes[scope]
+                hashes.discard(evicted)
+                if not hashes:
+                    del self._scopes[scope]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "scopes": len(self._scopes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
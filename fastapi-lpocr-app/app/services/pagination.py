@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(*values) -> str:
+    # Sort key of the last row of a page: ([rank,] created_at, id)
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int = 2) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError(cursor)
+        values[-2], values[-1] = datetime.fromisoformat(values[-2]), int(values[-1])
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+async def keyset_page(session: AsyncSession, statement, model, limit: int, cursor: str = None, rank=None) -> dict:
+    """One page of `statement`, newest first, and the cursor of the next page.
+
+    Ordered by (created_at, id) descending and continued with a row comparison on the
+    last row of the previous page instead of OFFSET, so every page costs the same
+    index range scan however deep it is. `statement` selects plain columns (including
+    created_at and id), rows come back as dicts. A `rank` (a labeled column of the
+    statement, e.g. a match score) sorts before created_at.
+    """
+    keys = [model.created_at, model.id] if rank is None else [rank, model.created_at, model.id]
+    if cursor is not None:
+        statement = statement.where(tuple_(*keys) < tuple_(*decode_cursor(cursor, len(keys))))
+    statement = statement.order_by(*(key.desc() for key in keys)).limit(limit + 1)
+
+    rows = [dict(row._mapping) for row in await session.execute(statement)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(*([] if rank is None else [last[rank.name]]), last["created_at"], last["id"])
+    return {"items": rows, "next_cursor": next_cursor}
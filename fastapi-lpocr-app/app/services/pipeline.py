@@ -0,0 +1,106 @@
+import queue
+import threading
+
+_END = object()
+
+
+class VideoPipeline:
+    """Decode -> infer -> encode with the stages overlapped.
+
+    A decoder thread reads frames from the capture and an encoder thread hands every
+    inferred frame to write_frame(index, frame, detections), while inference runs in the
+    calling thread. Both queues are bounded, so a slow stage blocks the one feeding it,
+    and frames reach write_frame in decode order.
+
+        with VideoPipeline(cap, write_frame) as pipeline:
+            for index, frame in pipeline.frames():
+                pipeline.submit(index, frame, infer(frame))
+    """
+
+    def __init__(self, cap, write_frame, queue_size: int = 8):
+        self.cap = cap
+        self.write_frame = write_frame
+        self.decoded = queue.Queue(maxsize=queue_size)
+        self.inferred = queue.Queue(maxsize=queue_size)
+        self.stopped = threading.Event()
+        self.error = None
+        self._threads = [
+            threading.Thread(target=self._decode, daemon=True),
+            threading.Thread(target=self._encode, daemon=True),
+        ]
+
+    def __enter__(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.stopped.set()
+
+        self._put(self.inferred, _END)
+        for thread in self._threads:
+            thread.join()
+
+        if exc_type is None and self.error is not None:
+            raise self.error
+
+    def frames(self):
+        while True:
+            item = self._get(self.decoded)
+            if item is _END:
+                break
+            yield item
+
+        if self.error is not None:
+            raise self.error
+
+    def submit(self, index: int, frame, detections) -> None:
+        if self.error is not None:
+            raise self.error
+        self._put(self.inferred, (index, frame, detections))
+
+    def _decode(self):
+        index = 0
+        try:
+            while not self.stopped.is_set():
+                success, frame = self.cap.read()
+                if not success:
+                    break
+                self._put(self.decoded, (index, frame))
+                index += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(self.decoded, _END)
+
+    def _encode(self):
+        try:
+            while True:
+                item = self._get(self.inferred)
+                if item is _END:
+                    break
+                self.write_frame(*item)
+        except Exception as e:
+            self._fail(e)
+
+    def _fail(self, error: Exception):
+        self.error = error
+        self.stopped.set()
+
+    # queue.put/get that give up once the pipeline is stopped, so no stage waits forever
+    def _put(self, stage: queue.Queue, item) -> None:
+        while not self.stopped.is_set():
+            try:
+                stage.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, stage: queue.Queue):
+        while not self.stopped.is_set():
+            try:
+                return stage.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import get_settings
+from app.models.cropped_image import CroppedImage
+from app.models.upload import UploadFile as UploadFileModel
+from app.services.pagination import keyset_page
+from app.services.plates import find_province, normalize_plate
+
+settings = get_settings()
+
+SEARCH_MODES = ("exact", "prefix", "fuzzy")
+
+# What a search result shows: the crop and the upload it was seen in
+PLATE_SEARCH_COLUMNS = (
+    CroppedImage.id,
+    CroppedImage.upload_id,
+    UploadFileModel.user_id,
+    UploadFileModel.upload_name,
+    CroppedImage.crop_image_url,
+    CroppedImage.crop_class_name,
+    CroppedImage.license_plate,
+    CroppedImage.plate_province,
+    CroppedImage.crop_timestamp,
+    CroppedImage.created_at,
+)
+
+
+async def search_plates(
+    session: AsyncSession,
+    query: str,
+    mode: str = "exact",
+    class_name: str = None,
+    province: str = None,
+    date_from: datetime = None,
+    date_to: datetime = None,
+    user_id: int = None,
+    limit: int = 50,
+    cursor: str = None
+) -> dict:
+    """Crops whose plate matches `query`, over all uploads (or the uploads of `user_id`).
+
+    Plates are compared normalized (normalize_plate: prefix + number, confusables fixed,
+    province dropped), so spacing and the province line do not matter:
+    `exact` and `prefix` are lookups in the text_pattern_ops index, newest first;
+    `fuzzy` are trigram matches (pg_trgm GIN index) with a similarity of at least
+    PLATE_FUZZY_THRESHOLD, best match first, each with its `score`.
+    """
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"mode must be one of {SEARCH_MODES}")
+    plate = normalize_plate(query)
+    if not plate:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty plate query")
+
+    column = CroppedImage.license_plate_normalized
+    rank = None
+    if mode == "exact":
+        statement = select(*PLATE_SEARCH_COLUMNS).where(column == plate)
+    elif mode == "prefix":
+        statement = select(*PLATE_SEARCH_COLUMNS).where(column.startswith(plate, autoescape=True))
+    else:
+        # % uses the GIN index with the threshold of this transaction
+        await session.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+            {"threshold": str(settings.PLATE_FUZZY_THRESHOLD)}
+        )
+        rank = func.similarity(column, plate).label("score")
+        statement = select(*PLATE_SEARCH_COLUMNS, rank).where(column.op("%")(plate))
+
+    statement = statement.join(UploadFileModel, UploadFileModel.id == CroppedImage.upload_id)
+    if class_name is not None:
+        statement = statement.where(CroppedImage.crop_class_name == class_name)
+    if province is not None:
+        # "กรุงเทพ", "กทม" and "กรุงเทพมหานคร" are the same province
+        statement = statement.where(CroppedImage.plate_province == (find_province(province)[0] or province))
+    if date_from is not None:
+        statement = statement.where(CroppedImage.created_at >= date_from)
+    if date_to is not None:
+        statement = statement.where(CroppedImage.created_at < date_to)
+    if user_id is not None:
+        statement = statement.where(UploadFileModel.user_id == user_id)
+
+    return await keyset_page(session, statement, CroppedImage, limit, cursor, rank=rank)
@@ -0,0 +1,147 @@
+import difflib
+import re
+import unicodedata
+from typing import NamedTuple, Optional
+
+# จังหวัดทั้ง 77 (76 จังหวัด + กรุงเทพมหานคร) as printed on the bottom line of a plate
+PROVINCES = (
+    "กรุงเทพมหานคร", "กระบี่", "กาญจนบุรี", "กาฬสินธุ์", "กำแพงเพชร", "ขอนแก่น", "จันทบุรี",
+    "ฉะเชิงเทรา", "ชลบุรี", "ชัยนาท", "ชัยภูมิ", "ชุมพร", "เชียงราย", "เชียงใหม่", "ตรัง", "ตราด",
+    "ตาก", "นครนายก", "นครปฐม", "นครพนม", "นครราชสีมา", "นครศรีธรรมราช", "นครสวรรค์", "นนทบุรี",
+    "นราธิวาส", "น่าน", "บึงกาฬ", "บุรีรัมย์", "ปทุมธานี", "ประจวบคีรีขันธ์", "ปราจีนบุรี", "ปัตตานี",
+    "พระนครศรีอยุธยา", "พะเยา", "พังงา", "พัทลุง", "พิจิตร", "พิษณุโลก", "เพชรบุรี", "เพชรบูรณ์",
+    "แพร่", "ภูเก็ต", "มหาสารคาม", "มุกดาหาร", "แม่ฮ่องสอน", "ยโสธร", "ยะลา", "ร้อยเอ็ด", "ระนอง",
+    "ระยอง", "ราชบุรี", "ลพบุรี", "ลำปาง", "ลำพูน", "เลย", "ศรีสะเกษ", "สกลนคร", "สงขลา", "สตูล",
+    "สมุทรปราการ", "สมุทรสงคราม", "สมุทรสาคร", "สระแก้ว", "สระบุรี", "สิงห์บุรี", "สุโขทัย",
+    "สุพรรณบุรี", "สุราษฎร์ธานี", "สุรินทร์", "หนองคาย", "หนองบัวลำภู", "อ่างทอง", "อำนาจเจริญ",
+    "อุดรธานี", "อุตรดิตถ์", "อุทัยธานี", "อุบลราชธานี",
+)
+# Short forms seen on older plates and in OCR output
+PROVINCE_ALIASES = {
+    "กรุงเทพ": "กรุงเทพมหานคร",
+    "กทม": "กรุงเทพมหานคร",
+    "อยุธยา": "พระนครศรีอยุธยา",
+}
+
+SEPARATORS = re.compile(r"[\s\-.,·_]+")
+THAI_DIGITS = str.maketrans({chr(0x0E50 + digit): str(digit) for digit in range(10)})
+# Latin letters the recognizers return for digits of the number
+LATIN_DIGITS = {
+    "O": "0", "o": "0", "D": "0", "Q": "0",
+    "I": "1", "l": "1", "|": "1", "i": "1",
+    "Z": "2", "z": "2",
+    "S": "5", "s": "5",
+    "G": "6", "b": "6",
+    "B": "8",
+    "g": "9", "q": "9",
+}
+CONFUSABLES = str.maketrans({**{chr(0x0E50 + digit): str(digit) for digit in range(10)}, **LATIN_DIGITS})
+# Vowel and tone marks: never part of a plate prefix (only consonants are), OCR adds them anyway
+THAI_MARKS = re.compile(r"[ะ-ฺเ-๎]")
+# [digit] 1-3 consonants, 1-4 digits: "กข1234", "1กข234"
+PLATE_PATTERN = re.compile(r"^(\d?[ก-ฮ]{1,3})(\d{1,4})$")
+
+
+def _build_trie(names: dict) -> dict:
+    # Character trie of every name, "" marks the end of a name and holds the province it stands for
+    trie = {}
+    for name, province in names.items():
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[""] = province
+    return trie
+
+
+PROVINCE_TRIE = _build_trie({**{province: province for province in PROVINCES}, **PROVINCE_ALIASES})
+
+
+class PlateParts(NamedTuple):
+    prefix: str  # หมวดอักษร, e.g. "กข" or "1กข"
+    number: str  # e.g. "1234"
+    province: Optional[str]
+
+    @property
+    def key(self) -> str:
+        # What identifies the plate in queries, the province is often not read
+        return self.prefix + self.number
+
+    @property
+    def text(self) -> str:
+        return " ".join(part for part in (self.prefix, self.number, self.province) if part)
+
+
+def find_province(text: str) -> tuple:
+    # Longest province name (or alias) anywhere in text, walking the trie from every position.
+    # Returns (province, start, end) or (None, -1, -1)
+    best = (None, -1, -1)
+    for start in range(len(text)):
+        node = PROVINCE_TRIE
+        for end in range(start, len(text)):
+            node = node.get(text[end])
+            if node is None:
+                break
+            if "" in node and end + 1 - start > best[2] - best[1]:
+                best = (node[""], start, end + 1)
+    return best
+
+
+def _exact_province(text: str) -> Optional[str]:
+    node = PROVINCE_TRIE
+    for char in text:
+        node = node.get(char)
+        if node is None:
+            return None
+    return node.get("")
+
+
+def parse_plate(text: str) -> Optional[PlateParts]:
+    """Split OCR output like "กข 1234 กรุงเทพมหานคร" / "กข1234กรุงเทพ" / "กข-l234" into
+    prefix, number and province, or None when it does not look like a Thai plate."""
+    text = SEPARATORS.sub("", unicodedata.normalize("NFC", text or ""))
+    if not text:
+        return None
+
+    # The province line is everything after the number: after its last digit, or Latin letter read
+    # for one (provinces are Thai only)
+    number_end = max((index + 1 for index, char in enumerate(text) if char.isdigit() or char in LATIN_DIGITS), default=0)
+    if not number_end:
+        return None
+    rest, tail = text[:number_end], text[number_end:]
+
+    # A province (or alias) only when it is the whole tail, "กรุงเทพมหานดร" is not "กรุงเทพ" + junk.
+    # A misread tail is read as the province it is close enough to, otherwise dropped
+    province = _exact_province(tail)
+    if province is None and len(tail) >= 3:
+        close = difflib.get_close_matches(tail, PROVINCES, n=1, cutoff=0.75)
+        province = close[0] if close else None
+
+    rest = THAI_MARKS.sub("", rest)
+    # Confusables only go in the number, the prefix is Thai consonants and at most a leading digit
+    match = re.match(r"^(\d?[ก-ฮ]{1,3})(.{1,4})$", rest.translate(THAI_DIGITS))
+    if match is None:
+        return None
+    prefix, number = match.group(1), match.group(2).translate(CONFUSABLES)
+    if not PLATE_PATTERN.match(prefix + number):
+        return None
+    return PlateParts(prefix, number, province)
+
+
+def normalize_plate(text: str) -> str:
+    # "กข 1234", "กข-1234 กรุงเทพมหานคร" and "กข l234" are the same plate: prefix + number.
+    # Text that does not parse as a plate only loses its separators (NFC, Latin upper case)
+    parts = parse_plate(text)
+    if parts is not None:
+        return parts.key
+    return SEPARATORS.sub("", unicodedata.normalize("NFC", text or "")).upper()
+
+
+def plate_columns(text: str) -> dict:
+    # The searchable CroppedImage columns of a license_plate text
+    parts = parse_plate(text)
+    return {
+        "license_plate_normalized": parts.key if parts is not None else normalize_plate(text),
+        "plate_prefix": parts.prefix if parts is not None else None,
+        "plate_number": parts.number if parts is not None else None,
+        "plate_province": parts.province if parts is not None else None,
+    }
@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import get_settings
+from app.models.user import Roles, Users, UsersRoles
+
+settings = get_settings()
+
+
+class Principal(NamedTuple):
+    # The authenticated user as routes see it (the Users columns they read), detached from any session
+    id: int
+    username: str
+    email: str
+    user_id: Optional[int]
+    image_url: str
+    is_verified: bool
+    created_at: datetime
+
+
+class PrincipalCache:
+    """(Principal, role name) of recently authenticated users, by users.id.
+
+    Entries live `ttl` seconds, at most `max_size` of them (least recently used are
+    evicted). Changes made through this process call invalidate(); other uvicorn
+    workers see them after at most `ttl` seconds, which is why it is short.
+    """
+
+    def __init__(self, ttl: float = 30, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # user id -> (expires at, principal, role)
+
+    def get(self, user_id: int):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(user_id, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(user_id)
+        return entry[1], entry[2]
+
+    def put(self, user_id: int, principal: Principal, role: Optional[str]) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl, principal, role)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int = None) -> None:
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(int(user_id), None)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "ttl": self.ttl, "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_TTL, settings.PRINCIPAL_CACHE_SIZE)
+
+
+async def load_principal(db: AsyncSession, user_id: int) -> tuple:
+    # User and role name in one query, (None, None) when the user does not exist
+    result = await db.execute(
+        select(
+            Users.id, Users.username, Users.email, Users.user_id, Users.image_url,
+            Users.is_verified, Users.created_at, Roles.role_name,
+        )
+        .outerjoin(UsersRoles, UsersRoles.user_id == Users.id)
+        .outerjoin(Roles, Roles.id == UsersRoles.role_id)
+        .where(Users.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        return None, None
+    *columns, role = row
+    return Principal(*columns), role
+
+
+async def get_principal(db: AsyncSession, user_id: int) -> tuple:
+    user_id = int(user_id)
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return cached
+    principal, role = await load_principal(db, user_id)
+    if principal is not None:
+        principal_cache.put(user_id, principal, role)
+    return principal, role
+
+
+def invalidate_principal(user_id: int = None) -> None:
+    principal_cache.invalidate(user_id)
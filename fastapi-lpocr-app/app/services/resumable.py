@@ -0,0 +1,288 @@
+import asyncio
+import glob
+import math
+import os
+import time
+import uuid
+
+import cv2
+from fastapi import HTTPException, status
+
+from app.config.settings import get_settings
+from app.config.storage import get_storage
+from app.services.jobs import create_job, job_store
+
+settings = get_settings()
+SESSION_EXPIRY = 86400
+SWEEP_INTERVAL = 300
+_last_sweep = 0.0
+
+
+def _session_key(session_id: str) -> str:
+    return f"upload:session:{session_id}"
+
+
+def growing_marker(spool_path: str) -> str:
+    # Exists while a resumable upload is still receiving chunks, see GrowingCapture
+    return f"{spool_path}.partial"
+
+
+def _chunk_path(spool_path: str, index: int) -> str:
+    return f"{spool_path}.chunk{index}"
+
+
+def _staged_name(session: dict) -> str:
+    # Blob the chunks of one session are staged on, uploads of the same filename never mix their blocks
+    return f"{session['session_id']}/{session['filename']}"
+
+
+async def create_session(user_id: int, filename: str, content_type: str, upload_type: str, size: int) -> dict:
+    session_id = uuid.uuid4().hex
+    os.makedirs(settings.UPLOAD_SPOOL_DIR, exist_ok=True)
+    _, ext = os.path.splitext(filename)
+    spool_path = os.path.join(settings.UPLOAD_SPOOL_DIR, f"{session_id}{ext.lower()}")
+
+    # The spool file only ever holds the contiguous chunks received so far, so it can be decoded while it grows
+    open(spool_path, "wb").close()
+    open(growing_marker(spool_path), "wb").close()
+
+    session = {
+        "session_id": session_id,
+        "user_id": user_id,
+        "filename": filename,
+        "content_type": content_type,
+        "upload_type": upload_type,
+        "size": size,
+        "chunk_size": settings.UPLOAD_SESSION_CHUNK_SIZE,
+        "total_chunks": max(1, math.ceil(size / settings.UPLOAD_SESSION_CHUNK_SIZE)),
+        "path": spool_path,
+        "next_chunk": 0,
+        "job_id": "",
+    }
+    await job_store.hset(_session_key(session_id), mapping=session)
+    await job_store.expire(_session_key(session_id), SESSION_EXPIRY)
+    return session
+
+
+async def get_session(session_id: str) -> dict | None:
+    session = await job_store.hgetall(_session_key(session_id))
+    if not session:
+        return None
+    if not os.path.exists(growing_marker(session["path"])):
+        # Its job failed (stalled) and the spool files are gone, the upload has to start over
+        await job_store.delete(_session_key(session_id))
+        return None
+
+    for key in ("user_id", "size", "chunk_size", "total_chunks", "next_chunk"):
+        session[key] = int(session[key])
+    # Chunks parked after a gap, a resuming client only has to send the others
+    session["received_chunks"] = list(range(session["next_chunk"])) + [
+        index for index in range(session["next_chunk"], session["total_chunks"])
+        if os.path.exists(_chunk_path(session["path"], index))
+    ]
+    return session
+
+
+def expected_chunk_size(session: dict, index: int) -> int:
+    if index == session["total_chunks"] - 1:
+        return session["size"] - index * session["chunk_size"]
+    return session["chunk_size"]
+
+
+async def write_chunk(session: dict, index: int, stream) -> dict:
+    # stream: the request body (request.stream()), written to the chunk file as it arrives so a chunk is
+    # never held in memory as a whole. Put the same chunk again after a dropped connection is fine,
+    # it overwrites (or is ignored once appended)
+    if index < session["next_chunk"]:
+        return session
+
+    chunk_path = _chunk_path(session["path"], index)
+    await _receive_chunk(chunk_path, stream, expected_chunk_size(session, index), index)
+    await get_storage().stage_block(_staged_name(session), index, chunk_path)
+
+    # Append the chunks that became contiguous to the spool file, one request at a time per session
+    async with job_store.lock(f"{_session_key(session['session_id'])}:lock", timeout=60):
+        next_chunk = int(await job_store.hget(_session_key(session["session_id"]), "next_chunk"))
+        next_chunk = await asyncio.to_thread(_append_contiguous, session["path"], next_chunk, session["total_chunks"])
+        await job_store.hset(_session_key(session["session_id"]), "next_chunk", next_chunk)
+
+        job_id = await job_store.hget(_session_key(session["session_id"]), "job_id")
+        if not job_id and session["upload_type"] == "video" and next_chunk < session["total_chunks"]:
+            # Start inference as soon as the received part decodes (moov atom at the front, i.e. a
+            # faststart/fragmented mp4), the worker then reads the spool file while it grows
+            if await asyncio.to_thread(_decodes, session["path"]):
+                job_id = await _create_job(session)
+
+    session["next_chunk"] = next_chunk
+    session["job_id"] = job_id
+    return session
+
+
+async def complete_session(session: dict) -> str:
+    storage = get_storage()
+    await storage.commit_blocks(
+        _staged_name(session), session["filename"], session["total_chunks"], session["content_type"], session["path"]
+    )
+    os.remove(growing_marker(session["path"]))
+
+    job_id = session["job_id"] or await _create_job(session)
+    await job_store.delete(_session_key(session["session_id"]))
+    return job_id
+
+
+async def _create_job(session: dict) -> str:
+    job_id = await create_job({
+        "user_id": session["user_id"],
+        "filename": session["filename"],
+        "upload_type": session["upload_type"],
+        "path": session["path"],
+    })
+    await job_store.hset(_session_key(session["session_id"]), "job_id", job_id)
+    return job_id
+
+
+def discard_spool(spool_path: str) -> None:
+    # Spool file of an upload with every file named after it: growing marker, parked chunks and the
+    # annotated output of its job (predicted_path of app/services/upload.py)
+    for path in [spool_path, *glob.glob(f"{glob.escape(spool_path)}.*")]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def sweep_expired_sessions(min_age: float = 60) -> int:
+    # Spool files of sessions that expired (SESSION_EXPIRY) without being completed, at most every
+    # SWEEP_INTERVAL seconds. Markers younger than min_age may belong to a session being created
+    global _last_sweep
+    if time.monotonic() - _last_sweep < SWEEP_INTERVAL:
+        return 0
+    _last_sweep = time.monotonic()
+
+    removed = 0
+    for marker in glob.glob(os.path.join(glob.escape(settings.UPLOAD_SPOOL_DIR), "*.partial")):
+        spool_path = marker[:-len(".partial")]
+        session_id = os.path.basename(spool_path).split(".")[0]
+        try:
+            if time.time() - os.path.getmtime(marker) < min_age:
+                continue
+        except FileNotFoundError:
+            continue
+        if not await job_store.exists(_session_key(session_id)):
+            await asyncio.to_thread(discard_spool, spool_path)
+            removed += 1
+    return removed
+
+
+async def _receive_chunk(chunk_path: str, stream, size: int, index: int) -> None:
+    # Into a temporary file first, only a complete chunk of the right size is ever appended to the spool file
+    temp_path = f"{chunk_path}.part"
+    received = 0
+    try:
+        with open(temp_path, "wb") as chunk_file:
+            async for data in stream:
+                received += len(data)
+                if received > size:
+                    break
+                await asyncio.to_thread(chunk_file.write, data)
+        if received != size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Chunk {index} must be {size} bytes"
+            )
+        os.replace(temp_path, chunk_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _append_contiguous(spool_path: str, next_chunk: int, total_chunks: int) -> int:
+    with open(spool_path, "ab") as spool_file:
+        while next_chunk < total_chunks and os.path.exists(_chunk_path(spool_path, next_chunk)):
+            with open(_chunk_path(spool_path, next_chunk), "rb") as chunk_file:
+                spool_file.write(chunk_file.read())
+            os.remove(_chunk_path(spool_path, next_chunk))
+            next_chunk += 1
+    return next_chunk
+
+
+def _decodes(path: str) -> bool:
+    cap = cv2.VideoCapture(path)
+    try:
+        return cap.isOpened() and cap.read()[0]
+    finally:
+        cap.release()
+
+
+class GrowingCapture:
+    """cv2.VideoCapture for a spool file that may still be receiving chunks.
+
+    When a read hits the end of what has arrived so far it waits for the file to grow,
+    reopens it and seeks back to the next frame. Once the upload completed (growing
+    marker removed) the end of the file is the end of the video. Gives up (TimeoutError,
+    the job fails) after `timeout` seconds without new data.
+
+    CAP_PROP_FRAME_COUNT is 0 (unknown) until the upload completed, the count of the part
+    received so far would be overtaken by the frames read.
+    """
+
+    def __init__(self, path: str, poll: float = 0.5, timeout: float = settings.UPLOAD_STALL_TIMEOUT):
+        self.path = path
+        self.marker = growing_marker(path)
+        self.poll = poll
+        self.timeout = timeout
+        self.index = 0
+        self.complete = not os.path.exists(self.marker)  # plain uploads are complete from the start
+        self.frame_count = None
+        self.cap = cv2.VideoCapture(path)
+        while not self.cap.isOpened() and self._wait_for_data():
+            self.cap = cv2.VideoCapture(path)
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self._frame_count()
+        return self.cap.get(prop)
+
+    def read(self) -> tuple:
+        success, frame = self.cap.read()
+        while not success and self._wait_for_data():
+            self.cap.release()
+            self.cap = cv2.VideoCapture(self.path)
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.index)
+            success, frame = self.cap.read()
+
+        if success:
+            self.index += 1
+        return success, frame
+
+    def release(self) -> None:
+        self.cap.release()
+
+    def _frame_count(self) -> int:
+        if self.frame_count is None:
+            if os.path.exists(self.marker):
+                return 0
+            # The open capture may predate the last chunks, count the finished file once
+            probe = cv2.VideoCapture(self.path)
+            self.frame_count = int(probe.get(cv2.CAP_PROP_FRAME_COUNT))
+            probe.release()
+        return self.frame_count
+
+    def _wait_for_data(self) -> bool:
+        # True once the file grew (or just completed, to read its tail), False when nothing more will arrive
+        if self.complete:
+            return False
+
+        size = os.path.getsize(self.path)
+        waited = 0.0
+        while os.path.exists(self.marker) and os.path.getsize(self.path) == size:
+            if waited >= self.timeout:
+                raise TimeoutError(f"Upload of {self.path} stalled")
+            time.sleep(self.poll)
+            waited += self.poll
+
+        self.complete = not os.path.exists(self.marker)
+        return True
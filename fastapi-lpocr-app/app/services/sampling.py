@@ -0,0 +1,73 @@
+import cv2
+
+SAMPLING_MODES = ("all", "stride", "motion", "keyframe")
+_THUMB_SIZE = (64, 36)
+_DRAWN_KEYS = ("box", "cls", "conf", "plates", "track_id")
+
+
+class FrameSampler:
+    """Decides which video frames get full inference.
+
+    all      - every frame (the old behaviour)
+    stride   - every `stride`-th frame
+    motion   - when the downscaled gray frame differs from the last inferred one by more
+               than `motion_threshold` (mean absolute difference, 0-255)
+    keyframe - on scene changes, i.e. when the gray histogram correlation with the last
+               inferred frame drops below `keyframe_threshold`, like an encoder placing I-frames
+
+    motion and keyframe still infer at least every `max_skip` frames so slow changes are not missed.
+    """
+
+    def __init__(
+        self,
+        mode: str = "all",
+        stride: int = 5,
+        motion_threshold: float = 6.0,
+        keyframe_threshold: float = 0.9,
+        max_skip: int = 30
+    ):
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode '{mode}', use one of {SAMPLING_MODES}")
+
+        self.mode = mode
+        self.stride = max(1, stride)
+        self.motion_threshold = motion_threshold
+        self.keyframe_threshold = keyframe_threshold
+        self.max_skip = max(1, max_skip)
+
+        self.frame_index = -1
+        self.last_inferred = None  # frame index of the last inferred frame
+        self.last_thumb = None
+        self.last_hist = None
+
+    def should_infer(self, frame) -> bool:
+        self.frame_index += 1
+
+        if self.mode == "all":
+            return True
+        if self.mode == "stride":
+            return self.frame_index % self.stride == 0
+
+        thumb = cv2.cvtColor(cv2.resize(frame, _THUMB_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        forced = self.last_inferred is None or self.frame_index - self.last_inferred >= self.max_skip
+
+        if self.mode == "motion":
+            changed = forced or cv2.absdiff(thumb, self.last_thumb).mean() > self.motion_threshold
+            if changed:
+                self.last_thumb = thumb
+        else:
+            hist = cv2.calcHist([thumb], [0], None, [32], [0, 256])
+            cv2.normalize(hist, hist)
+            changed = forced or cv2.compareHist(hist, self.last_hist, cv2.HISTCMP_CORREL) < self.keyframe_threshold
+            if changed:
+                self.last_hist = hist
+
+        if changed:
+            self.last_inferred = self.frame_index
+        return changed
+
+
+def propagate(vehicles: list) -> list:
+    # Detections of the last inferred frame, redrawn on the skipped frames so the annotated
+    # video stays continuous. Only what is drawn is copied, nothing gets persisted again.
+    return [{key: vehicle[key] for key in _DRAWN_KEYS if key in vehicle} for vehicle in vehicles]
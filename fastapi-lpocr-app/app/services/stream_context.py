@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+import uuid
+
+from app.services.tracker import Tracker
+
+
+class StreamContext:
+    """State of one webcam/camera stream: its tracker (per-track plate box, text and OCR
+    attempts live in `tracker.data`) and frame counters."""
+
+    def __init__(
+        self,
+        session_id: str,
+        tracker: Tracker = None,
+        frames: int = 0,
+        ocr_calls: int = 0,
+        stream_id: str = None
+    ):
+        self.session_id = session_id
+        # Unique per context, a session id that comes back after eviction starts its track ids over
+        self.stream_id = stream_id or uuid.uuid4().hex
+        self.tracker = tracker if tracker is not None else Tracker(max_missing=5)
+        self.frames = frames
+        self.ocr_calls = ocr_calls
+        self.last_seen = time.monotonic()
+        # Two connections with the same session id must not update the tracker at the same time
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> dict:
+        return {
+            "tracker": self.tracker.to_dict(),
+            "frames": self.frames,
+            "ocr_calls": self.ocr_calls,
+            "stream_id": self.stream_id,
+        }
+
+    @classmethod
+    def from_dict(cls, session_id: str, state: dict) -> "StreamContext":
+        return cls(
+            session_id, Tracker.from_dict(state["tracker"]), state["frames"], state["ocr_calls"], state.get("stream_id")
+        )
+
+    def stats(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "frames": self.frames,
+            "ocr_calls": self.ocr_calls,
+            "tracks": len(self.tracker),
+            "idle_seconds": round(time.monotonic() - self.last_seen, 1),
+        }
+
+
+class StreamContexts:
+    """Stream contexts by session/camera id, dropped after `ttl` seconds without a frame.
+
+    With a Redis client every context is also saved there after each frame (same TTL),
+    so the next frame of a stream can be handled by another uvicorn worker. A worker
+    only reloads the context when another one advanced it in the meantime.
+    """
+
+    def __init__(self, ttl: float = 300, redis=None):
+        self.ttl = ttl
+        self.redis = redis
+        self.contexts = {}
+
+    async def get(self, session_id: str) -> StreamContext:
+        self.evict_expired()
+        context = self.contexts.get(session_id)
+
+        if self.redis is not None:
+            remote_frames = await self.redis.hget(self._key(session_id), "frames")
+            if remote_frames is not None and (context is None or context.frames != int(remote_frames)):
+                state = await self.redis.hget(self._key(session_id), "state")
+                context = StreamContext.from_dict(session_id, json.loads(state))
+
+        if context is None:
+            context = StreamContext(session_id)
+        context.last_seen = time.monotonic()
+        self.contexts[session_id] = context
+        return context
+
+    async def save(self, context: StreamContext) -> None:
+        context.last_seen = time.monotonic()
+        if self.redis is None:
+            return
+
+        key = self._key(context.session_id)
+        await self.redis.hset(key, mapping={"frames": context.frames, "state": json.dumps(context.to_dict())})
+        await self.redis.expire(key, int(self.ttl))
+
+    def evict_expired(self) -> None:
+        now = time.monotonic()
+        for session_id in [
+            session_id for session_id, context in self.contexts.items()
+            if now - context.last_seen > self.ttl
+        ]:
+            del self.contexts[session_id]
+
+    def stats(self) -> list:
+        self.evict_expired()
+        return [context.stats() for context in self.contexts.values()]
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"webcam:stream:{session_id}"
@@ -0,0 +1,178 @@
+import numpy as np
+
+# Constant velocity model over [cx, cy, w, h] (SORT style), state = [cx, cy, w, h, vcx, vcy, vw, vh]
+_F = np.eye(8)
+_F[:4, 4:] = np.eye(4)
+_H = np.eye(4, 8)
+_Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001, 0.0001])
+_R = np.diag([1.0, 1.0, 10.0, 10.0])
+_P0 = np.diag([10.0, 10.0, 10.0, 10.0, 1000.0, 1000.0, 1000.0, 1000.0])
+
+
+def xyxy_to_cxcywh(boxes: np.ndarray) -> np.ndarray:
+    return np.stack([
+        (boxes[:, 0] + boxes[:, 2]) / 2,
+        (boxes[:, 1] + boxes[:, 3]) / 2,
+        boxes[:, 2] - boxes[:, 0],
+        boxes[:, 3] - boxes[:, 1],
+    ], axis=1)
+
+
+def cxcywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    return np.stack([
+        boxes[:, 0] - boxes[:, 2] / 2,
+        boxes[:, 1] - boxes[:, 3] / 2,
+        boxes[:, 0] + boxes[:, 2] / 2,
+        boxes[:, 1] + boxes[:, 3] / 2,
+    ], axis=1)
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    # Pairwise IoU of (N, 4) and (M, 4) xyxy boxes -> (N, M)
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).clip(0).prod(axis=1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).clip(0).prod(axis=1)
+    union = area_a[:, None] + area_b[None, :] - inter
+
+    return inter / np.maximum(union, 1e-9)
+
+
+class Tracker:
+    """IoU + Kalman multi-object tracker with stable ids across frames.
+
+    Every track is a row of the batched Kalman state, so predict and update are a few
+    NumPy ops per frame whatever the number of tracks. Detections are matched greedily by
+    IoU against the predicted boxes. `data[track_id]` is free per-track state for callers
+    (OCR attempts, plate text, ...) and is dropped with the track.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3, max_missing: int = 15):
+        self.iou_threshold = iou_threshold
+        self.max_missing = max_missing
+
+        self.mean = np.zeros((0, 8))
+        self.cov = np.zeros((0, 8, 8))
+        self.ids = np.zeros(0, dtype=int)
+        self.missing = np.zeros(0, dtype=int)
+        self.data = {}
+        self.next_id = 1
+
+    def __len__(self):
+        return len(self.ids)
+
+    def to_dict(self) -> dict:
+        # JSON-able state, `data` values have to be JSON-able too
+        return {
+            "iou_threshold": self.iou_threshold,
+            "max_missing": self.max_missing,
+            "mean": self.mean.round(3).tolist(),
+            "cov": self.cov.round(3).tolist(),
+            "ids": self.ids.tolist(),
+            "missing": self.missing.tolist(),
+            "data": {str(track_id): data for track_id, data in self.data.items()},
+            "next_id": self.next_id,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "Tracker":
+        tracker = cls(state["iou_threshold"], state["max_missing"])
+        tracker.mean = np.array(state["mean"], dtype=float).reshape(-1, 8)
+        tracker.cov = np.array(state["cov"], dtype=float).reshape(-1, 8, 8)
+        tracker.ids = np.array(state["ids"], dtype=int)
+        tracker.missing = np.array(state["missing"], dtype=int)
+        tracker.data = {int(track_id): data for track_id, data in state["data"].items()}
+        tracker.next_id = state["next_id"]
+        return tracker
+
+    def predicted_boxes(self) -> np.ndarray:
+        return cxcywh_to_xyxy(self.mean[:, :4])
+
+    def update(self, boxes) -> list:
+        # boxes: xyxy detections of one frame, returns the track id of every detection
+        detections = np.asarray(boxes, dtype=float).reshape(-1, 4)
+        self._predict()
+
+        track_ids = [0] * len(detections)
+        matched_tracks, matched_dets = self._match(detections)
+
+        if len(matched_tracks):
+            self._correct(matched_tracks, xyxy_to_cxcywh(detections[matched_dets]))
+            self.missing[matched_tracks] = 0
+            for track, det in zip(matched_tracks, matched_dets):
+                track_ids[det] = int(self.ids[track])
+
+        # Age out the tracks that were not seen for too long
+        unmatched = np.ones(len(self.ids), dtype=bool)
+        unmatched[matched_tracks] = False
+        self.missing[unmatched] += 1
+        self._drop(self.missing > self.max_missing)
+
+        # Unmatched detections start new tracks
+        new_dets = [det for det in range(len(detections)) if track_ids[det] == 0]
+        for det in new_dets:
+            track_ids[det] = self._start(detections[det])
+
+        return track_ids
+
+    def _predict(self):
+        if not len(self.ids):
+            return
+        self.mean = self.mean @ _F.T
+        self.cov = _F @ self.cov @ _F.T + _Q
+
+    def _match(self, detections: np.ndarray) -> tuple:
+        if not len(self.ids) or not len(detections):
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+        ious = iou_matrix(self.predicted_boxes(), detections)
+        tracks, dets = np.nonzero(ious >= self.iou_threshold)
+        order = np.argsort(-ious[tracks, dets])
+
+        used_tracks, used_dets = set(), set()
+        matched_tracks, matched_dets = [], []
+        for track, det in zip(tracks[order], dets[order]):
+            if track in used_tracks or det in used_dets:
+                continue
+            used_tracks.add(track)
+            used_dets.add(det)
+            matched_tracks.append(track)
+            matched_dets.append(det)
+
+        return np.array(matched_tracks, dtype=int), np.array(matched_dets, dtype=int)
+
+    def _correct(self, rows: np.ndarray, measurements: np.ndarray):
+        mean, cov = self.mean[rows], self.cov[rows]
+
+        innovation = measurements - mean @ _H.T
+        s = _H @ cov @ _H.T + _R
+        gain = cov @ _H.T @ np.linalg.inv(s)
+
+        self.mean[rows] = mean + np.einsum("nij,nj->ni", gain, innovation)
+        self.cov[rows] = (np.eye(8) - gain @ _H) @ cov
+
+    def _start(self, box: np.ndarray) -> int:
+        track_id = self.next_id
+        self.next_id += 1
+
+        state = np.zeros(8)
+        state[:4] = xyxy_to_cxcywh(box[None])[0]
+        self.mean = np.vstack([self.mean, state])
+        self.cov = np.concatenate([self.cov, _P0[None]])
+        self.ids = np.append(self.ids, track_id)
+        self.missing = np.append(self.missing, 0)
+        self.data[track_id] = {}
+
+        return track_id
+
+    def _drop(self, dead: np.ndarray):
+        if not dead.any():
+            return
+        for track_id in self.ids[dead]:
+            self.data.pop(int(track_id), None)
+
+        keep = ~dead
+        self.mean, self.cov = self.mean[keep], self.cov[keep]
+        self.ids, self.missing = self.ids[keep], self.missing[keep]
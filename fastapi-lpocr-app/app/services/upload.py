@@ -1,100 +1,175 @@
-import io
+import asyncio
 import os
-import tempfile
+import uuid
 from typing import List
 import cv2
 from fastapi import HTTPException, status, UploadFile
 from fastapi.responses import JSONResponse
 import numpy as np
-from sqlalchemy import select, desc
+from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
-from azure.storage.blob import BlobServiceClient, ContentSettings
+from app.config.model_registry import model_registry
 from app.config.settings import get_settings
-from ultralytics import YOLO 
-from ultralytics.utils.plotting import Annotator, colors
+from app.config.storage import get_storage
 
-from app.models.cropped_image import CroppedImage
 from app.models.upload import UploadFile as UploadFileModel
 from app.schemas.upload import UploadFileCreate
-
-import easyocr
+from app.services.blob_writer import BlobWriter
+from app.services.jobs import create_job
+from app.services.pagination import keyset_page
+from app.services.consensus import add_readings, needs_ocr
+from app.services.pipeline import VideoPipeline
+from app.services.resumable import GrowingCapture
+from app.services.sampling import FrameSampler, propagate
+from app.services.tracker import Tracker
+from app.services.upload_records import save_upload
 
 settings = get_settings()
-blob_service_client = BlobServiceClient.from_connection_string(settings.AZURE_CONNECTION_STRING)
 ALLOWED_IMAGE_EXTENSIONS = {"jpg", "jpeg", "png"}
 ALLOWED_VIDEO_EXTENSION = {"mp4"}
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_CONTENT_TYPES = {"image": "image/jpeg", "video": "video/mp4"}
+PROGRESS_EVERY = 30  # frames
+# Upload listings only select the columns UploadFileSchema returns
+UPLOAD_LIST_COLUMNS = (
+    UploadFileModel.id,
+    UploadFileModel.user_id,
+    UploadFileModel.upload_name,
+    UploadFileModel.upload_url,
+    UploadFileModel.upload_type,
+    UploadFileModel.created_at,
+)
+
+
+def predicted_path(spool_path: str, suffix: str) -> str:
+    # Annotated output of a job next to its (unique) spool file, discard_spool removes it with the
+    # spool file whether the job finished or failed
+    return f"{spool_path}.predicted{suffix}"
+
+
+async def spool_upload(file, spool_path: str, writer) -> None:
+    # Chunk by chunk: spooled for the workers and streamed up as the original file at the same time,
+    # only one chunk (plus the blocks in flight) is in memory whatever the file size
+    try:
+        with open(spool_path, "wb") as spool_file:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                spool_file.write(chunk)
+                await writer.write(chunk)
+        await writer.commit()
+    except Exception:
+        await writer.abort()
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+        raise
+
 
 class UploadFileService:
-    def __init__(self):
-        self.model = YOLO("app/model_weights/merq_vehicleV1m.pt")  # โหลดโมเดล YOLO11s
-        self.lp_model = YOLO("app/model_weights/license_platev1nbest.pt")
-        self.names = self.model.names
+    # Models come from the process-wide registry, loaded on first use and shared with the other routers
 
-        self.ocr_reader = easyocr.Reader(['th'])
+    @property
+    def model(self):
+        return model_registry.get("vehicle")
 
-        # self.allowed_classes = [1, 2, 3, 5, 7]
+    @property
+    def lp_model(self):
+        return model_registry.get("license_plate")
 
-    async def get_all_upload(self, session: AsyncSession):
-        statement = select(UploadFileModel).order_by(desc(UploadFileModel.created_at))
-       
-        result = await session.execute(statement)
-        
-        return result.scalars().all()
+    @property
+    def names(self):
+        return self.model.names
+
+    @property
+    def plate_ocr(self):
+        # OCR_BACKEND engine, see app/services/ocr.py
+        return model_registry.get("plate_ocr")
 
-    async def get_user_uploads(self, user_uid: str, session: AsyncSession):
+    async def get_all_upload(self, session: AsyncSession, limit: int = 50, cursor: str = None) -> dict:
+        statement = select(*UPLOAD_LIST_COLUMNS)
+        return await keyset_page(session, statement, UploadFileModel, limit, cursor)
+
+    async def get_user_uploads(self, user_uid: str, session: AsyncSession, limit: int = 50, cursor: str = None) -> dict:
         user_uid_int = int(user_uid)
         statement = (
-            select(UploadFileModel)
+            select(*UPLOAD_LIST_COLUMNS)
             .where(UploadFileModel.user_id == user_uid_int)  # ใช้ user_uid ที่แปลงแล้ว
-            .order_by(desc(UploadFileModel.created_at))
         )
-        
-        result = await session.execute(statement)
-        return result.scalars().all()
+        return await keyset_page(session, statement, UploadFileModel, limit, cursor)
 
 
-    async def upload_file(
-        self, 
-        session: AsyncSession, 
-        file: UploadFile, 
-        user_id: int
-    ) -> dict:
-        container_client = blob_service_client.get_container_client(settings.AZURE_CONTAINER_NAME)
-
+    def check_upload_type(self, filename: str, content_type: str) -> str:
         # Check file type: image or video
-        if file.content_type.startswith("image/"):
-            ext = file.filename.split(".")[-1].lower()
+        ext = filename.split(".")[-1].lower()
+        if content_type.startswith("image/"):
             if ext not in ALLOWED_IMAGE_EXTENSIONS:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid image format. Only jpg, jpeg, and png are allowed."
                 )
-            upload_type = "image"
-            obj_detect_url = await self._predict_image(file, container_client)
-            
-        elif file.content_type.startswith("video/"):
-            ext = file.filename.split(".")[-1].lower()
+            return "image"
+
+        if content_type.startswith("video/"):
             if ext not in ALLOWED_VIDEO_EXTENSION:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid video format. Only mp4 is allowed."
                 )
-            upload_type = "video"
-            obj_detect_url = await self._predict_video(file, container_client)
+            return "video"
+
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file type. Only images (jpg, jpeg, png) and videos (mp4) are allowed."
+        )
+
+    async def enqueue_upload(self, file: UploadFile, user_id: int) -> dict:
+        # Store the upload in the spool dir and hand it to the inference workers (app/worker.py)
+        upload_type = self.check_upload_type(file.filename, file.content_type)
+
+        os.makedirs(settings.UPLOAD_SPOOL_DIR, exist_ok=True)
+        _, ext = os.path.splitext(file.filename)
+        spool_path = os.path.join(settings.UPLOAD_SPOOL_DIR, f"{uuid.uuid4().hex}{ext.lower()}")
+
+        writer = get_storage().open_writer(file.filename, UPLOAD_CONTENT_TYPES[upload_type])
+        await spool_upload(file, spool_path, writer)
+
+        job_id = await create_job({
+            "user_id": user_id,
+            "filename": file.filename,
+            "upload_type": upload_type,
+            "path": spool_path,
+        })
+
+        return {
+            "message": "File queued for processing",
+            "job_id": job_id,
+            "status": "queued",
+            "filename": file.filename,
+            "upload_type": upload_type,
+        }
+
+    async def process_upload(
+        self,
+        session: AsyncSession,
+        path: str,
+        filename: str,
+        upload_type: str,
+        user_id: int,
+        progress=None
+    ) -> dict:
+        storage = get_storage()
+
+        if upload_type == "image":
+            obj_detect_url = await self._predict_image(path, filename, storage)
         else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid file type. Only images (jpg, jpeg, png) and videos (mp4) are allowed."
-            )
+            obj_detect_url = await self._predict_video(path, filename, storage, progress)
 
         # checking all response
-        upload_url = f"https://{settings.AZURE_ACCOUNT_NAME}.blob.core.windows.net/{settings.AZURE_CONTAINER_NAME}/{file.filename}"
+        upload_url = storage.url(filename)
         
-        # return JSONResponse({"file_name":file.filename,"upload_url":upload_url,"video_url": obj_detect_url, "upload_type": upload_type})
+        # return JSONResponse({"file_name":filename,"upload_url":upload_url,"video_url": obj_detect_url, "upload_type": upload_type})
         '''
         response_data = {
-            "file_name":file.filename,
+            "file_name":filename,
             "upload_url":upload_url,
             "video_url": obj_detect_url["predict_url"], 
             "upload_type": upload_type,
@@ -103,59 +178,24 @@ class UploadFileService:
         return JSONResponse(content=response_data)
         '''
 
-        # Save file information to database
+        # Save file information and all of its crops in one transaction, the response is built from RETURNING
         file_record = UploadFileCreate(
-            upload_name=file.filename,
+            upload_name=filename,
             upload_url=upload_url,
             obj_detect_url=obj_detect_url["predict_url"],
             upload_type=upload_type
         )
-        db_file = UploadFileModel(
-            user_id=user_id,
-            upload_name=file_record.upload_name,
-            upload_url=file_record.upload_url,
-            obj_detect_url=file_record.obj_detect_url,
-            upload_type=file_record.upload_type
-        )
-        session.add(db_file)
-        await session.commit()
-        await session.refresh(db_file)
-
-        # Insert cropped images into the database and collect their data
-        cropped_images_data = []
-        for cropped in obj_detect_url["cropped_images"]:
-            new_cropped_image = CroppedImage(
-                upload_id=db_file.id,  # Use the ID from the uploaded file
-                crop_image_url=cropped["crop_image_url"],
-                crop_class_name=cropped["crop_class_name"],
-                license_plate=cropped["license_plate"],
-                crop_timestamp=round(cropped["crop_timestamp"], 2)  # ปัดให้เป็น 2 ตำแหน่งทศนิยม
-            )
-            session.add(new_cropped_image)
-
-        await session.commit() 
-
-        all_cropped_images = await session.execute(
-            select(CroppedImage).where(CroppedImage.upload_id == db_file.id)
+        db_file, response_data = await save_upload(
+            session,
+            {"user_id": user_id, **file_record.model_dump()},
+            obj_detect_url["cropped_images"]
         )
-        cropped_images_data = all_cropped_images.scalars().all()
-
-        response_data = [
-        {
-            "id": cropped_image.id,
-            "upload_id": cropped_image.upload_id,
-            "crop_image_url": cropped_image.crop_image_url,
-            "crop_class_name": cropped_image.crop_class_name,
-            "license_plate": cropped_image.license_plate,
-            "crop_timestamp": cropped_image.crop_timestamp
-        } for cropped_image in cropped_images_data
-        ]
 
         return {
             "message": "File uploaded successfully", 
-            "filename": db_file.upload_name,
+            "filename": db_file["upload_name"],
             "upload_type": upload_type, 
-            "upload_url": db_file.upload_url, 
+            "upload_url": db_file["upload_url"], 
             "detect_url": obj_detect_url["predict_url"],
             "cropped_images": response_data  # Include the cropped images data in the response
         }
@@ -184,248 +224,281 @@ class UploadFileService:
         else:
             return None
     
-    # service method
-    async def _predict_image(self, file: UploadFile, container_client) -> dict:
-        _, ext = os.path.splitext(file.filename)
-        ext = ext.lower()
-
-        # Create a temporary file for the uploaded image
-        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as temp_image:
-            temp_image.write(await file.read())
-            temp_image_path = temp_image.name
+    def _infer_frame(self, frame, plate_conf: float) -> list:
+        # Vehicle detection -> batched plate detection -> batched plate OCR for one frame.
+        # Vehicles above 0.6 are kept; only the ones above plate_conf are searched for plates.
+        vehicles = self._detect_vehicles(frame)
+        self._read_plates(frame, [vehicle for vehicle in vehicles if vehicle["conf"] >= plate_conf])
+        return vehicles
+
+    def _detect_vehicles(self, frame) -> list:
+        return self._detect_vehicles_batch([frame])[0]
+
+    def _detect_vehicles_batch(self, frames: list) -> list:
+        # One detector call for several frames (e.g. the cameras of app/services/cameras.py)
+        return [
+            [
+                {"box": tuple(map(int, box)), "cls": cls, "conf": conf, "plates": []}
+                for box, cls, conf in zip(boxes, clss, confs)
+                if conf >= 0.6
+            ]
+            for boxes, confs, clss in self.model.detect(frames)
+        ]
 
-        original_blob_name = file.filename
-        original_blob_client = container_client.get_blob_client(original_blob_name)
+    def _read_plates(self, frame, vehicles: list, scope=None) -> None:
+        # Detect license plates of every vehicle in one batched call.
+        # With a scope (the video / camera the tracks belong to), plates of a track that look
+        # like an earlier crop of the same track come from the OCR cache
+        vehicle_crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in (vehicle["box"] for vehicle in vehicles)]
+
+        plate_crops, plate_scopes = [], []
+        for vehicle, vehicle_crop, lp_boxes in zip(vehicles, vehicle_crops, self._detect_license_plates(vehicle_crops)):
+            x1, y1 = vehicle["box"][:2]
+            for lp_box in lp_boxes:
+                lp_x1, lp_y1, lp_x2, lp_y2 = map(int, lp_box)
+
+                # BG to Gray for OCR
+                plate_crops.append(cv2.cvtColor(vehicle_crop[lp_y1:lp_y2, lp_x1:lp_x2], cv2.COLOR_BGR2GRAY))
+                plate_scopes.append((scope, vehicle["track_id"]) if scope is not None and "track_id" in vehicle else None)
+                vehicle["plates"].append({"box": (x1 + lp_x1, y1 + lp_y1, x1 + lp_x2, y1 + lp_y2)})
+
+        # Read all plates of the frame in one recognizer batch, "cached" plates are an earlier reading of the track
+        plate_texts = iter(self.plate_ocr.read_plate_results(plate_crops, plate_scopes))
+        for vehicle in vehicles:
+            for plate in vehicle["plates"]:
+                plate["text"], plate["confidence"], plate["cached"] = next(plate_texts)
+
+    def _annotate_vehicle(self, annotator, vehicle: dict):
+        from ultralytics.utils.plotting import colors
+        label = self.names[vehicle["cls"]]
+        if "track_id" in vehicle:
+            label = f"{label} #{vehicle['track_id']}"
+        annotator.box_label(vehicle["box"], label=label, color=colors(vehicle["cls"], True))
+        for plate in vehicle["plates"]:
+            annotator.box_label(plate["box"], color=(0, 255, 0), label="License Plate")
+
+    def _detect_license_plates(self, vehicle_crops: list) -> list:
+        # Run the plate detector once for all vehicle crops of a frame instead of once per vehicle.
+        # Every backend letterboxes a list of images into a single batch, and scales every result
+        # back to the crop it came from, so result i belongs to vehicle_crops[i].
+        plates = [[] for _ in vehicle_crops]
+        batch = [i for i, crop in enumerate(vehicle_crops) if crop.size > 0]
+        if not batch:
+            return plates
+
+        lp_results = self.lp_model.detect([vehicle_crops[i] for i in batch])
+        for i, lp_result in zip(batch, lp_results):
+            plates[i] = lp_result.boxes
+
+        return plates
 
-        # Upload original image
-        with open(temp_image_path, "rb") as original_file:
-            image_data_original = io.BytesIO(original_file.read())
-            original_blob_client.upload_blob(image_data_original, overwrite=True, content_settings=ContentSettings(content_type='image/jpeg'))
+    # service method
+    async def _predict_image(self, temp_image_path: str, filename: str, storage) -> dict:
+        from ultralytics.utils.plotting import Annotator
+        # The original image was stored while it was uploaded (enqueue_upload)
 
         # Read image and set up for output
         image = cv2.imread(temp_image_path)
         assert image is not None, "Error reading image file"
-        output_path = os.path.join(tempfile.gettempdir(), "processed_image.jpg")
+        output_path = predicted_path(temp_image_path, ".jpg")
 
-        # Detect objects in the image
-        results = self.model.predict(image, show=False)
-        boxes = results[0].boxes.xyxy.cpu().tolist()
-        clss = results[0].boxes.cls.cpu().tolist()
-        confs = results[0].boxes.conf.cpu().tolist()  # Confidence scores
+        # Detect vehicles, license plates and plate text in the image, off the event loop
+        vehicles = await asyncio.to_thread(self._infer_frame, image, 0.6)
         annotator = Annotator(image, line_width=2, example=self.names)
 
         cropped_images = []
 
-        # Draw bounding boxes and crop detected vehicles
-        if boxes is not None:
-            for box, cls, conf in zip(boxes, clss, confs):
-                if conf >= 0.6:
-                    # Annotate the detected object
-                    annotator.box_label(box, label=self.names[int(cls)], color=colors(int(cls), True))
-
-                    # Crop the vehicle area and run license plate detection
-                    x1, y1, x2, y2 = map(int, box)
-                    vehicle_crop = image[y1:y2, x1:x2]
-
-                    # Detect license plates within the vehicle area
-                    lp_results = self.lp_model.predict(vehicle_crop, show=False)
-                    lp_boxes = lp_results[0].boxes.xyxy.cpu().tolist()
-
-                    # If confidence is high enough, process the cropped image
-                    if conf >= 0.6:
-                        # Annotate detected license plates on the original image
-                        if lp_boxes:  # Only proceed if license plates are detected
-                            for lp_box in lp_boxes:
-                                
-                                lp_x1, lp_y1, lp_x2, lp_y2 = map(int, lp_box)
-
-                                lp_crop = vehicle_crop[lp_y1:lp_y2, lp_x1:lp_x2]
-
-                                # BG to Gray and enhance image
-                                lp_crop_gray = cv2.cvtColor(lp_crop, cv2.COLOR_BGR2GRAY)
-                                
-                                 # Perform OCR on the license plate crop
-                                # detections = self.ocr_reader.readtext(lp_crop_thresh)
-                                ocr_result = self.ocr_reader.readtext(lp_crop_gray)
-                                if len(ocr_result) >= 2:
-                                    combined_license_plate_text = " ".join(item[1] for item in ocr_result[:2])
-                                else:
-                                    combined_license_plate_text = " ".join(item[1] for item in ocr_result)
-                                
-
-                                annotator.box_label(
-                                    (x1 + lp_x1, y1 + lp_y1, x1 + lp_x2, y1 + lp_y2),
-                                    color=(0, 255, 0),
-                                    label = "license plate"
-                                )
-
-                            # Save cropped vehicle image to Azure Blob if license plates are detected
-                            crop_image = image[y1:y2, x1:x2]
-
-                            crop_folder_name = f"crop_{file.filename}"
-                            crop_image_filename = f"{crop_folder_name}/crop_{file.filename}_{len(cropped_images) + 1}.jpg"
-
-                            # Upload the cropped image to Azure Blob Storage
-                            crop_blob_client = container_client.get_blob_client(crop_image_filename)
-                            _, buffer = cv2.imencode('.jpg', crop_image)  # Encode image to JPEG format
-                            crop_blob_client.upload_blob(io.BytesIO(buffer), overwrite=True, content_settings=ContentSettings(content_type='image/jpeg'))
-
-                            # Create the URL for the cropped image
-                            crop_image_url = f"https://{settings.AZURE_ACCOUNT_NAME}.blob.core.windows.net/{settings.AZURE_CONTAINER_NAME}/{crop_image_filename}"
-
-                            # Add the cropped image data to the array
-                            cropped_images.append({
-                                "crop_image_url": crop_image_url,
-                                "crop_class_name": self.names[int(cls)],  # Get class name from the detected class
-                                "license_plate": combined_license_plate_text,  # Fixed value as per your request
-                                "crop_timestamp": 0  # Placeholder timestamp
-                            })
-
-        # Write processed image to output
-        cv2.imwrite(output_path, image)
-        blob_name = f"predicted_{file.filename}"
-        blob_client = container_client.get_blob_client(blob_name)
-
-        with open(output_path, "rb") as output_file:
-            image_data_predicted = io.BytesIO(output_file.read())
-            blob_client.upload_blob(image_data_predicted, overwrite=True, content_settings=ContentSettings(content_type='image/jpeg'))
+        # Crops are uploaded concurrently, leaving the block waits until all of them are stored
+        async with BlobWriter(storage, settings.BLOB_UPLOAD_CONCURRENCY) as blob_writer:
+            for vehicle in vehicles:
+                self._annotate_vehicle(annotator, vehicle)
+
+                # Save cropped vehicle image to Azure Blob if license plates are detected
+                if vehicle["plates"]:
+                    x1, y1, x2, y2 = vehicle["box"]
+                    crop_image = image[y1:y2, x1:x2]
+
+                    crop_folder_name = f"crop_{filename}"
+                    crop_image_filename = f"{crop_folder_name}/crop_{filename}_{len(cropped_images) + 1}.jpg"
+
+                    # Upload the cropped image to storage
+                    _, buffer = cv2.imencode('.jpg', crop_image)  # Encode image to JPEG format
+                    await blob_writer.put(crop_image_filename, buffer, 'image/jpeg')
+
+                    # Create the URL for the cropped image
+                    crop_image_url = storage.url(crop_image_filename)
+
+                    # Add the cropped image data to the array
+                    cropped_images.append({
+                        "crop_image_url": crop_image_url,
+                        "crop_class_name": self.names[vehicle["cls"]],  # Get class name from the detected class
+                        "license_plate": vehicle["plates"][-1]["text"],
+                        "crop_timestamp": 0  # Placeholder timestamp
+                    })
+
+            # Write processed image to output
+            cv2.imwrite(output_path, image)
+            blob_name = f"predicted_{filename}"
+            await storage.save_file(blob_name, output_path, 'image/jpeg')
 
         # Clean up temporary files
         os.remove(temp_image_path)
         os.remove(output_path)
 
         # Return URL of the uploaded image and cropped images
-        image_url = f"https://{settings.AZURE_ACCOUNT_NAME}.blob.core.windows.net/{settings.AZURE_CONTAINER_NAME}/{blob_name}"
+        image_url = storage.url(blob_name)
         return {
             "predict_url": image_url,
             "cropped_images": cropped_images
         }
 
 
-    async def _predict_video(self, file: UploadFile, container_client) -> dict:
-        # Create a temporary file for the uploaded video
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_video:
-            temp_video.write(await file.read())
-            temp_video_path = temp_video.name
-
-        original_blob_name = file.filename
-        original_blob_client = container_client.get_blob_client(original_blob_name)
-        
-        # Upload original video
-        with open(temp_video_path, "rb") as original_file:
-            video_data_original = io.BytesIO(original_file.read())
-            original_blob_client.upload_blob(video_data_original, overwrite=True, content_settings=ContentSettings(content_type='video/mp4'))
-
+    async def _predict_video(self, temp_video_path: str, filename: str, storage, progress=None) -> dict:
+        # The original video was stored while it was uploaded (enqueue_upload)
         # Read video and set up for output
-        cap = cv2.VideoCapture(temp_video_path)
+        cap = GrowingCapture(temp_video_path)  # resumable uploads can still be arriving
         assert cap.isOpened(), "Error reading video file"
-        output_path = os.path.join(tempfile.gettempdir(), "processed_video.mp4")
+        output_path = predicted_path(temp_video_path, ".mp4")
         fourcc = cv2.VideoWriter_fourcc(*'avc1')
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         fps = cap.get(cv2.CAP_PROP_FPS)
         out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
 
-        cropped_images = []
-        # Process each frame
-        while cap.isOpened():
-            success, im0 = cap.read()
-            if not success:
-                break
-
-            # Detect objects in the frame
-            results = self.model.predict(im0, show=False)
-            boxes = results[0].boxes.xyxy.cpu().tolist()
-            clss = results[0].boxes.cls.cpu().tolist()
-            confs = results[0].boxes.conf.cpu().tolist()
-            annotator = Annotator(im0, line_width=2, example=self.names)
+        # The frame loop runs on a thread so the event loop is free to upload crops while inference continues
+        loop = asyncio.get_running_loop()
 
-            # Draw bounding boxes only for allowed classes
-            if boxes is not None:
-                for box, cls, conf in zip(boxes, clss, confs):
-                    if conf >= 0.6:
-                        # annotator.box_label(box, color=colors(int(cls), True), label=self.names[int(cls)])
-                        annotator.box_label(box, label=self.names[int(cls)], color=colors(int(cls), True))
-
-                    
-                        # Crop the vehicle area and run license plate detection
-                        x1, y1, x2, y2 = map(int, box)
-                        vehicle_crop = im0[y1:y2, x1:x2]
-
-                        # Detect license plates within the vehicle area
-                        lp_results = self.lp_model.predict(vehicle_crop, show=False)
-                        lp_boxes = lp_results[0].boxes.xyxy.cpu().tolist()
-
-                        if conf >= 0.75:
-                            # Annotate detected license plates on the original frame
-                            if lp_boxes:  # Only proceed if license plates are detected
-                                for lp_box in lp_boxes:
-                                    lp_x1, lp_y1, lp_x2, lp_y2 = map(int, lp_box)
-
-                                    lp_crop = vehicle_crop[lp_y1:lp_y2, lp_x1:lp_x2]
-                                    lp_crop_gray = cv2.cvtColor(lp_crop, cv2.COLOR_BGR2GRAY)
-
-                                    # Perform OCR on the license plate crop
-                                    # detections = self.ocr_reader.readtext(lp_crop_thresh)
-                                    ocr_result = self.ocr_reader.readtext(lp_crop_gray)
-                                    if len(ocr_result) >= 2:
-                                        combined_license_plate_text = " ".join(item[1] for item in ocr_result[:2])
-                                    else:
-                                        combined_license_plate_text = " ".join(item[1] for item in ocr_result)
-
-                                    annotator.box_label(
-                                        (x1 + lp_x1, y1 + lp_y1, x1 + lp_x2, y1 + lp_y2),
-                                        color=(0, 255, 0),
-                                        label="License Plate"
-                                    )
-
-
-                                    # Save cropped vehicle image to Azure Blob if license plates are detected
-                                    crop_image = im0[y1:y2, x1:x2]
-
-                                    crop_folder_name = f"crop_{file.filename}"
-                                    crop_image_filename = f"{crop_folder_name}/crop_{file.filename}_{len(cropped_images) + 1}.jpg"  # Generate a unique filename
-
-                                    # Upload the cropped image to Azure Blob Storage
-                                    crop_blob_client = container_client.get_blob_client(crop_image_filename)
-                                    _, buffer = cv2.imencode('.jpg', crop_image)  # Encode image to JPEG format
-                                    crop_blob_client.upload_blob(io.BytesIO(buffer), overwrite=True, content_settings=ContentSettings(content_type='image/jpeg'))
-
-                                    # Create the URL for the cropped image
-                                    crop_image_url = f"https://{settings.AZURE_ACCOUNT_NAME}.blob.core.windows.net/{settings.AZURE_CONTAINER_NAME}/{crop_image_filename}"
-
-                                    # Add the cropped image data to the array
-                                    current_frame = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-                                    crop_timestamp = current_frame / fps
-                                    cropped_images.append({
-                                        "crop_image_url": crop_image_url,
-                                        "crop_class_name": self.names[int(cls)],  # Get class name from the detected class
-                                        "license_plate": combined_license_plate_text,  # Extracted license plate text
-                                        "crop_timestamp": round(crop_timestamp, 2)  # Current frame number
-                                    })
+        def report(fraction: float):
+            if progress is not None:
+                asyncio.run_coroutine_threadsafe(progress(fraction), loop)
 
-            # Write processed frame to output
-            out.write(im0)
+        async with BlobWriter(storage, settings.BLOB_UPLOAD_CONCURRENCY) as blob_writer:
+            cropped_images = await asyncio.to_thread(
+                self._process_video, cap, out, filename, fps, storage, blob_writer.put_threadsafe, report
+            )
 
         # Release resources
         cap.release()
         out.release()
 
-        # Upload processed video
-        blob_name = f"predicted_{file.filename}"
-        blob_client = container_client.get_blob_client(blob_name)
-        with open(output_path, "rb") as output_file:
-            video_data_predicted = io.BytesIO(output_file.read())
-            blob_client.upload_blob(video_data_predicted, overwrite=True, content_settings=ContentSettings(content_type='video/mp4'))
+        # Upload processed video, read from disk block by block
+        blob_name = f"predicted_{filename}"
+        await storage.save_file(blob_name, output_path, 'video/mp4')
 
         # Clean up temporary files
         os.remove(temp_video_path)
         os.remove(output_path)
 
         # Return URL of the uploaded video
-        video_url = f"https://{settings.AZURE_ACCOUNT_NAME}.blob.core.windows.net/{settings.AZURE_CONTAINER_NAME}/{blob_name}"
+        video_url = storage.url(blob_name)
         return {
             "predict_url": video_url,
             "cropped_images": cropped_images
         }
-    
+
+    def _process_video(self, cap, out, filename: str, fps: float, storage, upload_crop, report) -> list:
+        # Blocking frame loop of _predict_video, upload_crop(name, data, content_type) queues a crop upload
+        from ultralytics.utils.plotting import Annotator
+
+        ocr_scope = uuid.uuid4().hex  # track ids of this run, for the OCR cache
+        cropped_images = []
+
+        def write_frame(frame_index: int, im0, vehicles: list):
+            # Runs on the encoder thread of the pipeline, in frame order
+            annotator = Annotator(im0, line_width=2, example=self.names)
+
+            for vehicle in vehicles:
+                self._annotate_vehicle(annotator, vehicle)
+
+                # Save the cropped vehicle image to storage, once per track
+                if "crop_image_filename" in vehicle:
+                    x1, y1, x2, y2 = vehicle["box"]
+                    crop_image = im0[y1:y2, x1:x2]
+
+                    # Queue the cropped image for upload to storage
+                    _, buffer = cv2.imencode('.jpg', crop_image)  # Encode image to JPEG format
+                    upload_crop(vehicle["crop_image_filename"], buffer, 'image/jpeg')
+
+            # Write processed frame to output
+            out.write(im0)
+
+        sampler = FrameSampler(
+            mode=settings.VIDEO_SAMPLING_MODE,
+            stride=settings.VIDEO_SAMPLING_STRIDE,
+            motion_threshold=settings.VIDEO_MOTION_THRESHOLD,
+            keyframe_threshold=settings.VIDEO_KEYFRAME_THRESHOLD,
+            max_skip=settings.VIDEO_MAX_SKIP
+        )
+        tracker = Tracker()
+        last_vehicles = []
+
+        # Decoding and annotating/encoding run on their own threads while this one runs inference
+        with VideoPipeline(cap, write_frame) as pipeline:
+            for frame_index, im0 in pipeline.frames():
+                # Report progress to the job every PROGRESS_EVERY frames, once the total is known
+                # (0 while a resumable upload is still arriving) and never past 1.0 (the container's
+                # count is a header value, not always exact)
+                frame_count = frame_index + 1
+                if frame_count % PROGRESS_EVERY == 0:
+                    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                    if total_frames:
+                        report(min(frame_count / total_frames, 1.0))
+
+                # Detect vehicles in the sampled frames, skipped frames reuse the boxes of the last inferred one
+                if not sampler.should_infer(im0):
+                    pipeline.submit(frame_index, im0, propagate(last_vehicles))
+                    continue
+
+                vehicles = last_vehicles = self._detect_vehicles(im0)
+                track_ids = tracker.update([vehicle["box"] for vehicle in vehicles])
+                for vehicle, track_id in zip(vehicles, track_ids):
+                    vehicle["track_id"] = track_id
+
+                # Plate detection and OCR only for tracks whose plate text is not settled yet
+                pending = [
+                    vehicle for vehicle in vehicles
+                    if vehicle["conf"] >= 0.75 and needs_ocr(tracker.data[vehicle["track_id"]])
+                ]
+                self._read_plates(im0, pending, scope=ocr_scope)
+
+                for vehicle in pending:
+                    track = tracker.data[vehicle["track_id"]]
+                    consensus = add_readings(track, vehicle["plates"])
+                    if not vehicle["plates"]:
+                        continue
+                    license_plate = consensus.text
+
+                    if "crop" in track:
+                        # Already saved, later readings only refine the voted text
+                        track["crop"]["license_plate"] = license_plate
+                        continue
+
+                    crop_folder_name = f"crop_{filename}"
+                    crop_image_filename = f"{crop_folder_name}/crop_{filename}_{len(cropped_images) + 1}.jpg"  # Generate a unique filename
+                    vehicle["crop_image_filename"] = crop_image_filename
+
+                    # Add the cropped image data to the array
+                    crop_timestamp = (frame_index + 1) / fps
+                    track["crop"] = {
+                        "crop_image_url": storage.url(crop_image_filename),
+                        "crop_class_name": self.names[vehicle["cls"]],  # Get class name from the detected class
+                        "license_plate": license_plate,  # Extracted license plate text
+                        "crop_timestamp": round(crop_timestamp, 2)  # Current frame number
+                    }
+                    cropped_images.append(track["crop"])
+
+                # Plate box relative to its vehicle (like the webcam), so it stays drawn once the track is
+                # settled and on the skipped frames, not only on the frames that ran OCR
+                for vehicle in vehicles:
+                    track = tracker.data[vehicle["track_id"]]
+                    x1, y1 = vehicle["box"][:2]
+                    if vehicle["plates"]:
+                        lp_x1, lp_y1, lp_x2, lp_y2 = vehicle["plates"][-1]["box"]
+                        track["plate_box"] = (lp_x1 - x1, lp_y1 - y1, lp_x2 - x1, lp_y2 - y1)
+                    elif "plate_box" in track:
+                        lp_x1, lp_y1, lp_x2, lp_y2 = track["plate_box"]
+                        vehicle["plates"] = [{"box": (x1 + lp_x1, y1 + lp_y1, x1 + lp_x2, y1 + lp_y2)}]
+
+                pipeline.submit(frame_index, im0, vehicles)
+
+        return cropped_images
@@ -0,0 +1,107 @@
+from sqlalchemy import exists, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import get_settings
+from app.models.cropped_image import CroppedImage
+from app.models.upload import UploadFile as UploadFileModel
+from app.services.plates import plate_columns
+
+settings = get_settings()
+
+CROP_COLUMNS = (
+    "upload_id", "crop_image_url", "crop_class_name", "license_plate", "license_plate_normalized",
+    "plate_prefix", "plate_number", "plate_province", "crop_timestamp"
+)
+
+
+async def save_upload(session: AsyncSession, upload: dict, crops: list) -> tuple:
+    """Insert an upload and all of its crops in one transaction.
+
+    Returns the inserted upload and crop rows (as dicts, crops in the given order)
+    straight from RETURNING, nothing is read back. Crops go in as one multi-row
+    INSERT ... RETURNING (SQLAlchemy splits it into pages of
+    BULK_INSERT_PAGE_SIZE rows), or with COPY on asyncpg from
+    BULK_COPY_THRESHOLD crops on.
+    """
+    try:
+        result = await session.execute(
+            insert(UploadFileModel).values(**upload).returning(
+                UploadFileModel.id, UploadFileModel.upload_name, UploadFileModel.upload_url,
+                UploadFileModel.obj_detect_url, UploadFileModel.upload_type,
+            )
+        )
+        upload_row = dict(result.one()._mapping)
+
+        rows = [
+            {
+                "upload_id": upload_row["id"],
+                "crop_image_url": crop["crop_image_url"],
+                "crop_class_name": crop["crop_class_name"],
+                "license_plate": crop["license_plate"],
+                **plate_columns(crop["license_plate"]),
+                "crop_timestamp": round(crop["crop_timestamp"], 2),  # ปัดให้เป็น 2 ตำแหน่งทศนิยม
+            }
+            for crop in crops
+        ]
+        if len(rows) >= settings.BULK_COPY_THRESHOLD and session.bind.dialect.driver == "asyncpg":
+            crop_rows = await _copy_crops(session, rows)
+        else:
+            crop_rows = await _insert_crops(session, rows)
+
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+
+    return upload_row, crop_rows
+
+
+async def _insert_crops(session: AsyncSession, rows: list) -> list:
+    if not rows:
+        return []
+    # executemany + RETURNING is sent as multi-row INSERT ... VALUES (...), (...) RETURNING pages,
+    # sort_by_parameter_order keeps the returned ids in the order of rows
+    result = await session.execute(
+        insert(CroppedImage).returning(CroppedImage.id, sort_by_parameter_order=True).execution_options(
+            insertmanyvalues_page_size=settings.BULK_INSERT_PAGE_SIZE
+        ),
+        rows,
+    )
+    return [{"id": crop_id, **row} for crop_id, row in zip(result.scalars().all(), rows)]
+
+
+async def _copy_crops(session: AsyncSession, rows: list) -> list:
+    # COPY returns nothing, so the ids are taken from the sequence first and copied in with the rows
+    table = CroppedImage.__table__
+    ids = (await session.execute(
+        text("SELECT nextval(pg_get_serial_sequence(:table, 'id')) FROM generate_series(1, :count)"),
+        {"table": table.name, "count": len(rows)},
+    )).scalars().all()
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        table.name,
+        records=[(crop_id, *(row[column] for column in CROP_COLUMNS)) for crop_id, row in zip(ids, rows)],
+        columns=["id", *CROP_COLUMNS],
+    )
+    return [{"id": crop_id, **row} for crop_id, row in zip(ids, rows)]
+
+
+def upload_names(name: str) -> set:
+    # Upload names a stored file may belong to: the upload itself, predicted_<upload> or crop_<upload>/...
+    names = {name}
+    if name.startswith("predicted_"):
+        names.add(name[len("predicted_"):])
+    folder, _, _ = name.partition("/")
+    if folder.startswith("crop_"):
+        names.add(folder[len("crop_"):])
+    return names
+
+
+async def owns_file(session: AsyncSession, user_id: int, name: str) -> bool:
+    # Whether one of the user's uploads produced the stored file (served by the user_id index)
+    return await session.scalar(select(exists().where(
+        UploadFileModel.user_id == user_id,
+        UploadFileModel.upload_name.in_(upload_names(name)),
+    )))
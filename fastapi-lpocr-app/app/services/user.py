@@ -16,8 +16,9 @@ from app.models.user import (
     Roles)
 from app.schemas.user import LoginUserRequest, LoginUserResponse, RegisterUserRequest
 from sqlalchemy.future import select
-from sqlalchemy import func, update
+from sqlalchemy import delete, func, update
 from app.services.email import send_account_verification_email, send_password_reset_email
+from app.services.principals import invalidate_principal
 
 REFRESH_TOKEN_EXPIRY = 2 
 async def get_user_by_email(db: AsyncSession, email: str):
@@ -99,6 +100,7 @@ async def verify_email(token: str, db: AsyncSession):
     
     await db.execute(stmt_roles)
     await db.commit()
+    invalidate_principal(user.id)
 
     return user
 
@@ -194,4 +196,23 @@ async def update_user_password(db: AsyncSession, user_id: int, new_password: str
         # Hash the new password
         user.password = hash_password(new_password) 
         db.add(user)
-        await db.commit()
\ No newline at end of file
+        await db.commit()
+    invalidate_principal(user_id)
+
+
+async def update_user_role(db: AsyncSession, user_id: int, role_name: str):
+    role = await db.scalar(select(Roles).where(Roles.role_name == role_name))
+    if role is None:
+        raise HTTPException(status_code=400, detail=f"Unknown role {role_name!r}")
+
+    user = await db.scalar(select(Users).where(Users.id == user_id))
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # A user has one role (get_rolename_by_usersroles), replace it
+    await db.execute(delete(UsersRoles).where(UsersRoles.user_id == user_id))
+    db.add(UsersRoles(user_id=user_id, role_id=role.id))
+    await db.commit()
+    invalidate_principal(user_id)
+
+    return role.role_name
\ No newline at end of file
@@ -0,0 +1,41 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import engine
+from app.init_db import add_default_roles, create_tables
+from app.models.cropped_image import CroppedImage
+from app.models.upload import UploadFile
+
+# Columns added after the first release, create_all does not add them to existing tables
+ADDED_COLUMNS = [
+    "ALTER TABLE cropped_image ADD COLUMN IF NOT EXISTS license_plate_normalized VARCHAR",
+    "ALTER TABLE cropped_image ADD COLUMN IF NOT EXISTS plate_prefix VARCHAR",
+    "ALTER TABLE cropped_image ADD COLUMN IF NOT EXISTS plate_number VARCHAR",
+    "ALTER TABLE cropped_image ADD COLUMN IF NOT EXISTS plate_province VARCHAR",
+]
+
+
+async def upgrade_db():
+    # Bring a database created by an older version up to the models: missing extension, tables,
+    # columns, indexes and default roles are added, nothing is dropped or truncated, safe to rerun.
+    # Existing rows get the normalized/parsed plate columns from python -m app.backfill_plates
+    async with engine.begin() as conn:
+        await create_tables(conn)
+        for statement in ADDED_COLUMNS:
+            await conn.execute(text(statement))
+        # create_all only adds indexes together with a new table, add the ones missing on existing tables
+        await conn.run_sync(
+            lambda sync_conn: [
+                index.create(sync_conn, checkfirst=True)
+                for table in (UploadFile.__table__, CroppedImage.__table__) for index in table.indexes
+            ]
+        )
+
+    async with AsyncSession(engine) as session:
+        async with session.begin():
+            added = await add_default_roles(session)
+    print("Database upgraded" + (f", default roles added: {', '.join(added)}" if added else ""))
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(upgrade_db())
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+
+async def run_worker():
+    # Imported here so every worker process loads its own copy of the models once, up front
+    from app.config.database import SessionLocal
+    from app.config.model_registry import model_registry
+    from app.services.jobs import HEARTBEAT_INTERVAL, ack_job, heartbeat_job, next_job, requeue_stale_jobs, update_job
+    from app.services.resumable import discard_spool, sweep_expired_sessions
+    from app.services.upload import UploadFileService
+
+    model_registry.warm_up(["vehicle", "license_plate", "plate_ocr"])
+    upload_service = UploadFileService()
+    logging.info(f"inference worker {os.getpid()} ready: {model_registry.stats()}")
+
+    async def heartbeat(job_id: str):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await heartbeat_job(job_id)
+
+    async def requeue_stale():
+        # Put the jobs of dead workers back in the queue, on a timer so it also happens while every worker is busy
+        while True:
+            try:
+                for failed in await requeue_stale_jobs(settings.JOB_STALE_SECONDS):
+                    discard_spool(failed["path"])
+            except Exception as e:
+                logging.exception(e)
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    requeuer = asyncio.create_task(requeue_stale())
+    while True:
+        job = await next_job()
+        if job is None:
+            # Idle: drop abandoned uploads
+            await sweep_expired_sessions()
+            continue
+
+        job_id, payload = job
+        heartbeats = asyncio.create_task(heartbeat(job_id))
+
+        async def progress(fraction: float):
+            await update_job(job_id, progress=round(fraction, 3))
+
+        try:
+            async with SessionLocal() as session:
+                result = await upload_service.process_upload(
+                    session,
+                    payload["path"],
+                    payload["filename"],
+                    payload["upload_type"],
+                    payload["user_id"],
+                    progress=progress
+                )
+            await update_job(job_id, status="finished", progress=1, result=result)
+        except Exception as e:
+            logging.exception(e)
+            await update_job(job_id, status="failed", error=str(e))
+        finally:
+            heartbeats.cancel()
+            await ack_job(job_id)
+            # A failed job leaves its spool file and processing output behind, a failed resumable upload
+            # also its marker and parked chunks, the session is over
+            discard_spool(payload["path"])
+
+
+def _worker_main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    asyncio.run(run_worker())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run inference workers for /api/vehicle/upload jobs")
+    parser.add_argument("--workers", type=int, default=settings.INFERENCE_WORKERS)
+    args = parser.parse_args()
+
+    # spawn instead of fork: torch and the CUDA runtime are not fork-safe
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=_worker_main, daemon=True) for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
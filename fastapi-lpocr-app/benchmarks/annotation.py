@@ -0,0 +1,63 @@
+# Webcam annotation cost against the number of plates in the frame:
+# full-frame PIL round-trip + font load per plate (before) vs. cached font and label patches (draw_texts).
+#
+# run from fastapi-lpocr-app/ (app/angsana.ttc by default, any TrueType font works):
+#   python -m benchmarks.annotation --font /usr/share/fonts/truetype/dejavu/DejaVuSans.ttf
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.services.annotate import PLATE_FONT, draw_texts, get_font
+
+
+def per_plate_round_trip(frame, labels: list, font_path: str):
+    # What predict_frame did for every plate
+    from PIL import Image, ImageDraw, ImageFont
+
+    for x, y, text in labels:
+        frame_pil = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        draw = ImageDraw.Draw(frame_pil)
+        font = ImageFont.truetype(font_path, 20)
+        for offset in [(1, 1), (-1, 1), (1, -1), (-1, -1)]:
+            draw.text((x + offset[0], y + offset[1]), text, font=font, fill=(0, 0, 0))
+        draw.text((x, y), text, font=font, fill=(255, 0, 0))
+        frame = cv2.cvtColor(np.array(frame_pil), cv2.COLOR_RGB2BGR)
+    return frame
+
+
+def timeit(fn, repeat: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--font", default=PLATE_FONT)
+    parser.add_argument("--plates", type=int, nargs="+", default=[0, 1, 2, 4, 8, 16])
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (args.height, args.width, 3), np.uint8)
+    font = get_font(args.font, 20)
+
+    print(f"{'plates':>6} {'round-trip ms':>14} {'patches ms':>11} {'speedup':>8}")
+    for count in args.plates:
+        labels = [
+            (int(rng.integers(0, args.width - 200)), int(rng.integers(20, args.height - 20)), "License Plate: กข 1234")
+            for _ in range(count)
+        ]
+        before = timeit(lambda: per_plate_round_trip(frame.copy(), labels, args.font), args.repeat)
+        after = timeit(lambda: draw_texts(frame.copy(), labels, font), args.repeat)
+        print(f"{count:>6} {before:>14.2f} {after:>11.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Auth cost of one protected request like GET /api/vehicle/user/uploads (a route bearer, get_current_user
+# and a RoleChecker): the old chain (two bearers decoding the JWT twice each, a blocklist GET per bearer,
+# user and role queried separately) against the current dependencies with a cold and a warm principal cache.
+#
+# Needs the Postgres of SQLALCHEMY_DATABASE_URL (with the roles of app.init_db) and the Redis of
+# REDIS_HOST. A throwaway verified member is created for the run and deleted afterwards. Run from
+# fastapi-lpocr-app/:
+#   python -m benchmarks.auth_overhead --requests 2000
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+from starlette.requests import Request
+
+from app.config.database import SessionLocal
+from app.config.dependencies import AccessTokenBearer, RoleChecker, get_current_user
+from app.config.redis import token_in_blocklist
+from app.config.security import create_access_token, decode_token
+from app.services.principals import invalidate_principal, principal_cache
+from app.services.user import get_rolename_by_usersroles, get_user_by_email
+
+BENCH_USER = "bench-auth"
+
+
+def make_request(token: str) -> Request:
+    # What starlette builds for each request, state included
+    return Request({
+        "type": "http", "method": "GET", "path": "/api/vehicle/user/uploads", "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    })
+
+
+async def old_chain(token: str) -> None:
+    for _ in range(2):  # access_token_bearer of the route and the one of get_current_user
+        token_data = decode_token(token)
+        decode_token(token)  # token_valid
+        await token_in_blocklist(token_data["jti"])
+    async with SessionLocal() as db:
+        user = await get_user_by_email(db, token_data["user"]["email"])
+        role = await get_rolename_by_usersroles(db, user.id)
+    assert user.is_verified and role in ("admin", "member")
+
+
+async def new_chain(token: str) -> None:
+    request = make_request(token)
+    await AccessTokenBearer()(request)
+    token_data = await AccessTokenBearer()(request)
+    async with SessionLocal() as db:
+        user_and_role = await get_current_user(request, token_data, db)
+    RoleChecker(["admin", "member"])(user_and_role)
+
+
+async def timed(chain, token: str, requests: int, before=None) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        if before is not None:
+            before()
+        await chain(token)
+    return (time.perf_counter() - start) / requests * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    async with SessionLocal() as session:
+        user_id = (await session.execute(text(
+            "INSERT INTO users (username, email, password, image_url, is_verified) "
+            "VALUES (:name, :name || '@bench.local', '-', '-', true) RETURNING id"
+        ), {"name": BENCH_USER})).scalar()
+        await session.execute(text("INSERT INTO users_roles (user_id, role_id) VALUES (:id, 0)"), {"id": user_id})
+        await session.commit()
+    token = create_access_token(data={"email": f"{BENCH_USER}@bench.local", "user_uid": str(user_id), "role": "member"})
+
+    try:
+        # Warm up connections
+        await old_chain(token)
+        await new_chain(token)
+
+        print(f"{'chain':>22} {'ms/request':>11}")
+        print(f"{'old':>22} {await timed(old_chain, token, args.requests):>11.3f}")
+        cold = await timed(new_chain, token, args.requests, before=invalidate_principal)
+        print(f"{'principal cache cold':>22} {cold:>11.3f}")
+        principal_cache.hits = principal_cache.misses = 0
+        warm = await timed(new_chain, token, args.requests)
+        print(f"{'principal cache warm':>22} {warm:>11.3f}")
+        print(f"\nwarm run: {principal_cache.stats()}")
+    finally:
+        async with SessionLocal() as session:
+            await session.execute(text("DELETE FROM users_roles WHERE user_id = :id"), {"id": user_id})
+            await session.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+            await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+# Crop upload time: one awaited upload after another vs. the BlobWriter with bounded concurrency.
+#
+# run from fastapi-lpocr-app/, against an in-process fake storage with a simulated round-trip:
+#   python -m benchmarks.blob_writer --crops 200 --latency 0.05
+# against the local disk backend:
+#   python -m benchmarks.blob_writer --backend local
+# or against Azurite (docker run -p 10000:10000 mcr.microsoft.com/azure-storage/azurite azurite-blob --blobHost 0.0.0.0):
+#   AZURE_CONNECTION_STRING="UseDevelopmentStorage=true" python -m benchmarks.blob_writer --backend azure
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+
+from app.config.storage import AzureStorage, LocalStorage
+from app.services.blob_writer import BlobWriter
+
+
+class FakeStorage:
+    # Stands in for a storage backend, every upload takes `latency` seconds
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.files = {}
+
+    async def save(self, name, data, content_type):
+        await asyncio.sleep(self.latency)
+        self.files[name] = data
+
+
+async def upload_serial(storage, crops: list):
+    for name, data in crops:
+        await storage.save(name, data, "image/jpeg")
+
+
+async def upload_concurrent(storage, crops: list, concurrency: int):
+    async with BlobWriter(storage, concurrency) as blob_writer:
+        for name, data in crops:
+            await blob_writer.put(name, data, "image/jpeg")
+    return blob_writer.uploaded
+
+
+async def run(args):
+    if args.backend == "azure":
+        storage = AzureStorage("benchmark")
+        if not await storage.container_client.exists():
+            await storage.container_client.create_container()
+    elif args.backend == "local":
+        storage = LocalStorage("benchmark", root=tempfile.mkdtemp())
+    else:
+        storage = FakeStorage(args.latency)
+
+    # Same type cv2.imencode returns
+    rng = np.random.default_rng(0)
+    crops = [(f"crop_benchmark/crop_{i}.jpg", rng.integers(0, 255, args.size, np.uint8)) for i in range(args.crops)]
+
+    start = time.perf_counter()
+    await upload_serial(storage, crops)
+    serial = time.perf_counter() - start
+    print(f"serial: {serial:.2f}s ({args.crops / serial:.0f} crops/s)")
+
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        uploaded = await upload_concurrent(storage, crops, concurrency)
+        elapsed = time.perf_counter() - start
+        print(f"BlobWriter x{concurrency}: {elapsed:.2f}s ({uploaded / elapsed:.0f} crops/s, {serial / elapsed:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--crops", type=int, default=200)
+    parser.add_argument("--size", type=int, default=30_000, help="bytes per crop, about one JPEG vehicle crop")
+    parser.add_argument("--latency", type=float, default=0.05, help="round-trip of the fake storage in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--backend", choices=["fake", "local", "azure"], default="fake",
+                        help="azure uses AZURE_CONNECTION_STRING, e.g. UseDevelopmentStorage=true for Azurite")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
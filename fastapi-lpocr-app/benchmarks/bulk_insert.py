@@ -0,0 +1,110 @@
+# Time to store an upload with 10 / 1k / 50k crops: add + commit + refresh + add per crop + commit
+# + re-select (before) against save_upload with INSERT ... RETURNING and with COPY.
+#
+# Needs the Postgres of SQLALCHEMY_DATABASE_URL (tables created by app.init_db). Rows are written
+# under a throwaway user and deleted again. Run from fastapi-lpocr-app/:
+#   python -m benchmarks.bulk_insert --crops 10 1000 50000
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, select
+
+from app.config.database import SessionLocal
+from app.config.settings import get_settings
+from app.models import CroppedImage, UploadFile, Users
+from app.services.upload_records import save_upload
+
+settings = get_settings()
+
+
+def make_crops(count: int) -> list:
+    return [
+        {
+            "crop_image_url": f"https://example.com/crops/crop_{i}.jpg",
+            "crop_class_name": "car",
+            "license_plate": f"กข {i % 10000:04d}",
+            "crop_timestamp": i / 25,
+        }
+        for i in range(count)
+    ]
+
+
+def make_upload(user_id: int) -> dict:
+    return {
+        "user_id": user_id,
+        "upload_name": "bench.mp4",
+        "upload_url": "https://example.com/bench.mp4",
+        "obj_detect_url": "https://example.com/bench_result.mp4",
+        "upload_type": "video",
+    }
+
+
+async def save_one_by_one(session, upload: dict, crops: list) -> list:
+    # What process_upload did before save_upload
+    db_file = UploadFile(**upload)
+    session.add(db_file)
+    await session.commit()
+    await session.refresh(db_file)
+
+    for crop in crops:
+        session.add(CroppedImage(upload_id=db_file.id, **{**crop, "crop_timestamp": round(crop["crop_timestamp"], 2)}))
+    await session.commit()
+
+    result = await session.execute(select(CroppedImage).where(CroppedImage.upload_id == db_file.id))
+    return [
+        {
+            "id": cropped_image.id,
+            "upload_id": cropped_image.upload_id,
+            "crop_image_url": cropped_image.crop_image_url,
+            "crop_class_name": cropped_image.crop_class_name,
+            "license_plate": cropped_image.license_plate,
+            "crop_timestamp": cropped_image.crop_timestamp
+        } for cropped_image in result.scalars().all()
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--crops", type=int, nargs="+", default=[10, 1000, 50000])
+    args = parser.parse_args()
+
+    async with SessionLocal() as session:
+        user = Users(username=f"bench-{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex}@bench.local", password="-")
+        session.add(user)
+        await session.commit()
+
+    async def before(session, crops):
+        return await save_one_by_one(session, make_upload(user.id), crops)
+
+    async def insert_returning(session, crops):
+        settings.BULK_COPY_THRESHOLD = len(crops) + 1
+        return (await save_upload(session, make_upload(user.id), crops))[1]
+
+    async def copy(session, crops):
+        settings.BULK_COPY_THRESHOLD = 0
+        return (await save_upload(session, make_upload(user.id), crops))[1]
+
+    try:
+        print(f"{'crops':>6} {'method':>17} {'seconds':>8} {'rows/s':>9}")
+        for count in args.crops:
+            crops = make_crops(count)
+            for name, method in [("add + re-select", before), ("insert returning", insert_returning), ("copy", copy)]:
+                async with SessionLocal() as session:
+                    start = time.perf_counter()
+                    rows = await method(session, crops)
+                    elapsed = time.perf_counter() - start
+                assert len(rows) == count
+                print(f"{count:>6} {name:>17} {elapsed:>8.3f} {count / elapsed:>9.0f}")
+    finally:
+        async with SessionLocal() as session:
+            uploads = select(UploadFile.id).where(UploadFile.user_id == user.id)
+            await session.execute(delete(CroppedImage).where(CroppedImage.upload_id.in_(uploads)))
+            await session.execute(delete(UploadFile).where(UploadFile.user_id == user.id))
+            await session.execute(delete(Users).where(Users.id == user.id))
+            await session.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+# Per-camera achieved FPS and drops of the camera scheduler, for a number of cameras and batch sizes.
+#
+# mp4 files stand in for the IP cameras (played at their own FPS, looped). Run from fastapi-lpocr-app/:
+#   python -m benchmarks.camera_ingest --video clip.mp4 --cameras 1 4 8 --batch-sizes 1 4
+# --simulate replaces the models with a detector that takes `base + per_frame * batch` seconds:
+#   python -m benchmarks.camera_ingest --simulate 0.03 0.01
+import argparse
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from app.services.cameras import CameraReader, CameraScheduler
+
+
+def make_video(path: str, seconds: int = 10, fps: int = 25) -> str:
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (1280, 720))
+    rng = np.random.default_rng(0)
+    for _ in range(seconds * fps):
+        writer.write(rng.integers(0, 255, (720, 1280, 3), np.uint8))
+    writer.release()
+    return path
+
+
+def simulated_infer(base: float, per_frame: float):
+    def infer(camera_ids: list, frames: list) -> list:
+        time.sleep(base + per_frame * len(frames))
+        return [[] for _ in frames]
+    return infer
+
+
+def run(video: str, cameras: int, batch_size: int, policy: str, seconds: float, infer) -> dict:
+    readers = [CameraReader(f"cam{i}", video, loop=True) for i in range(cameras)]
+    scheduler = CameraScheduler(readers, infer, batch_size=batch_size, policy=policy)
+    scheduler.start()
+    time.sleep(seconds)
+    stats = scheduler.stats()
+    scheduler.stop()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", help="mp4 played by every camera (random frames when omitted)")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--policy", choices=["round_robin", "priority"], default="round_robin")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--simulate", type=float, nargs=2, metavar=("BASE", "PER_FRAME"))
+    args = parser.parse_args()
+
+    if args.video:
+        video = args.video
+    else:
+        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as f:
+            video = make_video(f.name)
+    if args.simulate:
+        infer = simulated_infer(*args.simulate)
+    else:
+        from app.config.model_registry import model_registry
+        from app.services.cameras import CameraInference
+        from app.services.upload import UploadFileService
+        model_registry.warm_up(["vehicle", "license_plate", "plate_ocr"])
+        infer = CameraInference(UploadFileService())
+
+    print(f"{'cameras':>7} {'batch':>5} {'read fps/cam':>12} {'processed fps/cam':>17} {'min-max':>11} {'dropped %':>9}")
+    for cameras in args.cameras:
+        for batch_size in args.batch_sizes:
+            stats = list(run(video, cameras, batch_size, args.policy, args.seconds, infer).values())
+            processed = [camera["processed_fps"] for camera in stats]
+            read = sum(camera["frames_read"] for camera in stats)
+            dropped = sum(camera["frames_dropped"] for camera in stats)
+            print(
+                f"{cameras:>7} {batch_size:>5} {np.mean([camera['read_fps'] for camera in stats]):>12.1f} "
+                f"{np.mean(processed):>17.1f} {min(processed):>5.1f}-{max(processed):<5.1f} "
+                f"{dropped / max(read, 1) * 100:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Latency and throughput of the vehicle / license plate detectors per DETECTOR_BACKEND.
+#
+# run from fastapi-lpocr-app/ after python -m app.export_models --int8 --openvino:
+#   python -m benchmarks.detector_backends --backends torch onnx onnx-int8 openvino --threads 4
+import argparse
+import time
+
+import numpy as np
+
+from app.config.model_registry import MODEL_WEIGHTS
+from app.services.detector import load_detector
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--models", nargs="+", default=["vehicle", "license_plate"], choices=list(MODEL_WEIGHTS))
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--batch", type=int, default=8, help="images per call for the throughput run")
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads, 0 = default")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    batch = [rng.integers(0, 255, (240, 320, 3), dtype=np.uint8) for _ in range(args.batch)]
+
+    print(f"{'model':>14} {'backend':>10} {'latency ms':>11} {'throughput img/s':>17}")
+    for name in args.models:
+        for backend in args.backends:
+            detector = load_detector(MODEL_WEIGHTS[name], backend, intra_op_threads=args.threads)
+            detector.detect([image])  # warm-up
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                detector.detect([image])
+            latency = (time.perf_counter() - start) / args.repeat * 1000
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                detector.detect(batch)
+            throughput = args.repeat * args.batch / (time.perf_counter() - start)
+
+            print(f"{name:>14} {backend:>10} {latency:>11.1f} {throughput:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Parity check of the exported detectors against the PyTorch weights.
+# Exits non-zero when a backend disagrees with torch beyond the tolerances.
+#
+# run from fastapi-lpocr-app/ after python -m app.export_models:
+#   python -m benchmarks.detector_parity --images samples/*.jpg --backends onnx onnx-int8
+# (tests/test_detector_parity.py runs the same check under pytest for every export found)
+import argparse
+import sys
+
+import cv2
+import numpy as np
+
+from app.config.model_registry import MODEL_WEIGHTS
+from app.services.detector import load_detector
+from app.services.tracker import iou_matrix
+
+
+def compare(reference, candidate) -> tuple:
+    # (matched boxes, missing/extra boxes, worst IoU of a match, worst conf difference of a match)
+    if not reference.boxes or not candidate.boxes:
+        return 0, abs(len(reference.boxes) - len(candidate.boxes)), 1.0, 0.0
+
+    ious = iou_matrix(np.array(reference.boxes), np.array(candidate.boxes))
+    best = ious.argmax(axis=1)
+    matched = [
+        (i, j) for i, j in enumerate(best)
+        if ious[i, j] >= 0.5 and reference.clss[i] == candidate.clss[j]
+    ]
+    unmatched = len(reference.boxes) + len(candidate.boxes) - 2 * len(matched)
+    worst_iou = min((ious[i, j] for i, j in matched), default=1.0)
+    worst_conf = max((abs(reference.confs[i] - candidate.confs[j]) for i, j in matched), default=0.0)
+    return len(matched), unmatched, worst_iou, worst_conf
+
+
+def check(name: str, backend: str, images: list, min_iou: float = 0.95, max_conf_diff: float = 0.05) -> dict:
+    # One exported detector against the PyTorch weights of the same model over images
+    reference = load_detector(MODEL_WEIGHTS[name], "torch").detect(images)
+    candidate = load_detector(MODEL_WEIGHTS[name], backend).detect(images)
+    results = [compare(r, c) for r, c in zip(reference, candidate)]
+
+    report = {
+        "matched": sum(r[0] for r in results),
+        "unmatched": sum(r[1] for r in results),
+        "worst_iou": min(r[2] for r in results),
+        "worst_conf_diff": max(r[3] for r in results),
+    }
+    report["ok"] = report["unmatched"] == 0 and report["worst_iou"] >= min_iou and report["worst_conf_diff"] <= max_conf_diff
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", nargs="+", required=True)
+    parser.add_argument("--models", nargs="+", default=["vehicle", "license_plate"], choices=list(MODEL_WEIGHTS))
+    parser.add_argument("--backends", nargs="+", default=["onnx"])
+    parser.add_argument("--min-iou", type=float, default=0.95)
+    parser.add_argument("--max-conf-diff", type=float, default=0.05)
+    args = parser.parse_args()
+
+    images = [cv2.imread(path) for path in args.images]
+    failed = False
+
+    for name in args.models:
+        for backend in args.backends:
+            report = check(name, backend, images, args.min_iou, args.max_conf_diff)
+            failed |= not report["ok"]
+
+            print(f"{name:>14} {backend:>10}: {report['matched']} matched, {report['unmatched']} unmatched, "
+                  f"worst IoU {report['worst_iou']:.3f}, worst conf diff {report['worst_conf_diff']:.3f} "
+                  f"-> {'OK' if report['ok'] else 'MISMATCH'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
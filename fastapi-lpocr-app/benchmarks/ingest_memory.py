@@ -0,0 +1,87 @@
+# Peak memory of storing an upload and its result: read whole + BytesIO (before) vs. chunked spool/tee + save_file.
+#
+# Every run happens in its own process so the peak RSS of one does not hide the next one.
+# run from fastapi-lpocr-app/ (local storage backend in a temp dir unless --backend azure):
+#   python -m benchmarks.ingest_memory --sizes 64 256 1024
+import argparse
+import asyncio
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from app.config.storage import AzureStorage, LocalStorage
+from app.services.upload import spool_upload
+
+
+class AsyncFile:
+    # Just the part of fastapi.UploadFile that spool_upload uses
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+
+    async def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+async def buffered(storage, source: str, work_dir: str):
+    # What the predict paths did: whole upload in memory, then the temp file read back into a BytesIO twice
+    file = AsyncFile(source)
+    temp_path = os.path.join(work_dir, "upload.mp4")
+    with open(temp_path, "wb") as temp:
+        temp.write(await file.read())
+    with open(temp_path, "rb") as original_file:
+        await storage.save("original.mp4", io.BytesIO(original_file.read()), "video/mp4")
+    with open(temp_path, "rb") as output_file:
+        await storage.save("predicted.mp4", io.BytesIO(output_file.read()), "video/mp4")
+
+
+async def streamed(storage, source: str, work_dir: str):
+    spool_path = os.path.join(work_dir, "upload.mp4")
+    await spool_upload(AsyncFile(source), spool_path, storage.open_writer("original.mp4", "video/mp4"))
+    await storage.save_file("predicted.mp4", spool_path, "video/mp4")
+
+
+def child(mode: str, source: str, backend: str):
+    with tempfile.TemporaryDirectory() as work_dir:
+        storage = AzureStorage("benchmark") if backend == "azure" else LocalStorage("benchmark", root=work_dir)
+        baseline = peak_rss_mb()
+        asyncio.run({"buffered": buffered, "streamed": streamed}[mode](storage, source, work_dir))
+        print(f"{peak_rss_mb() - baseline:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 256, 1024], help="upload sizes in MB")
+    parser.add_argument("--backend", choices=["local", "azure"], default="local")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "SOURCE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.backend)
+        return
+
+    print(f"{'size MB':>8} {'buffered peak MB':>17} {'streamed peak MB':>17}")
+    for size in args.sizes:
+        with tempfile.NamedTemporaryFile(suffix=".mp4") as source:
+            for _ in range(size):
+                source.write(os.urandom(1024 * 1024))
+            source.flush()
+
+            peaks = [
+                subprocess.check_output([
+                    sys.executable, "-m", "benchmarks.ingest_memory",
+                    "--backend", args.backend, "--child", mode, source.name
+                ]).decode().strip().splitlines()[-1]
+                for mode in ("buffered", "streamed")
+            ]
+        print(f"{size:>8} {float(peaks[0]):>17.1f} {float(peaks[1]):>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
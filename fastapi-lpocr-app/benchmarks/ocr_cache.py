@@ -0,0 +1,107 @@
+# Hit rate and OCR time saved by the plate OCR cache on a synthetic stream: vehicles that stand still
+# (gate, traffic light) and vehicles that drive through, several plates per frame.
+#
+# run from fastapi-lpocr-app/, with a fake engine taking --ocr-ms per plate or a real OCR_BACKEND:
+#   python -m benchmarks.ocr_cache --max-distance 0 5 10 15
+#   python -m benchmarks.ocr_cache --backend easyocr
+#   python -m benchmarks.ocr_cache --unscoped  # what a cache shared by all tracks would get wrong
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.services.ocr_cache import PlateOCRCache
+
+
+class FakeOCR:
+    # Recognizes the plate number drawn by make_plate from its id pixel, sleeps like a real engine
+    def __init__(self, ocr_ms: float):
+        self.ocr_ms = ocr_ms
+        self.plates = 0
+
+    def read_plate_texts(self, plate_crops_gray: list) -> list:
+        self.plates += len(plate_crops_gray)
+        time.sleep(self.ocr_ms / 1000 * len(plate_crops_gray))
+        return [(f"plate {int(crop[0, 0])}", 0.9) for crop in plate_crops_gray]
+
+
+class CountingOCR:
+    def __init__(self, engine):
+        self.engine = engine
+        self.plates = 0
+
+    def read_plate_texts(self, plate_crops_gray: list) -> list:
+        self.plates += len(plate_crops_gray)
+        return self.engine.read_plate_texts(plate_crops_gray)
+
+
+def make_plate(number: int) -> np.ndarray:
+    plate = np.full((72, 160), 235, np.uint8)
+    cv2.putText(plate, f"{number // 10000:02d} {number % 10000:04d}", (12, 32), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 20, 2)
+    cv2.putText(plate, "BANGKOK", (28, 62), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 20, 2)
+    plate[0, 0] = number % 256  # lets FakeOCR "read" it
+    return plate
+
+
+def observe(plate: np.ndarray, rng, moving: bool) -> np.ndarray:
+    # The plate as the detector crops it in one frame: sensor noise, small box jitter, and scale
+    # and position changes when the vehicle moves
+    height, width = plate.shape
+    shift, scale = (3.0, 0.06) if moving else (0.5, 0.01)
+    matrix = np.float32([
+        [1 + rng.uniform(-scale, scale), 0, rng.uniform(-shift, shift)],
+        [0, 1 + rng.uniform(-scale, scale), rng.uniform(-shift, shift)],
+    ])
+    crop = cv2.warpAffine(plate, matrix, (width, height), borderValue=235).astype(np.float32)
+    crop = np.clip(crop * rng.uniform(0.9, 1.05) + rng.normal(0, 3, crop.shape), 0, 255).astype(np.uint8)
+    crop = cv2.resize(crop, (width + int(rng.integers(-3, 4)), height + int(rng.integers(-2, 3))))
+    crop[0, 0] = plate[0, 0]
+    return crop
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", help="real OCR_BACKEND instead of the fake engine")
+    parser.add_argument("--ocr-ms", type=float, default=15, help="per plate time of the fake engine")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--vehicles", type=int, default=4, help="vehicles in every frame")
+    parser.add_argument("--moving", type=float, default=0.5, help="share of vehicles that drive")
+    parser.add_argument("--track-frames", type=int, default=60, help="frames a vehicle stays in view")
+    parser.add_argument("--max-distance", type=int, nargs="+", default=[0, 5, 10, 15])
+    parser.add_argument("--unscoped", action="store_true", help="one scope for all tracks, shows the wrong matches")
+    args = parser.parse_args()
+
+    print(f"{'max dist':>8} {'plates':>7} {'OCR':>6} {'hit %':>6} {'wrong':>6} {'ms/frame':>9}")
+    for max_distance in [None] + args.max_distance:
+        rng = np.random.default_rng(0)
+        if args.backend:
+            from app.services.ocr import load_plate_ocr
+            engine = CountingOCR(load_plate_ocr(args.backend))
+        else:
+            engine = FakeOCR(args.ocr_ms)
+        cache = PlateOCRCache(engine, max_size=0 if max_distance is None else 1024, max_distance=max_distance or 0)
+        truth = PlateOCRCache(FakeOCR(0), max_size=0)
+
+        # Neighbouring plate numbers (differ by one digit) on purpose
+        plates, wrong, start = 0, 0, time.perf_counter()
+        for frame in range(args.frames):
+            crops, scopes = [], []
+            for slot in range(args.vehicles):
+                track_id = (frame // args.track_frames) * args.vehicles + slot
+                moving = slot < args.vehicles * args.moving
+                crops.append(observe(make_plate(120000 + track_id), rng, moving))
+                scopes.append(("stream", None if args.unscoped else track_id))
+            texts = cache.read_plate_texts(crops, scopes)
+            if not args.backend:
+                wrong += sum(text != expected for (text, _), (expected, _) in zip(texts, truth.read_plate_texts(crops)))
+            plates += len(crops)
+        elapsed = (time.perf_counter() - start) / args.frames * 1000
+
+        label = "off" if max_distance is None else max_distance
+        hit_rate = cache.stats()["hit_rate"] * 100
+        print(f"{label:>8} {plates:>7} {engine.plates:>6} {hit_rate:>6.1f} {wrong:>6} {elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
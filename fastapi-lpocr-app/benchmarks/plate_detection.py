@@ -0,0 +1,58 @@
+# Per-frame latency of the license plate stage against the number of vehicles in the frame.
+#
+# run from fastapi-lpocr-app/ (model weights are loaded from app/model_weights):
+#   python -m benchmarks.plate_detection --image some_car.jpg --vehicles 1 2 4 8 12 16
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.services.upload import UploadFileService
+
+
+def make_crops(image, count: int) -> list:
+    # Random vehicle sized crops so every crop in the batch has a different shape
+    rng = np.random.default_rng(0)
+    height, width = image.shape[:2]
+    crops = []
+    for _ in range(count):
+        w = int(rng.integers(width // 4, width // 2))
+        h = int(rng.integers(height // 4, height // 2))
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        crops.append(image[y:y + h, x:x + w])
+    return crops
+
+
+def timeit(fn, repeat: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", help="frame to crop vehicles from (random noise when omitted)")
+    parser.add_argument("--vehicles", type=int, nargs="+", default=[1, 2, 4, 8, 12, 16])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image) if args.image else np.random.randint(0, 255, (720, 1280, 3), np.uint8)
+    service = UploadFileService()
+
+    def sequential(crops):
+        return [service.lp_model.detect([crop]) for crop in crops]
+
+    print(f"{'vehicles':>8} {'per-vehicle ms':>15} {'batched ms':>11} {'speedup':>8}")
+    for count in args.vehicles:
+        crops = make_crops(image, count)
+        per_vehicle = timeit(lambda: sequential(crops), args.repeat)
+        batched = timeit(lambda: service._detect_license_plates(crops), args.repeat)
+        print(f"{count:>8} {per_vehicle:>15.1f} {batched:>11.1f} {per_vehicle / batched:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
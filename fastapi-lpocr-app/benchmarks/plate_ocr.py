@@ -0,0 +1,69 @@
+# Per-plate OCR latency of every OCR_BACKEND, one plate per call and a frame's worth of plates per call.
+# pytesseract (a tesseract process per plate, what the webcam route used to do) is the baseline.
+#
+# run from fastapi-lpocr-app/ with the backends you have installed (pip install pytesseract for the baseline):
+#   python -m benchmarks.plate_ocr --backends pytesseract easyocr tesserocr paddleocr --plates plate1.jpg plate2.jpg
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.services.ocr import load_plate_ocr
+
+
+class PytesseractOCR:
+    def read_plate_texts(self, plate_crops_gray: list) -> list:
+        import pytesseract
+        return [
+            (pytesseract.image_to_string(plate_gray, config="--psm 8 -l tha+eng").strip(), 0.0)
+            for plate_gray in plate_crops_gray
+        ]
+
+
+def synthetic_plate(rng) -> np.ndarray:
+    # White plate with two dark text lines, roughly what the plate detector crops
+    plate = np.full((72, 160), 235, np.uint8)
+    cv2.putText(plate, f"{rng.integers(10, 99)} {rng.integers(1000, 9999)}", (12, 32), cv2.FONT_HERSHEY_SIMPLEX, 0.9, 20, 2)
+    cv2.putText(plate, "BANGKOK", (28, 62), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 20, 2)
+    return plate
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["easyocr", "tesserocr"])
+    parser.add_argument("--plates", nargs="*", help="plate crop images (synthetic plates when omitted)")
+    parser.add_argument("--batch", type=int, default=8, help="plates per call for the batched run")
+    parser.add_argument("--model-dir", help="OCR_MODEL_DIR")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.plates:
+        plates = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in args.plates]
+    else:
+        plates = [synthetic_plate(rng) for _ in range(args.batch)]
+    batch = [plates[i % len(plates)] for i in range(args.batch)]
+
+    print(f"{'backend':>12} {'load s':>7} {'1 plate ms':>11} {f'{args.batch} plates ms/plate':>19}  first text")
+    for backend in args.backends:
+        start = time.perf_counter()
+        ocr = PytesseractOCR() if backend == "pytesseract" else load_plate_ocr(backend, args.batch, args.model_dir)
+        ocr.read_plate_texts(plates[:1])  # warm-up
+        load = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(args.repeat):
+            ocr.read_plate_texts([plates[i % len(plates)]])
+        single = (time.perf_counter() - start) / args.repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            texts = ocr.read_plate_texts(batch)
+        batched = (time.perf_counter() - start) / args.repeat / len(batch) * 1000
+
+        print(f"{backend:>12} {load:>7.1f} {single:>11.1f} {batched:>19.1f}  {texts[0][0]!r}")
+
+
+if __name__ == "__main__":
+    main()
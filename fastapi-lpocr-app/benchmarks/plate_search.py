@@ -0,0 +1,108 @@
+# Plate search latency (exact / prefix / fuzzy, with and without filters) over a seeded cropped_image
+# table, plus the plan Postgres picks for each, to check the indexes are used.
+#
+# Needs the Postgres of SQLALCHEMY_DATABASE_URL with the app tables, pg_trgm and the search indexes
+# (python -m app.init_db on a new database, python -m app.upgrade_db on an existing one). --seed inserts
+# random plates under one throwaway user, --cleanup deletes them again. Run from fastapi-lpocr-app/:
+#   python -m benchmarks.plate_search --seed 2000000
+#   python -m benchmarks.plate_search --cleanup
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.config.database import SessionLocal
+from app.services.plate_search import search_plates
+
+BENCH_USER = "bench-plate-search"
+CONSONANTS = "กขคฆงจฉชซญฎฐฒณดตถทธนบปผพฟภมยรลวศษสหฬอฮ"
+
+
+async def seed(session, count: int) -> None:
+    await session.execute(text(
+        "INSERT INTO users (username, email, password, image_url, is_verified) "
+        "VALUES (:name, :name || '@bench.local', '-', '-', true)"
+    ), {"name": BENCH_USER})
+    upload_id = (await session.execute(text(
+        "INSERT INTO upload_file (user_id, upload_name, upload_url, obj_detect_url, upload_type) "
+        "SELECT id, 'bench.mp4', '-', '-', 'video' FROM users WHERE username = :name RETURNING id"
+    ), {"name": BENCH_USER})).scalar()
+    # Plates like "กข 1234": two random consonants and a 4 digit number
+    await session.execute(text(
+        "INSERT INTO cropped_image (upload_id, crop_image_url, crop_class_name, license_plate, "
+        "license_plate_normalized, plate_prefix, plate_number, crop_timestamp, created_at) "
+        "SELECT :upload_id, '-', (ARRAY['car', 'truck', 'bus', 'motorcycle'])[1 + n % 4], "
+        "p.prefix || ' ' || p.number, p.prefix || p.number, p.prefix, p.number, n / 25.0, "
+        "now() - random() * interval '365 days' "
+        "FROM generate_series(1, :count) n, LATERAL (SELECT "
+        "substr(:consonants, 1 + floor(random() * length(:consonants))::int, 1) || "
+        "substr(:consonants, 1 + floor(random() * length(:consonants))::int, 1) "
+        "AS prefix, lpad((random() * 9999)::int::text, 4, '0') AS number WHERE n > 0) p"
+    ), {"upload_id": upload_id, "count": count, "consonants": CONSONANTS})
+    await session.commit()
+    await session.execute(text("ANALYZE cropped_image"))
+    await session.commit()
+
+
+async def cleanup(session) -> None:
+    uploads = "SELECT f.id FROM upload_file f JOIN users u ON u.id = f.user_id WHERE u.username = :name"
+    await session.execute(text(f"DELETE FROM cropped_image WHERE upload_id IN ({uploads})"), {"name": BENCH_USER})
+    await session.execute(text(f"DELETE FROM upload_file WHERE id IN ({uploads})"), {"name": BENCH_USER})
+    await session.execute(text("DELETE FROM users WHERE username = :name"), {"name": BENCH_USER})
+    await session.commit()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, help="insert this many crops first")
+    parser.add_argument("--cleanup", action="store_true")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    async with SessionLocal() as session:
+        if args.cleanup:
+            await cleanup(session)
+            return
+        if args.seed:
+            start = time.perf_counter()
+            await seed(session, args.seed)
+            print(f"seeded {args.seed} crops in {time.perf_counter() - start:.1f}s")
+
+        plate = (await session.execute(text(
+            "SELECT license_plate FROM cropped_image ORDER BY id DESC LIMIT 1"
+        ))).scalar()
+        total = (await session.execute(text("SELECT count(*) FROM cropped_image"))).scalar()
+        print(f"{total} crops, searching for {plate!r}\n")
+
+        cases = [
+            ("exact", plate, {}),
+            ("exact", plate, {"class_name": "car"}),
+            ("prefix", plate[:4], {}),
+            ("prefix", plate[:2], {}),
+            ("fuzzy", plate[:-1] + "0", {}),
+            ("fuzzy", plate[:-1] + "0", {"class_name": "car"}),
+        ]
+        print(f"{'mode':>7} {'query':>10} {'filters':>18} {'ms':>8} {'rows':>5}")
+        for mode, query, filters in cases:
+            await search_plates(session, query, mode, **filters)  # warm-up
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                page = await search_plates(session, query, mode, **filters)
+            elapsed = (time.perf_counter() - start) / args.repeat * 1000
+            print(f"{mode:>7} {query:>10} {str(filters or ''):>18} {elapsed:>8.1f} {len(page['items']):>5}")
+
+        print()
+        for mode, condition in [
+            ("exact", "license_plate_normalized = :plate"),
+            ("prefix", "license_plate_normalized LIKE :plate || '%'"),
+            ("fuzzy", "license_plate_normalized % :plate"),
+        ]:
+            plan = (await session.execute(text(
+                f"EXPLAIN SELECT id FROM cropped_image WHERE {condition} ORDER BY created_at DESC, id DESC LIMIT 51"
+            ), {"plate": plate.replace(" ", "")})).scalars().all()
+            print(f"{mode}:\n  " + "\n  ".join(plan))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+# Startup time of the API: import of app.main, time until /api/auth/ answers and time until /ready is 200.
+#
+# run from fastapi-lpocr-app/:
+#   python -m benchmarks.startup
+#   WARMUP_MODELS= python -m benchmarks.startup     # lazy model loading, nothing warmed up
+import argparse
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def time_import(repeat: int) -> list:
+    return [
+        float(subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET]).decode().strip().splitlines()[-1])
+        for _ in range(repeat)
+    ]
+
+
+def wait_for(url: str, start: float, timeout: float) -> float | None:
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    imports = time_import(args.repeat)
+    print(f"import app.main: best {min(imports):.2f}s, mean {sum(imports) / len(imports):.2f}s")
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        serving = wait_for(f"http://127.0.0.1:{args.port}/api/auth/", start, args.timeout)
+        ready = wait_for(f"http://127.0.0.1:{args.port}/ready", start, args.timeout)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"first response from /api/auth/: {serving:.2f}s" if serving else "/api/auth/ never answered")
+    print(f"/ready returned 200: {ready:.2f}s" if ready else "/ready never returned 200")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# Upload listing against a seeded upload_file table: the old unbounded ORM select, OFFSET pages and
+# keyset pages (app/services/pagination.py), first page and deep pages, per user and for the admin.
+#
+# Needs the Postgres of SQLALCHEMY_DATABASE_URL. --seed inserts the uploads (generate_series, spread
+# over --users throwaway users and a year of created_at) and --cleanup deletes them again:
+#   python -m benchmarks.upload_listing --seed 1000000 --users 100
+#   python -m benchmarks.upload_listing --cleanup
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import desc, select, text, true
+
+from app.config.database import SessionLocal, engine
+from app.models import UploadFile
+from app.services.pagination import keyset_page
+from app.services.upload import UPLOAD_LIST_COLUMNS
+
+BENCH_USER_PREFIX = "bench-listing-"
+
+
+async def seed(session, count: int, users: int) -> None:
+    await session.execute(text(
+        "INSERT INTO users (username, email, password, image_url, is_verified) "
+        "SELECT :prefix || n, :prefix || n || '@bench.local', '-', '-', true FROM generate_series(1, :users) n"
+    ), {"prefix": BENCH_USER_PREFIX, "users": users})
+    await session.execute(text(
+        "INSERT INTO upload_file (user_id, upload_name, upload_url, obj_detect_url, upload_type, created_at) "
+        "SELECT u.ids[1 + n % array_length(u.ids, 1)], 'video_' || n || '.mp4', "
+        "'https://example.com/uploads/video_' || n || '.mp4', 'https://example.com/results/video_' || n || '.mp4', "
+        "'video', now() - (random() * interval '365 days') "
+        "FROM generate_series(1, :count) n, "
+        "(SELECT array_agg(id) ids FROM users WHERE username LIKE :prefix || '%') u"
+    ), {"prefix": BENCH_USER_PREFIX, "count": count})
+    await session.commit()
+    await session.execute(text("ANALYZE upload_file"))
+
+
+async def cleanup(session) -> None:
+    users = "SELECT id FROM users WHERE username LIKE :prefix || '%'"
+    await session.execute(text(f"DELETE FROM upload_file WHERE user_id IN ({users})"), {"prefix": BENCH_USER_PREFIX})
+    await session.execute(text("DELETE FROM users WHERE username LIKE :prefix || '%'"), {"prefix": BENCH_USER_PREFIX})
+    await session.commit()
+
+
+async def timed(fn, repeat: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rows = await fn()
+    return (time.perf_counter() - start) / repeat * 1000, rows
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, help="insert this many uploads first")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--cleanup", action="store_true")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-full", action="store_true", help="skip the unbounded select (slow at 1M rows)")
+    args = parser.parse_args()
+
+    # The listing indexes, like app.upgrade_db does on an existing table
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: [index.create(sync_conn, checkfirst=True) for index in UploadFile.__table__.indexes]
+        )
+    async with SessionLocal() as session:
+        if args.cleanup:
+            await cleanup(session)
+            return
+        if args.seed:
+            start = time.perf_counter()
+            await seed(session, args.seed, args.users)
+            print(f"seeded {args.seed} uploads in {time.perf_counter() - start:.1f}s")
+
+        user_id = (await session.execute(text(
+            "SELECT user_id FROM upload_file GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+        ))).scalar()
+        total = (await session.execute(text("SELECT count(*) FROM upload_file"))).scalar()
+        print(f"{total} uploads, user {user_id} has the most\n")
+
+        print(f"{'listing':>8} {'method':>16} {'page':>5} {'ms':>9} {'rows':>8}")
+        for listing, where in [("user", UploadFile.user_id == user_id), ("admin", true())]:
+            if not args.skip_full:
+                async def full():
+                    statement = select(UploadFile).where(where).order_by(desc(UploadFile.created_at))
+                    return (await session.execute(statement)).scalars().all()
+                ms, rows = await timed(full, 1)
+                session.expunge_all()
+                print(f"{listing:>8} {'all rows (ORM)':>16} {'-':>5} {ms:>9.1f} {len(rows):>8}")
+
+            for page in args.pages:
+                async def offset():
+                    statement = (
+                        select(*UPLOAD_LIST_COLUMNS).where(where)
+                        .order_by(UploadFile.created_at.desc(), UploadFile.id.desc())
+                        .offset((page - 1) * args.limit).limit(args.limit)
+                    )
+                    return (await session.execute(statement)).all()
+                ms, rows = await timed(offset, args.repeat)
+                print(f"{listing:>8} {'offset':>16} {page:>5} {ms:>9.1f} {len(rows):>8}")
+
+                # Walk to the page once for its cursor, then time fetching it
+                cursor = None
+                for _ in range(page - 1):
+                    statement = select(*UPLOAD_LIST_COLUMNS).where(where)
+                    cursor = (await keyset_page(session, statement, UploadFile, args.limit, cursor))["next_cursor"]
+                    if cursor is None:
+                        break
+
+                async def keyset():
+                    statement = select(*UPLOAD_LIST_COLUMNS).where(where)
+                    return (await keyset_page(session, statement, UploadFile, args.limit, cursor))["items"]
+                ms, rows = await timed(keyset, args.repeat)
+                print(f"{listing:>8} {'keyset':>16} {page:>5} {ms:>9.1f} {len(rows):>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
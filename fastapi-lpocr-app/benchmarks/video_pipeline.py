@@ -0,0 +1,105 @@
+# Frames per second of the serial read/infer/write loop against the staged VideoPipeline.
+#
+# run from fastapi-lpocr-app/ (model weights are loaded from app/model_weights):
+#   python -m benchmarks.video_pipeline --frames 300
+#   python -m benchmarks.video_pipeline --video some_clip.mp4
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from ultralytics.utils.plotting import Annotator
+
+from app.services.pipeline import VideoPipeline
+from app.services.upload import UploadFileService
+
+
+def make_clip(path: str, frames: int, width: int = 1280, height: int = 720, fps: int = 30):
+    # Noise background with a few boxes moving across it
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for i in range(frames):
+        frame = background.copy()
+        for k in range(4):
+            x = (i * (4 + k) + k * 300) % (width - 200)
+            y = 100 + k * 140
+            cv2.rectangle(frame, (x, y), (x + 200, y + 110), (40 * k, 200, 255 - 40 * k), -1)
+        out.write(frame)
+    out.release()
+
+
+OUTPUT_PATH = os.path.join(tempfile.gettempdir(), "benchmark_video_pipeline.mp4")
+
+
+def open_clip(path: str):
+    cap = cv2.VideoCapture(path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    out = cv2.VideoWriter(OUTPUT_PATH, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    return cap, out
+
+
+def serial(service: UploadFileService, path: str) -> int:
+    cap, out = open_clip(path)
+    frames = 0
+    while True:
+        success, im0 = cap.read()
+        if not success:
+            break
+        vehicles = service._infer_frame(im0, plate_conf=0.75)
+        annotator = Annotator(im0, line_width=2, example=service.names)
+        for vehicle in vehicles:
+            service._annotate_vehicle(annotator, vehicle)
+        out.write(im0)
+        frames += 1
+    cap.release()
+    out.release()
+    return frames
+
+
+def pipelined(service: UploadFileService, path: str) -> int:
+    cap, out = open_clip(path)
+
+    def write_frame(frame_index, im0, vehicles):
+        annotator = Annotator(im0, line_width=2, example=service.names)
+        for vehicle in vehicles:
+            service._annotate_vehicle(annotator, vehicle)
+        out.write(im0)
+
+    frames = 0
+    with VideoPipeline(cap, write_frame) as pipeline:
+        for frame_index, im0 in pipeline.frames():
+            pipeline.submit(frame_index, im0, service._infer_frame(im0, plate_conf=0.75))
+            frames += 1
+    cap.release()
+    out.release()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--video", help="clip to process (a synthetic clip is generated when omitted)")
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    path = args.video
+    if path is None:
+        path = os.path.join(tempfile.gettempdir(), "benchmark_synthetic_clip.mp4")
+        make_clip(path, args.frames)
+
+    service = UploadFileService()
+    service._infer_frame(np.zeros((720, 1280, 3), np.uint8), plate_conf=0.75)  # warm-up
+
+    for name, run in (("serial", serial), ("pipelined", pipelined)):
+        start = time.perf_counter()
+        frames = run(service, path)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10}: {frames} frames in {elapsed:.1f}s -> {frames / elapsed:.1f} fps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from PIL import ImageFont
+
+from app.services.annotate import draw_texts
+
+
+@pytest.fixture(scope="module")
+def font():
+    return ImageFont.load_default(size=20)
+
+
+def test_draws_inside_the_label_only(font):
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    draw_texts(frame, [(50, 40, "AB 12")], font, fill=(255, 0, 0))
+
+    drawn = np.argwhere(frame.any(axis=2))
+    assert len(drawn)
+    # Red in RGB is the last channel of BGR
+    assert frame[..., 2].max() == 255 and frame[..., 0].max() == 0
+    (y0, x0), (y1, x1) = drawn.min(axis=0), drawn.max(axis=0)
+    assert 30 <= y0 and y1 < 70 and 45 <= x0 and x1 < 120
+
+
+@pytest.mark.parametrize("x, y", [(-10, -10), (180, 90), (-5, 50), (100, -8)])
+def test_labels_are_clipped_at_the_edges(font, x, y):
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    out = draw_texts(frame, [(x, y, "AB 1234")], font)
+    assert out is frame
+    assert frame.shape == (100, 200, 3)
+    assert frame.any()
+
+
+@pytest.mark.parametrize("x, y", [(-500, 10), (10, -500), (300, 10), (10, 300)])
+def test_labels_outside_the_frame_are_skipped(font, x, y):
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    draw_texts(frame, [(x, y, "AB 1234")], font)
+    assert not frame.any()
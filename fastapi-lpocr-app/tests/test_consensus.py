@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from app.services.consensus import (
+    PLATE_CONSENSUS_THRESHOLD, TRACK_OCR_ATTEMPTS, PlateConsensus, add_readings, needs_ocr, track_consensus
+)
+
+
+def test_empty():
+    consensus = PlateConsensus()
+    assert consensus.text == ""
+    assert consensus.confidence == 0.0
+    assert not consensus.done
+
+
+def test_single_reading_is_not_enough():
+    consensus = PlateConsensus()
+    consensus.add("กข 1234", 0.99)
+    assert consensus.text == "กข 1234"
+    assert consensus.confidence == pytest.approx(0.99)
+    assert not consensus.done  # min_reads
+
+
+def test_agreeing_readings_settle():
+    consensus = PlateConsensus(threshold=PLATE_CONSENSUS_THRESHOLD)
+    consensus.add("กข 1234", 0.6)
+    consensus.add("กข  1234 ", 0.7)  # whitespace does not make a different reading
+    assert consensus.text == "กข 1234"
+    assert consensus.confidence == pytest.approx(1 - 0.4 * 0.3)
+    assert consensus.done
+
+
+def test_unsure_readings_do_not_settle():
+    consensus = PlateConsensus()
+    consensus.add("กข 1234", 0.01)
+    consensus.add("กข 1234", 0.01)
+    assert consensus.text == "กข 1234"
+    assert consensus.confidence == pytest.approx(1 - 0.99 * 0.99)
+    assert not consensus.done
+
+
+def test_characters_are_voted_by_confidence():
+    consensus = PlateConsensus()
+    consensus.add("กข 1284", 0.5)
+    consensus.add("กข 1234", 0.9)
+    consensus.add("กข 1234", 0.8)
+    assert consensus.text == "กข 1234"
+    assert consensus.confidence == pytest.approx(1.7 / 2.2 * (1 - 0.5 * 0.1 * 0.2))
+    assert not consensus.done
+
+
+def test_readings_are_grouped_by_length():
+    consensus = PlateConsensus()
+    consensus.add("กข 123", 0.9)  # missed a digit
+    consensus.add("กข 1234", 0.6)
+    consensus.add("กข 1234", 0.6)
+    assert consensus.text == "กข 1234"
+    assert consensus.confidence == pytest.approx(1.2 / 2.1 * (1 - 0.4 * 0.4))
+
+
+def test_empty_readings_are_ignored():
+    consensus = PlateConsensus()
+    consensus.add("", 0.9)
+    consensus.add("   ", 0.9)
+    assert consensus.readings == []
+
+
+def test_track_settles_and_stays_json_able():
+    track = {}
+    assert needs_ocr(track)
+    add_readings(track, [{"text": "กข 1234", "confidence": 0.9}])
+    assert needs_ocr(track)
+    track = json.loads(json.dumps(track))  # a webcam session restored from Redis
+    add_readings(track, [{"text": "กข 1234", "confidence": 0.8}])
+    assert track_consensus(track).text == "กข 1234"
+    assert not needs_ocr(track)
+
+
+def test_track_without_plates_stops_after_max_attempts():
+    track = {}
+    for _ in range(TRACK_OCR_ATTEMPTS):
+        assert needs_ocr(track)
+        add_readings(track, [])
+    assert not needs_ocr(track)
+    assert track_consensus(track).text == ""
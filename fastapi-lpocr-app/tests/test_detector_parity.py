@@ -0,0 +1,46 @@
+import glob
+import os
+
+import cv2
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("ultralytics")
+
+from app.config.model_registry import MODEL_WEIGHTS
+from app.services.detector import backend_weights
+from benchmarks.detector_parity import check
+
+# Runtime each export needs, and how far it may drift from torch (int8 is quantized)
+BACKENDS = {
+    "onnx": ("onnxruntime", 0.95, 0.05),
+    "onnx-int8": ("onnxruntime", 0.85, 0.15),
+    "openvino": ("openvino", 0.95, 0.05),
+}
+
+
+@pytest.fixture(scope="module")
+def images():
+    # DETECTOR_PARITY_IMAGES (a glob, e.g. samples/*.jpg) or the sample images ultralytics ships
+    pattern = os.environ.get("DETECTOR_PARITY_IMAGES")
+    if pattern is None:
+        from ultralytics.utils import ASSETS
+        pattern = str(ASSETS / "*.jpg")
+    images = [cv2.imread(path) for path in sorted(glob.glob(pattern))]
+    if not images:
+        pytest.skip(f"No images match {pattern}")
+    return images
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("name", list(MODEL_WEIGHTS))
+def test_export_matches_torch(name, backend, images):
+    runtime, min_iou, max_conf_diff = BACKENDS[backend]
+    if not os.path.exists(MODEL_WEIGHTS[name]):
+        pytest.skip(f"No weights {MODEL_WEIGHTS[name]}")
+    if not os.path.exists(backend_weights(MODEL_WEIGHTS[name], backend)):
+        pytest.skip(f"No {backend} export of {name} (python -m app.export_models)")
+    pytest.importorskip(runtime)
+
+    report = check(name, backend, images, min_iou, max_conf_diff)
+    assert report["ok"], report
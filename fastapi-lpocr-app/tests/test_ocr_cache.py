@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from app.services.consensus import TRACK_OCR_ATTEMPTS, add_readings, needs_ocr, track_consensus
+from app.services.ocr_cache import PlateOCRCache, plate_hash
+
+
+class FakeOCR:
+    # Returns the queued results in order, counts the crops it was asked to read
+    def __init__(self, *results):
+        self.results = list(results)
+        self.crops = 0
+
+    def read_plate_texts(self, plate_crops_gray: list) -> list:
+        self.crops += len(plate_crops_gray)
+        return [self.results.pop(0) for _ in plate_crops_gray]
+
+
+def plate(seed: int):
+    return np.random.default_rng(seed).integers(0, 255, (40, 120), dtype=np.uint8)
+
+
+def test_plate_hash():
+    crop = plate(0)
+    noisy = np.clip(crop.astype(int) + np.random.default_rng(1).integers(-3, 4, crop.shape), 0, 255).astype(np.uint8)
+    assert plate_hash(crop) == plate_hash(crop)
+    assert (plate_hash(crop) ^ plate_hash(noisy)).bit_count() <= 10
+    assert (plate_hash(crop) ^ plate_hash(plate(2))).bit_count() > 10
+    assert plate_hash(crop).bit_length() <= 64
+
+
+def test_hit_in_the_same_scope():
+    engine = FakeOCR(("กข 1234", 0.9))
+    cache = PlateOCRCache(engine)
+    assert cache.read_plate_results([plate(0)], [("cam", 1)]) == [("กข 1234", 0.9, False)]
+    assert cache.read_plate_results([plate(0)], [("cam", 1)]) == [("กข 1234", 0.9, True)]
+    assert cache.read_plate_texts([plate(0)], [("cam", 1)]) == [("กข 1234", 0.9)]
+    assert engine.crops == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_no_match_across_scopes():
+    engine = FakeOCR(("กข 1234", 0.9), ("กข 1284", 0.9))
+    cache = PlateOCRCache(engine)
+    cache.read_plate_results([plate(0)], [("cam", 1)])
+    assert cache.read_plate_results([plate(0)], [("cam", 2)]) == [("กข 1284", 0.9, False)]
+    assert engine.crops == 2
+
+
+def test_crops_without_scope_are_always_read():
+    engine = FakeOCR(("กข 1234", 0.9), ("กข 1234", 0.9))
+    cache = PlateOCRCache(engine)
+    cache.read_plate_texts([plate(0)])
+    cache.read_plate_texts([plate(0)], [None])
+    assert engine.crops == 2
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.parametrize("result", [("", 0.0), ("  ", 0.9), ("กข 1234", 0.3)])
+def test_bad_readings_are_not_cached(result):
+    engine = FakeOCR(result, ("กข 1234", 0.9))
+    cache = PlateOCRCache(engine, min_confidence=0.5)
+    cache.read_plate_results([plate(0)], [("cam", 1)])
+    assert cache.read_plate_results([plate(0)], [("cam", 1)]) == [("กข 1234", 0.9, False)]
+
+
+def test_misses_of_a_call_are_read_in_one_batch():
+    engine = FakeOCR(("กข 1234", 0.9), ("ขค 5678", 0.9), ("คง 9012", 0.9))
+    cache = PlateOCRCache(engine)
+    cache.read_plate_texts([plate(0)], [("cam", 1)])
+    results = cache.read_plate_results([plate(1), plate(0), plate(2)], [("cam", 2), ("cam", 1), ("cam", 3)])
+    assert results == [("ขค 5678", 0.9, False), ("กข 1234", 0.9, True), ("คง 9012", 0.9, False)]
+
+
+def test_least_recently_used_are_evicted():
+    engine = FakeOCR(*[("กข 1234", 0.9)] * 4)
+    cache = PlateOCRCache(engine, max_size=2)
+    for track_id in (1, 2):
+        cache.read_plate_texts([plate(track_id)], [("cam", track_id)])
+    cache.read_plate_texts([plate(1)], [("cam", 1)])  # 1 is now the most recent
+    cache.read_plate_texts([plate(3)], [("cam", 3)])  # evicts 2
+
+    assert cache.stats()["size"] == 2
+    assert cache.read_plate_results([plate(1)], [("cam", 1)])[0][2]
+    assert not cache.read_plate_results([plate(2)], [("cam", 2)])[0][2]
+
+
+def test_max_size_zero_disables():
+    engine = FakeOCR(("กข 1234", 0.9), ("กข 1234", 0.9))
+    cache = PlateOCRCache(engine, max_size=0)
+    cache.read_plate_texts([plate(0)], [("cam", 1)])
+    cache.read_plate_texts([plate(0)], [("cam", 1)])
+    assert engine.crops == 2
+
+
+def test_track_of_an_unchanged_plate_stops_requesting_ocr():
+    # The same crop on every frame: read once, then cache hits until the track gives up
+    engine = FakeOCR(("กข 1234", 0.9))
+    cache = PlateOCRCache(engine)
+    track, passes = {}, 0
+    while needs_ocr(track) and passes < 100:
+        passes += 1
+        text, confidence, cached = cache.read_plate_results([plate(0)], [("cam", 1)])[0]
+        add_readings(track, [{"text": text, "confidence": confidence, "cached": cached}])
+    assert passes == TRACK_OCR_ATTEMPTS
+    assert engine.crops == 1
+    assert track_consensus(track).readings == [("กข 1234", 0.9)]  # hits are no votes
+    assert track_consensus(track).text == "กข 1234"
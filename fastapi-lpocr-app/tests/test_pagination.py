@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from fastapi import HTTPException
+
+from app.services.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == [created_at, 42]
+
+
+def test_cursor_with_rank():
+    created_at = datetime(2024, 5, 1, 12, 30)
+    assert decode_cursor(encode_cursor(0.75, created_at, 7), size=3) == [0.75, created_at, 7]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor(datetime(2024, 5, 1), 1, 2),  # wrong size
+    encode_cursor("yesterday", 1),
+    encode_cursor(datetime(2024, 5, 1), "x"),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,66 @@
+import pytest
+
+from app.services.ocr import plate_text
+from app.services.plates import PlateParts, normalize_plate, parse_plate, plate_columns
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("กข 1234 กรุงเทพมหานคร", PlateParts("กข", "1234", "กรุงเทพมหานคร")),
+    ("กข1234กรุงเทพ", PlateParts("กข", "1234", "กรุงเทพมหานคร")),
+    ("กข 1234 กทม", PlateParts("กข", "1234", "กรุงเทพมหานคร")),
+    ("1กข 234 เชียงใหม่", PlateParts("1กข", "234", "เชียงใหม่")),
+    ("กข ๑๒๓๔ ชลบุรี", PlateParts("กข", "1234", "ชลบุรี")),
+    ("ก่ข 1234 ภูเก็ต", PlateParts("กข", "1234", "ภูเก็ต")),
+    # Latin letters read for digits
+    ("กข-l234", PlateParts("กข", "1234", None)),
+    ("กข 123O ชลบุรี", PlateParts("กข", "1230", "ชลบุรี")),
+])
+def test_parse_plate(text, expected):
+    assert parse_plate(text) == expected
+
+
+@pytest.mark.parametrize("text, province", [
+    # One misread character: an alias inside the name must not win over the whole tail
+    ("กข 1234 กรุงเทพมหานดร", "กรุงเทพมหานคร"),
+    ("กข 1234 พระนดรศรีอยุธยา", "พระนครศรีอยุธยา"),
+    ("กข 1234 ชลบุร", "ชลบุรี"),
+])
+def test_parse_plate_misread_province(text, province):
+    assert parse_plate(text) == PlateParts("กข", "1234", province)
+
+
+def test_parse_plate_drops_unknown_tail():
+    assert parse_plate("กข1234ก") == PlateParts("กข", "1234", None)
+
+
+@pytest.mark.parametrize("text", ["", None, "hello", "กข 12345", "1234", "กขคง 12"])
+def test_parse_plate_rejects(text):
+    assert parse_plate(text) is None
+
+
+def test_plate_text_is_stored_as_read():
+    # Only the plate columns are parsed, license_plate keeps the OCR text for later re-parsing
+    text = plate_text([("กข l234", 0.9), ("กรุงเทพ", 0.8), ("extra", 0.5)])
+    assert text == "กข l234 กรุงเทพ"
+    assert plate_columns(text)["plate_number"] == "1234"
+    assert plate_columns(text)["plate_province"] == "กรุงเทพมหานคร"
+
+
+def test_normalize_plate():
+    assert normalize_plate("กข-1234 กรุงเทพมหานคร") == normalize_plate("กข l234") == "กข1234"
+    assert normalize_plate("ab-c d") == "ABCD"
+
+
+def test_plate_columns():
+    assert plate_columns("กข 1234 กรุงเทพมหานดร") == {
+        "license_plate_normalized": "กข1234",
+        "plate_prefix": "กข",
+        "plate_number": "1234",
+        "plate_province": "กรุงเทพมหานคร",
+    }
+    assert plate_columns("hello") == {
+        "license_plate_normalized": "HELLO",
+        "plate_prefix": None,
+        "plate_number": None,
+        "plate_province": None,
+    }
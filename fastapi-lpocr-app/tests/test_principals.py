@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_settings")
+
+from app.services import principals
+from app.services.principals import Principal, PrincipalCache
+
+
+def principal(user_id: int) -> Principal:
+    return Principal(user_id, f"user{user_id}", f"user{user_id}@example.com", None, "-", True, datetime(2024, 1, 1))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(principals.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_put(clock):
+    cache = PrincipalCache(ttl=30)
+    assert cache.get(1) is None
+    cache.put(1, principal(1), "member")
+    assert cache.get(1) == (principal(1), "member")
+    assert cache.stats() == {"size": 1, "ttl": 30, "hits": 1, "misses": 1}
+
+
+def test_entries_expire(clock):
+    cache = PrincipalCache(ttl=30)
+    cache.put(1, principal(1), "admin")
+    clock[0] += 29
+    assert cache.get(1) is not None
+    clock[0] += 2
+    assert cache.get(1) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_are_evicted(clock):
+    cache = PrincipalCache(ttl=30, max_size=2)
+    cache.put(1, principal(1), "member")
+    cache.put(2, principal(2), "member")
+    cache.get(1)
+    cache.put(3, principal(3), "member")
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+
+
+def test_invalidate(clock):
+    cache = PrincipalCache(ttl=30)
+    cache.put(1, principal(1), "member")
+    cache.put(2, principal(2), "member")
+    cache.invalidate("1")  # the token's user_uid is a string
+    assert cache.get(1) is None and cache.get(2) is not None
+    cache.invalidate()
+    assert cache.get(2) is None
+
+
+def test_ttl_zero_disables(clock):
+    cache = PrincipalCache(ttl=0)
+    cache.put(1, principal(1), "member")
+    assert cache.get(1) is None
@@ -0,0 +1,43 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("redis")
+
+from app.services.resumable import GrowingCapture, growing_marker
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for value in range(12):
+        out.write(np.full((48, 64, 3), value * 20, dtype=np.uint8))
+    out.release()
+    return path
+
+
+def test_frame_count_of_a_complete_upload(video):
+    cap = GrowingCapture(video)
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 12
+    cap.release()
+
+
+def test_frame_count_is_unknown_while_the_upload_grows(video):
+    open(growing_marker(video), "wb").close()
+    cap = GrowingCapture(video, poll=0.01, timeout=0.05)
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 0
+
+    frames = 0
+    while frames < 12 and cap.read()[0]:
+        frames += 1
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 0
+
+    # Completed: the count is the one of the whole file
+    os.remove(growing_marker(video))
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 12
+    assert not cap.read()[0]
+    cap.release()
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from app.services.sampling import FrameSampler, propagate
+
+
+def frame(value: int):
+    return np.full((72, 128, 3), value, dtype=np.uint8)
+
+
+def decisions(sampler: FrameSampler, frames: list) -> list:
+    return [sampler.should_infer(f) for f in frames]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        FrameSampler(mode="every-other")
+
+
+def test_all():
+    assert decisions(FrameSampler("all"), [frame(0)] * 4) == [True] * 4
+
+
+def test_stride():
+    assert decisions(FrameSampler("stride", stride=3), [frame(0)] * 7) == [
+        True, False, False, True, False, False, True
+    ]
+
+
+def test_motion():
+    sampler = FrameSampler("motion", motion_threshold=6.0, max_skip=30)
+    frames = [frame(0), frame(2), frame(4), frame(40), frame(42)]
+    # Small changes add up against the last inferred frame, not the previous one
+    assert decisions(sampler, frames) == [True, False, False, True, False]
+
+
+def test_motion_max_skip():
+    sampler = FrameSampler("motion", max_skip=3)
+    assert decisions(sampler, [frame(0)] * 7) == [True, False, False, True, False, False, True]
+
+
+def test_keyframe():
+    sampler = FrameSampler("keyframe", keyframe_threshold=0.9, max_skip=30)
+    rng = np.random.default_rng(0)
+    night = rng.integers(0, 60, (72, 128, 3), dtype=np.uint8)
+    day = rng.integers(190, 255, (72, 128, 3), dtype=np.uint8)
+    # The same scene with other noise has the same histogram, a scene change does not
+    night_again = rng.integers(0, 60, (72, 128, 3), dtype=np.uint8)
+    assert decisions(sampler, [night, night_again, day, day]) == [True, False, True, False]
+
+
+def test_propagate_copies_drawn_keys_only():
+    vehicles = [{"box": (0, 0, 10, 10), "cls": 2, "conf": 0.9, "plates": [], "track_id": 3,
+                 "crop_image_filename": "crop.jpg"}]
+    assert propagate(vehicles) == [{"box": (0, 0, 10, 10), "cls": 2, "conf": 0.9, "plates": [], "track_id": 3}]
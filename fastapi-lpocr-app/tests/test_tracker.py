@@ -0,0 +1,68 @@
+import numpy as np
+
+from app.services.tracker import Tracker, iou_matrix
+
+
+def moving(box, dx, steps):
+    x1, y1, x2, y2 = box
+    return [(x1 + dx * step, y1, x2 + dx * step, y2) for step in range(steps)]
+
+
+def test_iou_matrix():
+    boxes = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=float)
+    ious = iou_matrix(boxes, np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=float))
+    assert ious.shape == (2, 2)
+    assert ious[0, 0] == 1.0
+    assert abs(ious[0, 1] - 50 / 150) < 1e-9
+    assert ious[1, 0] == ious[1, 1] == 0.0
+
+
+def test_ids_stay_with_moving_vehicles():
+    tracker = Tracker()
+    left = moving((0, 0, 100, 50), 5, 20)
+    right = moving((500, 300, 600, 350), -5, 20)
+
+    first = tracker.update([left[0], right[0]])
+    assert first[0] != first[1]
+    for a, b in zip(left[1:], right[1:]):
+        # Detections come in any order
+        assert tracker.update([b, a]) == first[::-1]
+
+
+def test_new_detection_starts_a_track():
+    tracker = Tracker()
+    (car,) = tracker.update([(0, 0, 100, 50)])
+    car_again, truck = tracker.update([(2, 0, 102, 50), (400, 400, 500, 500)])
+    assert car_again == car
+    assert truck not in (car, 0)
+    assert set(tracker.data) == {car, truck}
+
+
+def test_tracks_are_dropped_after_max_missing():
+    tracker = Tracker(max_missing=2)
+    (track_id,) = tracker.update([(0, 0, 100, 50)])
+    tracker.data[track_id]["ocr_attempts"] = 1
+
+    # Missed for max_missing frames the track survives and is matched again
+    tracker.update([])
+    tracker.update([])
+    assert tracker.update([(0, 0, 100, 50)]) == [track_id]
+
+    for _ in range(3):
+        tracker.update([])
+    assert len(tracker) == 0
+    assert track_id not in tracker.data
+    assert tracker.update([(0, 0, 100, 50)]) != [track_id]
+
+
+def test_state_round_trip():
+    tracker = Tracker()
+    boxes = moving((0, 0, 100, 50), 4, 5)
+    for box in boxes[:3]:
+        (track_id,) = tracker.update([box])
+    tracker.data[track_id]["plate_text"] = "กข 1234"
+
+    restored = Tracker.from_dict(tracker.to_dict())
+    assert restored.data == {track_id: {"plate_text": "กข 1234"}}
+    assert restored.update([boxes[3]]) == tracker.update([boxes[3]]) == [track_id]
+    assert restored.next_id == tracker.next_id
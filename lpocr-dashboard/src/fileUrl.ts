@@ -0,0 +1,7 @@
+// Files of the local storage backend (/api/files) are only served with the access token,
+// an <img>/<video> src cannot send the Authorization header so it goes in the query
+export const fileUrl = (url: string) => {
+  if (!url || !url.includes('/api/files/')) return url;
+  const token = encodeURIComponent(localStorage.getItem('access_token') ?? '');
+  return `${url}${url.includes('?') ? '&' : '?'}token=${token}`;
+};
@@ -3,7 +3,8 @@ import './Styles/Content.css'; // Import styles
 
 const YOLOv8Detection: React.FC = () => {
   const videoRef = useRef<HTMLVideoElement | null>(null); // Reference to the video element for camera
-  const outputRef = useRef<HTMLImageElement | null>(null); // Reference to the image element for predictions
+  const outputRef = useRef<HTMLCanvasElement | null>(null); // Reference to the canvas the detections are drawn on
+  const socketRef = useRef<WebSocket | null>(null); // WebSocket the frames are streamed over
   const [isCameraActive, setIsCameraActive] = useState(false); // State to track camera status
   const [stream, setStream] = useState<MediaStream | null>(null); // State to store the MediaStream
   const [intervalId, setIntervalId] = useState<number | null>(null); // Interval ID for frame capture
@@ -27,6 +28,12 @@ const YOLOv8Detection: React.FC = () => {
         setStream(mediaStream); // Store the stream
         setIsCameraActive(true);
 
+        // Detections come back as JSON, drawn over the camera frame here
+        const token = encodeURIComponent(localStorage.getItem('access_token') ?? '');
+        const socket = new WebSocket(`ws://localhost:8000/api/webcam/ws?session_id=${crypto.randomUUID()}&token=${token}`);
+        socket.onmessage = (event) => drawDetections(JSON.parse(event.data).detections);
+        socketRef.current = socket;
+
         // Start sending frames to FastAPI for YOLOv8 detection
         const id = setInterval(() => {
           captureAndPredict();
@@ -50,11 +57,15 @@ const YOLOv8Detection: React.FC = () => {
     if (intervalId) {
       clearInterval(intervalId); // Clear interval
     }
+    socketRef.current?.close();
+    socketRef.current = null;
   };
 
   // Function to capture frame and send for prediction
   const captureAndPredict = async () => {
-    if (videoRef.current) {
+    const socket = socketRef.current;
+    // Skip the frame while the previous ones are still being sent, the server only keeps the newest anyway
+    if (videoRef.current && socket?.readyState === WebSocket.OPEN && socket.bufferedAmount === 0) {
       const canvas = document.createElement('canvas');
       canvas.width = videoRef.current.videoWidth;
       canvas.height = videoRef.current.videoHeight;
@@ -64,24 +75,48 @@ const YOLOv8Detection: React.FC = () => {
       const blob = await new Promise<Blob | null>((resolve) => canvas.toBlob(resolve, 'image/jpeg'));
 
       if (blob) {
-        const formData = new FormData();
-        formData.append('file', blob, 'frame.jpg');
-
-        const response = await fetch('http://localhost:8000/api/webcam/predict-frame', {
-          method: 'POST',
-          body: formData,
-        });
-
-        if (response.ok) {
-          const detectedBlob = await response.blob();
-          outputRef.current!.src = URL.createObjectURL(detectedBlob);
-        } else {
-          console.error('Failed to get prediction');
-        }
+        socket.send(await blob.arrayBuffer());
       }
     }
   };
 
+  type Detection = {
+    track_id: number;
+    label: string;
+    confidence: number;
+    box: number[];
+    plate_box: number[] | null;
+    plate_text: string | null;
+  };
+
+  // Function to draw the current camera frame with the detected boxes and plates
+  const drawDetections = (detections: Detection[]) => {
+    const video = videoRef.current;
+    const canvas = outputRef.current;
+    const ctx = canvas?.getContext('2d');
+    if (!video || !canvas || !ctx) return;
+
+    canvas.width = video.videoWidth;
+    canvas.height = video.videoHeight;
+    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
+    ctx.lineWidth = 2;
+    ctx.font = '16px sans-serif';
+
+    detections.forEach(({ track_id, label, confidence, box, plate_box, plate_text }) => {
+      const [x1, y1, x2, y2] = box;
+      ctx.strokeStyle = ctx.fillStyle = 'lime';
+      ctx.strokeRect(x1, y1, x2 - x1, y2 - y1);
+      ctx.fillText(`#${track_id} ${label} ${confidence.toFixed(2)}`, x1, y1 - 6);
+
+      if (plate_box) {
+        const [px1, py1, px2, py2] = plate_box;
+        ctx.strokeStyle = ctx.fillStyle = 'blue';
+        ctx.strokeRect(px1, py1, px2 - px1, py2 - py1);
+        ctx.fillText(`License Plate: ${plate_text ?? ''}`, px1, py1 - 6);
+      }
+    });
+  };
+
   return (
     <div className="flex-1 overflow-auto p-6 bg-gray-100">
       <div className="flex items-center mb-4">
@@ -121,10 +156,9 @@ const YOLOv8Detection: React.FC = () => {
           <div className="bg-white shadow-md rounded-lg p-4">
             <h3 className="text-lg mt-4 font-semibold">Predicted Frame</h3>
             <div className="mt-4 video-container">
-              <img
+              <canvas
                 ref={outputRef}
                 className="video"
-                alt="Detected Frame"
               />
             </div>
           </div>
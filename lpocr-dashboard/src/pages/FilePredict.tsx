@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
+import { fileUrl } from '../fileUrl';
 
 // Define the CroppedImage interface
 interface CroppedImage {
@@ -58,13 +59,27 @@ export default function FilePredict() {
     formData.append('file', file);
 
     try {
-      const response = await axios.post('http://localhost:8000/api/vehicle/upload', formData, {
+      const upload = await axios.post('http://localhost:8000/api/vehicle/upload', formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
           Authorization: `Bearer ${accessToken}`,
         },
       });
 
+      // Inference runs in a background job, poll until it is done
+      let job = upload.data;
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const status = await axios.get(`http://localhost:8000/api/vehicle/jobs/${upload.data.job_id}`, {
+          headers: { Authorization: `Bearer ${accessToken}` },
+        });
+        job = status.data;
+      }
+      if (job.status !== 'finished') {
+        throw new Error(job.error || 'Processing failed');
+      }
+
+      const response = { data: job.result };
       setOriginalFileUrl(response.data.upload_url);
       setPredictFileUrl(response.data.detect_url);
       setUploadType(response.data.upload_type);
@@ -144,7 +159,7 @@ export default function FilePredict() {
                     <td className="py-2 text-center">
                       <div className="flex justify-center">
                         <img
-                          src={image.crop_image_url}
+                          src={fileUrl(image.crop_image_url)}
                           alt="Cropped"
                           className="w-16 h-16 cursor-pointer"
                           onClick={() => handleImageClick(image.crop_image_url)}
@@ -167,11 +182,11 @@ export default function FilePredict() {
           <div className="bg-white shadow-md rounded-lg p-4">
             <h3 className="text-lg font-semibold">Original file</h3>
             <div className="mt-4">
-              <img src={originalFileUrl} alt="Original file preview" />
+              <img src={fileUrl(originalFileUrl)} alt="Original file preview" />
             </div>
             <h3 className="text-lg mt-4 font-semibold">Predict</h3>
             <div className="mt-4">
-              <img src={predictFileUrl} alt="Predicted file preview" />
+              <img src={fileUrl(predictFileUrl)} alt="Predicted file preview" />
             </div>
           </div>
         </div>
@@ -181,7 +196,7 @@ export default function FilePredict() {
         <div className="fixed inset-0 flex items-center justify-center bg-black bg-opacity-50 z-20">
           <div className="relative p-4 bg-white rounded-lg shadow-md max-w-sm">
             <img
-              src={selectedImage}
+              src={fileUrl(selectedImage)}
               alt="Large preview"
               className="max-w-xs max-h-xs object-contain"
             />
@@ -1,6 +1,7 @@
 import { useEffect, useState } from 'react';
 import axios from 'axios';
 import { useNavigate, Link } from 'react-router-dom';
+import { fileUrl } from '../fileUrl';
 import './Styles/History.css';
 
 interface Upload {
@@ -12,42 +13,57 @@ interface Upload {
     created_at: string;
 }
 
+interface UploadPage {
+    items: Upload[];
+    next_cursor: string | null;
+}
+
+const PAGE_SIZE = 50;
+
 const History = () => {
     const [uploads, setUploads] = useState<Upload[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState<string>(''); 
     const navigate = useNavigate();
 
-    useEffect(() => {
-        const fetchUploads = async () => {
-            const accessToken = localStorage.getItem('access_token');
-            if (!accessToken) {
-                navigate('/login');
-                return;
-            }
+    // One page of uploads, newest first; cursor comes from the previous page
+    const fetchUploads = async (cursor: string | null) => {
+        const accessToken = localStorage.getItem('access_token');
+        if (!accessToken) {
+            navigate('/login');
+            return;
+        }
 
-            try {
-                const response = await axios.get('http://localhost:8000/api/vehicle/user/uploads', {
-                    headers: {
-                        Authorization: `Bearer ${accessToken}`
-                    }
-                });
-                
-                setUploads(response.data);
-            } catch (err: any) {
-                if (err.response && err.response.data && err.response.data.detail) {
-                    setError(err.response.data.detail);
-                } else {
-                    setError('Failed to fetch uploads. Please try again.');
-                }
-            } finally {
-                setLoading(false);
+        try {
+            const response = await axios.get<UploadPage>('http://localhost:8000/api/vehicle/user/uploads', {
+                headers: {
+                    Authorization: `Bearer ${accessToken}`
+                },
+                params: { limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) }
+            });
+            
+            setUploads((previous) => (cursor ? [...previous, ...response.data.items] : response.data.items));
+            setNextCursor(response.data.next_cursor);
+        } catch (err: any) {
+            if (err.response && err.response.data && err.response.data.detail) {
+                setError(err.response.data.detail);
+            } else {
+                setError('Failed to fetch uploads. Please try again.');
             }
-        };
+        }
+    };
 
-        fetchUploads();
+    useEffect(() => {
+        fetchUploads(null).finally(() => setLoading(false));
     }, [navigate]);
 
+    const loadMore = () => {
+        setLoadingMore(true);
+        fetchUploads(nextCursor).finally(() => setLoadingMore(false));
+    };
+
     if (loading) {
         return <div className="loading">Loading uploads...</div>;
     }
@@ -73,14 +89,19 @@ const History = () => {
                             
                             {/* Display video or image with square styling */}
                             {upload.upload_type === "video" ? (
-                                <video controls className="upload-thumbnail" src={upload.upload_url} />
+                                <video controls className="upload-thumbnail" src={fileUrl(upload.upload_url)} />
                             ) : (
-                                <img src={upload.upload_url} alt={upload.upload_name} className="upload-thumbnail" />
+                                <img src={fileUrl(upload.upload_url)} alt={upload.upload_name} className="upload-thumbnail" />
                             )}
                         </div>
                     </Link>
                 ))}
             </div>
+            {nextCursor && (
+                <button className="load-more" onClick={loadMore} disabled={loadingMore}>
+                    {loadingMore ? 'Loading...' : 'Load more'}
+                </button>
+            )}
         </div>
     );
 };
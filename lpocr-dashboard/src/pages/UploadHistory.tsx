@@ -2,6 +2,7 @@ import { useEffect, useState } from 'react';
 import { useParams } from 'react-router-dom';
 import axios from 'axios'; 
 import { useNavigate } from 'react-router-dom';
+import { fileUrl } from '../fileUrl';
 
 interface FileData {
   upload_url: string;
@@ -57,12 +58,12 @@ export default function UploadHistory() {
   const renderPreview = (url: string, type: string) => {
     if (type === 'image') {
       return (
-        <img src={url} alt="Uploaded preview" className="mt-2" width="300" />
+        <img src={fileUrl(url)} alt="Uploaded preview" className="mt-2" width="300" />
       );
     } else if (type === 'video') {
       return (
         <video className="mt-2" width="300" controls>
-          <source src={url} type="video/mp4" />
+          <source src={fileUrl(url)} type="video/mp4" />
           Your browser does not support the video tag.
         </video>
       );
@@ -117,7 +118,7 @@ export default function UploadHistory() {
                       <tr key={image.id} className="border-b">
                         <td className="py-2 flex justify-center">
                           <img
-                            src={image.crop_image_url}
+                            src={fileUrl(image.crop_image_url)}
                             alt="Cropped"
                             className="w-16 h-16 cursor-pointer"
                             onClick={() => openPopup(image.crop_image_url)}
@@ -151,7 +152,7 @@ export default function UploadHistory() {
       {showPopup && (
         <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50">
           <div className="bg-white p-4 rounded">
-            <img src={selectedImage!} alt="Cropped" className="max-w-full max-h-[80vh]" />
+            <img src={fileUrl(selectedImage!)} alt="Cropped" className="max-w-full max-h-[80vh]" />
             <button
               onClick={closePopup}
               className="mt-2 bg-red-500 text-white px-4 py-2 rounded hover:bg-red-600"